@@ -0,0 +1,105 @@
+"""Broadcast 事件调度吞吐量基准
+
+用法: python benchmark/broadcast_dispatch.py [事件数]
+
+对比不同调度选项下每秒可完成调度的事件数. 监听器均为几乎不做事的轻量监听器,
+结果反映的是 Broadcast 自身的调度开销.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kritor.broadcast import Broadcast  # noqa: E402
+from kritor.broadcast.entities.dispatcher import BaseDispatcher  # noqa: E402
+from kritor.broadcast.entities.event import Dispatchable  # noqa: E402
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface  # noqa: E402
+
+
+class Payload:
+    pass
+
+
+class BenchEvent(Dispatchable):
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.payload = Payload()
+
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            if interface.annotation is Payload:
+                return interface.event.payload
+            if interface.name == "index":
+                return interface.event.index
+
+
+class UnrelatedEvent(Dispatchable):
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            pass
+
+
+CONFIGS = {
+    "baseline": dict(compile_plans=False, inline_listeners=False),
+    "plans": dict(compile_plans=True, inline_listeners=False),
+    "inline": dict(compile_plans=False, inline_listeners=True),
+    "plans+inline": dict(compile_plans=True, inline_listeners=True),
+}
+
+
+def build(options: dict) -> Broadcast:
+    bcc = Broadcast(**options)
+
+    for _ in range(200):
+
+        async def unrelated(event: UnrelatedEvent):
+            pass
+
+        bcc.receiver(UnrelatedEvent)(unrelated)
+
+    # 一个同步监听器, 一个单独成层的异步监听器, 以及一个有两个异步监听器的层
+    @bcc.receiver(BenchEvent, priority=1)
+    def sync_listener(index):
+        pass
+
+    @bcc.receiver(BenchEvent, priority=2)
+    async def single(event: BenchEvent, payload: Payload):
+        pass
+
+    @bcc.receiver(BenchEvent, priority=3)
+    async def first(payload: Payload):
+        pass
+
+    @bcc.receiver(BenchEvent, priority=3)
+    async def second(index, payload: Payload):
+        pass
+
+    return bcc
+
+
+async def run(options: dict, count: int) -> float:
+    bcc = build(options)
+    start = time.perf_counter()
+    for index in range(count):
+        bcc.postEvent(BenchEvent(index))
+        if index % 256 == 0:
+            await asyncio.sleep(0)
+    while bcc.in_flight:
+        await asyncio.sleep(0.001)
+    return count / (time.perf_counter() - start)
+
+
+async def main(count: int) -> None:
+    baseline = None
+    for name, options in CONFIGS.items():
+        rate = await run(options, count)
+        baseline = baseline or rate
+        print(f"{name:>14}: {rate:10.0f} events/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
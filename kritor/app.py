@@ -1,17 +1,24 @@
 import asyncio
 import inspect
 import logging
-from queue import Queue
-from typing import Any, Callable, ClassVar, Dict, List, Optional, Union
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, ClassVar, Dict, List, Optional, Tuple, Union
 import uuid
 import grpc
-import time
-from threading import Thread
-from concurrent import futures
+from loguru import logger
 
-from kritor.bridge.message import to_message_chain, to_sender, to_source, to_contact, to_message
+from kritor.bridge.contact import ContactMap
+from kritor.contact import ContactCache
+from kritor.bridge.event import event_class_of, subscribed_streams, to_notice_event
+from kritor.bridge.message import EncodedMessageCache, to_message_chain, to_sender, to_source, to_contact, to_message
 from kritor.broadcast.entities.event import Dispatchable
-from kritor.event.lifecycle import ApplicationLaunch, ApplicationShutdown
+from kritor.connection.backoff import ExponentialBackoff
+from kritor.connection.channel import ChannelPool, ChannelStrategy
+from kritor.context import kritor_ctx
+from kritor.dispatcher import ContextDispatcher
+from kritor.event.lifecycle import AccountConnectionFail, AccountLaunch, ApplicationLaunch, ApplicationShutdown
+from kritor.intake import EventIntake, OverflowPolicy
+from kritor.worker import EventWorkerPool, WorkerSetup
 
 from .broadcast import Broadcast
 from .broadcast.interfaces.dispatcher import DispatcherInterface
@@ -21,9 +28,9 @@ from kritor.event.message import MessageEvent, FriendMessage, GroupMessage, Stra
 from kritor.handler import KritorHandler
 from kritor.message.chain import MessageChain
 from kritor.models.options import KritorOptions
-from kritor.models.relationship import Friend, Member, Stranger, Group
+from kritor.models import Profile
+from kritor.models.relationship import Friend, GroupConfig, Member, MemberInfo, MemberPerm, Stranger, Group
 from kritor.protos.common.contact_pb2 import Contact
-from kritor.protos.common.message_element_pb2 import Element, TextElement, AtElement
 
 from kritor.protos.auth.authentication_pb2_grpc import AuthenticationServiceStub
 from kritor.protos.auth.authentication_pb2 import GetAuthenticationStateResponse
@@ -33,6 +40,13 @@ from kritor.protos.auth.authentication_pb2 import GetTicketRequest, GetTicketRes
 from kritor.protos.auth.authentication_pb2 import DeleteTicketRequest, DeleteTicketResponse
 from kritor.protos.auth.authentication_pb2 import AddTicketRequest, AddTicketResponse
 
+from kritor.protos.friend.friend_pb2_grpc import FriendServiceStub
+from kritor.protos.friend.friend_pb2 import GetFriendProfileCardRequest
+
+from kritor.protos.group.group_pb2_grpc import GroupServiceStub
+from kritor.protos.group.group_pb2 import GetGroupMemberInfoRequest, ModifyGroupNameRequest, ModifyMemberCardRequest
+from kritor.protos.group.group_pb2 import SetGroupAdminRequest, SetGroupUniqueTitleRequest
+
 from kritor.protos.message.message_pb2_grpc import MessageServiceStub
 from kritor.protos.message.message_pb2 import SendMessageRequest, SendMessageResponse
 
@@ -41,18 +55,31 @@ from kritor.protos.event.event_pb2_grpc import EventServiceStub, EventServiceSer
 from kritor.protos.event.event_pb2 import RequestPushEvent, EventStructure, EventType
 from kritor.typing import class_property
 
-class KritorAsyncEventServiceServicer(EventServiceServicer):
-    async def RegisterPassiveListener(self, request_iterator, context: grpc.aio.ServicerContext):
-        for request in request_iterator:
-            print(request.type)
-        return RequestPushEvent(type=1)
+class RawMessageServiceStub(object):
+    """发送已序列化请求的 MessageService stub"""
+
+    def __init__(self, channel) -> None:
+        self.SendMessage = channel.unary_unary(
+            "/kritor.message.MessageService/SendMessage",
+            request_serializer=None,
+            response_deserializer=SendMessageResponse.FromString,
+        )
+
 
 class KritorEventServiceServicer(EventServiceServicer):
-    def RegisterPassiveListener(self, request_iterator, context: grpc.aio.ServicerContext):
-        for request in request_iterator:
-            print(request.type)
-        return RequestPushEvent(type=1)
-        # raise NotImplementedError('Method not implemented!')
+    """主动模式下接收 Kritor 端推送事件流的服务"""
+
+    def __init__(self, app: "KritorApp") -> None:
+        self.app = app
+
+    async def RegisterPassiveListener(self, request_iterator: AsyncIterator[EventStructure], context: grpc.aio.ServicerContext):
+        # 接收队列满时 receive_event 会等待, 此时不再读取请求流, 由 grpc 流量控制向推送端施加背压
+        if self.app.contact_cache is not None:
+            # Kritor 端已经连上, 此时才能拉取联系人
+            self.app.contact_cache.start()
+        async for event in request_iterator:
+            await self.app.receive_event(event)
+        return RequestPushEvent()
 
 class KritorApp(object):
     def __init__(self,
@@ -63,7 +90,23 @@ class KritorApp(object):
                  server_host: Union[str]=None,
                  server_port: Union[int]=None,
                  passive:bool = False,
-                 max_workers: int = 10
+                 max_workers: int = 10,
+                 channel_pool_size: int = 1,
+                 channel_strategy: ChannelStrategy = "round_robin",
+                 queue_capacity: int = 1024,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.Block,
+                 max_in_flight: Optional[int] = 1024,
+                 stream_linger: float = 30.0,
+                 reconnect_backoff: Optional[ExponentialBackoff] = None,
+                 dedupe_window: int = 4096,
+                 broadcast: Optional[Broadcast] = None,
+                 channels: Optional[ChannelPool] = None,
+                 workers: int = 0,
+                 worker_setup: Optional[WorkerSetup] = None,
+                 message_cache: int = 0,
+                 contact_capacity: int = 4096,
+                 contact_cache: bool = False,
+                 contact_ttl: float = 300.0,
             ) -> None:
         self.account = account
         self.ticket = ticket
@@ -78,18 +121,56 @@ class KritorApp(object):
         self.debug = True
         self.max_workers = max_workers
         self.target = f"{host}:{port}"
-
-        self.event_system = Broadcast()
-        self.event_queue = Queue()
+        # A pool passed in is shared with other accounts and closed by its owner.
+        self._owns_channels = channels is None
+        self.channels = channels or ChannelPool(self.target, size=channel_pool_size, strategy=channel_strategy)
+
+        self.event_system = broadcast or Broadcast(max_in_flight=max_in_flight)
+        if ContextDispatcher not in self.event_system.prelude_dispatchers:
+            self.event_system.prelude_dispatchers.append(ContextDispatcher)
+        self.intake = EventIntake(capacity=queue_capacity, policy=overflow_policy)
         self.running = True
+        # Tasks serving the app and draining the intake.
+        self._tasks: List[asyncio.Task] = []
+        # Event streams opened in passive mode, keyed by event type.
+        self.stream_linger = stream_linger
+        self._streams: Dict[int, asyncio.Task] = {}
+        self._stream_close_handles: Dict[int, asyncio.TimerHandle] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Reconnecting and deduplication of replayed messages.
+        self.connected = False
+        self.reconnects = 0
+        self.dispatched = 0
+        self.reconnect_backoff = reconnect_backoff or ExponentialBackoff()
+        self.dedupe_window = dedupe_window
+        self._recent_messages: "OrderedDict[Tuple[int, str, int], None]" = OrderedDict()
+        # Kritor events are handled by worker processes when workers > 0.
+        self.workers = EventWorkerPool(self, workers, worker_setup) if workers else None
+        # Serialized elements of frequently sent chains, disabled when message_cache is 0.
+        self.message_cache = EncodedMessageCache(message_cache) if message_cache else None
+        # Group / Member / Friend instances reused across events and updated in place.
+        # With the contact cache the map is unbounded; the cache prunes it to the fetched lists on every refresh.
+        self.contacts = ContactMap(None if contact_cache else contact_capacity)
+        self.contact_cache = ContactCache(self, ttl=contact_ttl) if contact_cache else None
         # Coroutines to be invoked when the event loop is shutting down.
         self._cleanup_coroutines = []
     
+    @classmethod
+    def current(cls) -> "KritorApp":
+        """获取当前正在处理事件的账号.
+
+        Returns:
+            KritorApp: 账号实例
+        """
+        return kritor_ctx.get()
+
     def start(self):
         self.running = True
 
     def close(self):
         self.running = False
+        for task in self._tasks:
+            task.cancel()
     
     @property
     def broadcast(self) -> Broadcast:
@@ -101,7 +182,26 @@ class KritorApp(object):
         return self.event_system
     
     def post_event(self, event: Dispatchable, upper_event: Optional[Dispatchable] = None):
-        self.event_queue.put((event, upper_event))
+        # 监听器通过 kritor_ctx 获取发布事件的账号, 共享 Broadcast 时也能区分
+        token = kritor_ctx.set(self)
+        try:
+            return self.broadcast.postEvent(event=event, upper_event=upper_event)
+        finally:
+            kritor_ctx.reset(token)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """账号运行统计信息"""
+        return {
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "streams": len(self._streams),
+            "dispatched": self.dispatched,
+            **self.intake.stats,
+            "contacts": self.contacts.stats,
+            **({"contact_cache": self.contact_cache.stats} if self.contact_cache else {}),
+            **({"worker_pool": self.workers.stats} if self.workers else {}),
+        }
     
     def _run_info(self, host: str, port: int, debug=False):
         lines = []
@@ -111,202 +211,266 @@ class KritorApp(object):
         lines.append(f"* Running on {host}:{port} (CTRL + C to quit)")
         print("\n".join(lines))
 
-    def _serve_active(self, host: str, port: int) -> None:
-        server = grpc.server(futures.ThreadPoolExecutor(max_workers=self.max_workers))
-        add_EventServiceServicer_to_server(KritorEventServiceServicer(), server)
-        server.add_insecure_port(f"{host}:{port}")
-        server.start()
-        server.wait_for_termination()
-
     async def _aserve_active(self, host: str, port: int) -> None:
-        server = grpc.aio.server()
-        add_EventServiceServicer_to_server(KritorAsyncEventServiceServicer(), server)
+        server = grpc.aio.server(maximum_concurrent_rpcs=self.max_workers)
+        add_EventServiceServicer_to_server(KritorEventServiceServicer(self), server)
         server.add_insecure_port(f"{host}:{port}")
         await server.start()
 
-        async def server_graceful_shutdown():
-            print("Starting graceful shutdown...")
+        self._tasks = [asyncio.create_task(server.wait_for_termination()), asyncio.create_task(self._dispatch_events())]
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            if self.running:
+                raise
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            self._tasks = []
             # Shuts down the server with 5 seconds of grace period. During the
             # grace period, the server won't accept new connections and allow
             # existing RPCs to continue within the grace period.
             await server.stop(5)
-
-        self._cleanup_coroutines.append(server_graceful_shutdown())
-        await server.wait_for_termination()
     
-    def _broadcast_message(self, event: EventStructure):
-        message_chain = to_message_chain(event.message.elements)
-        sender = to_sender(event.message.contact, event.message.sender)
+    def _convert_message(self, event: EventStructure) -> Optional[MessageEvent]:
+        # 多数消息只会被前缀等条件检查, 元素在监听器实际访问时才解码
+        message_chain = to_message_chain(event.message.elements, lazy=True)
+        sender = to_sender(event.message.contact, event.message.sender, self.contacts)
         source = to_source(event.message)
         if isinstance(sender, Friend):
-            self.post_event(
-                FriendMessage(
-                    messageChain=message_chain,
-                    sender=sender,
-                    source=source,
-                    quote=None
-                )
+            return FriendMessage(
+                messageChain=message_chain,
+                sender=sender,
+                source=source,
+                quote=None
             )
         elif isinstance(sender, Member):
-            self.post_event(
-                GroupMessage(
-                    messageChain=message_chain,
-                    sender=sender,
-                    source=source,
-                    quote=None
-                )
+            return GroupMessage(
+                messageChain=message_chain,
+                sender=sender,
+                source=source,
+                quote=None
             )
         elif isinstance(sender, Stranger):
-            self.post_event(
-                StrangerMessage(
-                    messageChain=message_chain,
-                    sender=sender,
-                    source=source,
-                    quote=None
-                )
+            return StrangerMessage(
+                messageChain=message_chain,
+                sender=sender,
+                source=source,
+                quote=None
             )
-    
-    def _thread_core_event(self):
-        with grpc.insecure_channel(self.target) as channel:
-            stub = EventServiceStub(channel)
-            core_event_list = stub.RegisterActiveListener(RequestPushEvent(type=EventType.EVENT_TYPE_CORE_EVENT))
-            core_event_iter = iter(core_event_list)
-            try:
-                while self.running:
-                    try:
-                        event: EventStructure = next(core_event_iter)
-                    except StopIteration:
-                        pass
-                    time.sleep(0.1)
-            except (KeyboardInterrupt, SystemExit):
-                return
-    
-    def _thread_message_event(self):
-        with grpc.insecure_channel(self.target) as channel:
-            stub = EventServiceStub(channel)
-            message_event_list = stub.RegisterActiveListener(RequestPushEvent(type=EventType.EVENT_TYPE_MESSAGE))
-            message_event_iter = iter(message_event_list)
-            try:
-                while self.running:
-                    try:
-                        event: EventStructure = next(message_event_iter)
-                        self._broadcast_message(event=event)
-                    except StopIteration:
-                        pass
-            except (KeyboardInterrupt, SystemExit):
-                return
-    
-    def _thread_notice_event(self):
-        with grpc.insecure_channel(self.target) as channel:
-            stub = EventServiceStub(channel)
-            notice_event_list = stub.RegisterActiveListener(RequestPushEvent(type=EventType.EVENT_TYPE_NOTICE))
-            notice_event_iter = iter(notice_event_list)
-            try:
-                while self.running:
-                    try:
-                        event: EventStructure = next(notice_event_iter)
-                    except StopIteration:
-                        pass
-                    time.sleep(0.1)
-            except (KeyboardInterrupt, SystemExit):
-                return
-    
-    def _thread_request_event(self):
-        with grpc.insecure_channel(self.target) as channel:
-            stub = EventServiceStub(channel)
-            request_event_list = stub.RegisterActiveListener(RequestPushEvent(type=EventType.EVENT_TYPE_NOTICE))
-            request_event_iter = iter(request_event_list)
-            try:
-                while self.running:
-                    try:
-                        event: EventStructure = next(request_event_iter)
-                    except StopIteration:
-                        pass
-                    time.sleep(0.1)
-            except (KeyboardInterrupt, SystemExit):
-                return
-    
-    def _serve_passive(self) -> None:
-        core_t = Thread(target=self._thread_core_event, args=[], daemon=True)
-        message_t = Thread(target=self._thread_message_event, args=[], daemon=True)
-        notice_t = Thread(target=self._thread_notice_event, args=[], daemon=True)
-        request_t = Thread(target=self._thread_request_event, args=[], daemon=True)
-
-        threads = [core_t, message_t, notice_t, request_t]
 
-        # Start all threads.
-        for t in threads:
-            t.start()
+    def _convert_event(self, event: EventStructure) -> Optional[Dispatchable]:
+        if event.type == EventType.EVENT_TYPE_MESSAGE:
+            return self._convert_message(event=event)
+        if event.type == EventType.EVENT_TYPE_NOTICE:
+            return to_notice_event(event.notice, self.contacts, self._account_uin)
 
-        loop = asyncio.get_event_loop()
+    @property
+    def _account_uin(self) -> Optional[int]:
         try:
-            while self.running:
-                event = self.event_queue.get()
-                loop.run_until_complete(self.broadcast.postEvent(event=event[0], upper_event=event[1]))
-                time.sleep(0.01)
-        except (KeyboardInterrupt, SystemExit):
-            self.close()
-            # Wait for all threads to finish.
-            for t in threads:
-                t.join(timeout=3)
-                if t.is_alive():
-                    print("Threading join timeout.")
-
-    async def _aserve_passive(self) -> None:
-        core_t = Thread(target=self._thread_core_event, args=[], daemon=True)
-        message_t = Thread(target=self._thread_message_event, args=[], daemon=True)
-        notice_t = Thread(target=self._thread_notice_event, args=[], daemon=True)
-        request_t = Thread(target=self._thread_request_event, args=[], daemon=True)
+            return int(self.account)
+        except (TypeError, ValueError):
+            return None
+
+    def _apply_notice(self, event: EventStructure) -> None:
+        """以通知更新联系人实例, 启用联系人缓存时同时更新缓存"""
+        if self.contact_cache is not None:
+            self.contact_cache.apply_notice(event.notice)
+        else:
+            self.contacts.apply_notice(event.notice, self._account_uin)
+
+    def _is_duplicate(self, event: EventStructure) -> bool:
+        """检查消息是否已经接收过, 用于过滤重连后重放的消息."""
+        if event.type != EventType.EVENT_TYPE_MESSAGE:
+            return False
+        contact = event.message.contact
+        key = (contact.scene, contact.peer, event.message.message_seq)
+        if key in self._recent_messages:
+            return True
+        self._recent_messages[key] = None
+        if len(self._recent_messages) > self.dedupe_window:
+            self._recent_messages.popitem(last=False)
+        return False
+
+    async def receive_event(self, event: EventStructure) -> None:
+        """转换并接收一个来自 Kritor 端的事件, 接收队列满时按溢出策略等待或丢弃."""
+        if self._is_duplicate(event):
+            return
+        if self.workers is not None:
+            # 多进程模式下由工作进程转换并分发, 主进程只维护联系人
+            if event.type == EventType.EVENT_TYPE_NOTICE:
+                self._apply_notice(event)
+            event_class = event_class_of(event, self._account_uin)
+            if event_class is not None and self.workers.is_subscribed(event_class):
+                await self.workers.submit(event)
+            return
+        converted = self._accept_event(event)
+        if converted is not None:
+            await self.intake.put(converted)
+
+    def _accept_event(self, event: EventStructure) -> Optional[Dispatchable]:
+        """转换事件并以通知更新联系人, 没有监听器的事件不做转换, 返回 None"""
+        converted = None
+        event_class = event_class_of(event, self._account_uin)
+        # 没有监听器的事件不做任何转换
+        if event_class is not None and self.broadcast.is_subscribed(event_class):
+            converted = self._convert_event(event)
+        if event.type == EventType.EVENT_TYPE_NOTICE:
+            # 转换时已经读取了变更前的名片与权限, 此后才更新联系人
+            self._apply_notice(event)
+        return converted
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected == self.connected:
+            return
+        self.connected = connected
+        if connected and self.contact_cache is not None:
+            self.contact_cache.start()
+        self.post_event(AccountLaunch(self) if connected else AccountConnectionFail(self))
+
+    async def _ensure_authenticated(self) -> None:
+        async with self.channels.alease(AuthenticationServiceStub) as stub:
+            state: GetAuthenticationStateResponse = await stub.GetAuthenticationState(
+                GetAuthenticationStateRequest(account=self.account)
+            )
+            if state.is_required:
+                await stub.Authenticate(AuthenticateRequest(account=self.account, ticket=self.ticket))
 
-        threads = [core_t, message_t, notice_t, request_t]
+    async def _consume_event_stream(self, event_type: "EventType.ValueType") -> None:
+        """持续消费一条事件流, 流结束或出错时按退避策略重新认证并重连."""
+        attempt = 0
+        try:
+            while True:
+                try:
+                    await self._ensure_authenticated()
+                    self._set_connected(True)
+                    stub = self.channels.astub(EventServiceStub)
+                    stream = stub.RegisterActiveListener(RequestPushEvent(type=event_type))
+                    try:
+                        # 队列满时在此等待, 暂停读取事件流以形成背压
+                        async for event in stream:
+                            attempt = 0
+                            await self.receive_event(event)
+                    finally:
+                        stream.cancel()
+                    logger.warning(f"Event stream {EventType.Name(event_type)} of {self.account} ended")
+                except grpc.aio.AioRpcError as e:
+                    logger.warning(f"Event stream {EventType.Name(event_type)} of {self.account} failed: {e.code()}")
+                except Exception:
+                    # 其他错误 (如事件转换失败) 同样重连, 不能让事件流任务就此退出
+                    logger.exception(f"Event stream {EventType.Name(event_type)} of {self.account} crashed")
+                self._set_connected(False)
+                await asyncio.sleep(self.reconnect_backoff.delay(attempt))
+                attempt += 1
+                self.reconnects += 1
+        finally:
+            if self._streams.get(event_type) is asyncio.current_task():
+                del self._streams[event_type]
+
+    def _sync_streams(self) -> None:
+        """按当前的监听情况打开需要的事件流, 并在 `stream_linger` 秒后关闭不再需要的事件流."""
+        if self._loop is None:
+            return
+        subscriptions = self.broadcast.subscriptions
+        if self.workers is not None:
+            subscriptions = subscriptions | self.workers.subscriptions
+        needed = subscribed_streams(subscriptions)
+        if self.contact_cache is not None:
+            # 联系人缓存依赖通知增量更新
+            needed.add(EventType.EVENT_TYPE_NOTICE)
+        for event_type in needed:
+            handle = self._stream_close_handles.pop(event_type, None)
+            if handle:
+                handle.cancel()
+            if event_type not in self._streams:
+                self._streams[event_type] = self._loop.create_task(self._consume_event_stream(event_type))
+        for event_type in self._streams.keys() - needed:
+            if event_type not in self._stream_close_handles:
+                self._stream_close_handles[event_type] = self._loop.call_later(
+                    self.stream_linger, self._close_stream, event_type
+                )
 
-        # Start all threads.
-        for t in threads:
-            t.start()
+    def _close_stream(self, event_type: "EventType.ValueType") -> None:
+        handle = self._stream_close_handles.pop(event_type, None)
+        if handle:
+            handle.cancel()
+        task = self._streams.pop(event_type, None)
+        if task:
+            task.cancel()
+
+    async def _dispatch_events(self) -> None:
+        while True:
+            event, upper_event = await self.intake.get()
+            await self.broadcast.wait_for_capacity()
+            try:
+                self.post_event(event=event, upper_event=upper_event)
+            except Exception:
+                # 单个事件的调度失败不能终止分发循环
+                logger.exception(f"Failed to dispatch {event.__class__.__name__} of {self.account}")
+                continue
+            self.dispatched += 1
 
+    async def _aserve_passive(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.broadcast.listener_change_hooks.append(self._sync_streams)
+        self._sync_streams()
+        self._tasks = [asyncio.create_task(self._dispatch_events())]
         try:
-            while self.running:
-                event = self.event_queue.get()
-                self.broadcast.postEvent(event=event[0], upper_event=event[1])
-                await asyncio.sleep(0.01)
-        except (KeyboardInterrupt, SystemExit):
-            self.running = False
-            # Wait for all threads to finish.
-            for t in threads:
-                t.join(timeout=3)
-                if t.is_alive():
-                    print("Threading join timeout.")
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            if self.running:
+                raise
+        finally:
+            self.broadcast.listener_change_hooks.remove(self._sync_streams)
+            self._loop = None
+            for task in self._tasks:
+                task.cancel()
+            self._tasks = []
+            for event_type in list(self._streams):
+                self._close_stream(event_type)
 
     def run(self, host: str, port: int) -> None:
-        self._run_info(host=host, port=port)
-        if self.passive:
-            self._serve_passive()
-        else:
-            self._serve_active(host=host, port=port)
+        loop = asyncio.get_event_loop()
+        try:
+            loop.run_until_complete(self.arun(host=host, port=port))
+        except (KeyboardInterrupt, SystemExit):
+            self.close()
 
     async def arun(self, host: str, port: int) -> None:
         self._run_info(host=host, port=port)
-        if self.passive:
-            await self._aserve_passive()
-        else:
-            await self._aserve_active(host=host, port=port)
-    
-    def launch_blocking(self, sync=True):
         self.post_event(ApplicationLaunch(self))
+        try:
+            if self.workers is not None:
+                await self.workers.start()
+            if self.passive:
+                await self._aserve_passive()
+            else:
+                await self._aserve_active(host=host, port=port)
+        finally:
+            if self.contact_cache is not None:
+                await self.contact_cache.stop()
+            if self.workers is not None and self.workers.started:
+                await self.workers.stop()
+            self.post_event(ApplicationShutdown(self))
+            if self._owns_channels:
+                await self.channels.aclose()
+
+    def launch_blocking(self, sync=True):
         if sync:
             self.run(self.server_host, self.server_port)
         else:
             loop = asyncio.get_event_loop()
             try:
                 loop.run_until_complete(self.arun(self.server_host, self.server_port))
+            except (KeyboardInterrupt, SystemExit):
+                self.close()
             finally:
-                loop.run_until_complete(*self._cleanup_coroutines)
+                if self._cleanup_coroutines:
+                    loop.run_until_complete(asyncio.gather(*self._cleanup_coroutines))
                 loop.close()
-        self.post_event(ApplicationShutdown(self))
     # Auth
     def authenticate(self, account: str, ticket: str) -> bool:
-        with grpc.insecure_channel(self.target) as channel:
-            stub = AuthenticationServiceStub(channel)
+        with self.channels.lease(AuthenticationServiceStub) as stub:
             out: GetAuthenticationStateResponse = stub.GetAuthenticationState(GetAuthenticationStateRequest(account = account))
             if out.is_required:
                 out = stub.Authenticate(AuthenticateRequest(account = account, ticket = ticket))
@@ -314,54 +478,158 @@ class KritorApp(object):
             return out.is_required
 
     def auth(self, account: str, ticket: str) -> AuthenticateResponse:
-        with grpc.insecure_channel(self.target) as channel:
-            stub = AuthenticationServiceStub(channel)
+        with self.channels.lease(AuthenticationServiceStub) as stub:
             out = stub.Authenticate(AuthenticateRequest(account = account, ticket = ticket))
             return out
 
     def get_auth_state(self, account: str) -> GetAuthenticationStateResponse:
-        with grpc.insecure_channel(self.target) as channel:
-            stub = AuthenticationServiceStub(channel)
+        with self.channels.lease(AuthenticationServiceStub) as stub:
             out = stub.GetAuthenticationState(GetAuthenticationStateRequest(account = account))
             return out
 
     def get_ticket(self, account: str, ticket: str) -> GetTicketResponse:
-        with grpc.insecure_channel(self.target) as channel:
-            stub = AuthenticationServiceStub(channel)
+        with self.channels.lease(AuthenticationServiceStub) as stub:
             out = stub.GetTicket(GetTicketRequest(account = account, ticket = ticket))
             return out
     
-    # Message
-    def send_message_sync(self, target: Union[Friend, Group], message: Union[MessageChain, str], retry_count:int = 3) -> SendMessageResponse:
-        with grpc.insecure_channel(self.target) as channel:
-            stub = MessageServiceStub(channel)
-            contact = to_contact(target)
-            if isinstance(message, str):
-                elements = [Element(type=Element.ElementType.TEXT, text=TextElement(text=message))]
-            else:
-                elements = to_message(message)
-            out = stub.SendMessage(
-                SendMessageRequest(
-                    contact = contact,
-                    elements = elements,
-                    retry_count=retry_count
-                )
+    # Contact
+    def _require_contact_cache(self) -> ContactCache:
+        if self.contact_cache is None:
+            raise RuntimeError("Contact cache is disabled, pass contact_cache=True to KritorApp.")
+        return self.contact_cache
+
+    async def get_friend_list(self) -> List[Friend]:
+        return await self._require_contact_cache().get_friends()
+
+    async def get_friend(self, friend_id: int) -> Optional[Friend]:
+        return await self._require_contact_cache().get_friend(friend_id)
+
+    async def get_group_list(self) -> List[Group]:
+        return await self._require_contact_cache().get_groups()
+
+    async def get_group(self, group_id: int) -> Optional[Group]:
+        return await self._require_contact_cache().get_group(group_id)
+
+    async def get_member_list(self, group: Union[Group, int]) -> List[Member]:
+        return await self._require_contact_cache().get_members(int(group))
+
+    async def get_member(self, group: Union[Group, int], member_id: int) -> Optional[Member]:
+        return await self._require_contact_cache().get_member(int(group), member_id)
+
+    async def get_group_config(self, group: Union[Group, int]) -> GroupConfig:
+        """获取群组设置, 目前只有群名由 Kritor 提供."""
+        cached = await self._require_contact_cache().get_group(int(group))
+        return GroupConfig(name=cached.name if cached is not None else "")
+
+    async def modify_group_config(self, group: Union[Group, int], config: GroupConfig) -> None:
+        """修改群组设置, 需要具有相应权限 (管理员/群主).
+
+        Kritor 只提供了修改群名的接口, 群名为空时不修改, 其余设置项不会被修改.
+
+        Args:
+            group (Union[Group, int]): 群组
+            config (GroupConfig): 修改后的群设置
+        """
+        if not config.name:
+            return
+        async with self.channels.alease(GroupServiceStub) as stub:
+            await stub.ModifyGroupName(ModifyGroupNameRequest(group_id=int(group), group_name=config.name))
+        self.contacts.group(int(group), name=config.name)
+
+    async def get_member_profile(self, member: Member) -> Profile:
+        """获取群成员的资料, 同时以查询结果更新群成员实例.
+
+        Kritor 的群成员信息不包含性别, 签名与邮箱, 对应的字段为默认值.
+
+        Args:
+            member (Member): 群成员
+
+        Returns:
+            Profile: 群成员的资料
+        """
+        async with self.channels.alease(GroupServiceStub) as stub:
+            response = await stub.GetGroupMemberInfo(
+                GetGroupMemberInfoRequest(group_id=member.group.id, target_uin=member.id, refresh=True)
             )
-            return out
+        info = response.group_member_info
+        self.contacts.update_member_info(member.group.id, info)
+        return Profile(nickname=info.nick, email=None, age=info.age or None, level=info.level, sign="", sex="UNKNOWN")
 
-    async def send_message(self, target: Union[Friend, Group], message: Union[MessageChain, str], retry_count:int = 3) -> SendMessageResponse:
-        async with grpc.aio.insecure_channel(self.target) as channel:
-            stub = MessageServiceStub(channel)
-            contact = to_contact(target)
-            if isinstance(message, str):
-                elements = [Element(type=Element.ElementType.TEXT, text=TextElement(text=message))]
-            else:
-                elements = to_message(message)
-            out = await stub.SendMessage(
-                SendMessageRequest(
-                    contact = contact,
-                    elements = elements,
-                    retry_count=retry_count
+    async def get_friend_profile(self, friend: Union[Friend, int]) -> Profile:
+        """获取好友的资料.
+
+        Kritor 的资料卡不包含性别, 年龄, 签名与邮箱, 对应的字段为默认值.
+
+        Args:
+            friend (Union[Friend, int]): 好友
+
+        Raises:
+            ValueError: Kritor 端没有返回该好友的资料卡.
+
+        Returns:
+            Profile: 好友的资料
+        """
+        async with self.channels.alease(FriendServiceStub) as stub:
+            response = await stub.GetFriendProfileCard(GetFriendProfileCardRequest(target_uins=[int(friend)]))
+        if not response.friends_profile_card:
+            raise ValueError(f"No profile card of friend {int(friend)}.")
+        card = response.friends_profile_card[0]
+        self.contacts.friend(card.uin, nickname=card.nick, remark=card.remark)
+        return Profile(nickname=card.nick, email=None, age=None, level=card.level, sign="", sex="UNKNOWN")
+
+    async def modify_member_info(self, member: Member, info: MemberInfo) -> None:
+        """修改群成员的群名片与头衔, 需要具有相应权限 (管理员/群主, 头衔需要群主).
+
+        Args:
+            member (Member): 群成员
+            info (MemberInfo): 修改后的状态, 头衔为 None 时不修改头衔
+        """
+        group_id = member.group.id
+        async with self.channels.alease(GroupServiceStub) as stub:
+            await stub.ModifyMemberCard(ModifyMemberCardRequest(group_id=group_id, target_uin=member.id, card=info.name))
+            if info.special_title is not None:
+                await stub.SetGroupUniqueTitle(
+                    SetGroupUniqueTitleRequest(group_id=group_id, target_uin=member.id, unique_title=info.special_title)
                 )
+        updated = self.contacts.update_member_card(group_id, member.id, info.name)
+        if info.special_title is not None:
+            updated.special_title = info.special_title or None
+
+    async def modify_member_admin(self, assign: bool, member: Member) -> None:
+        """设置或取消群成员的管理员, 需要具有相应权限 (群主).
+
+        Args:
+            assign (bool): 是否设置为管理员
+            member (Member): 群成员
+        """
+        async with self.channels.alease(GroupServiceStub) as stub:
+            await stub.SetGroupAdmin(SetGroupAdminRequest(group_id=member.group.id, target_uin=member.id, is_admin=assign))
+        if self.contact_cache is not None:
+            self.contact_cache.set_admin(member.group.id, member.id, assign)
+        else:
+            self.contacts.member(
+                member.group.id, member.id, permission=MemberPerm.Administrator if assign else MemberPerm.Member
             )
-            return out
+
+    # Message
+    def _send_message_request(
+        self, target: Union[Friend, Group], message: Union[MessageChain, str], retry_count: int
+    ) -> Union[SendMessageRequest, bytes]:
+        request = SendMessageRequest(contact=to_contact(target), retry_count=retry_count)
+        if self.message_cache is None:
+            request.elements.extend(to_message(message))
+            return request
+        # protobuf 中拼接两段编码等价于合并两条消息, 缓存的 elements 无需重新编码
+        return request.SerializeToString() + self.message_cache.encode(message)
+
+    def send_message_sync(self, target: Union[Friend, Group], message: Union[MessageChain, str], retry_count:int = 3) -> SendMessageResponse:
+        request = self._send_message_request(target, message, retry_count)
+        stub_type = MessageServiceStub if isinstance(request, SendMessageRequest) else RawMessageServiceStub
+        with self.channels.lease(stub_type) as stub:
+            return stub.SendMessage(request)
+
+    async def send_message(self, target: Union[Friend, Group], message: Union[MessageChain, str], retry_count:int = 3) -> SendMessageResponse:
+        request = self._send_message_request(target, message, retry_count)
+        stub_type = MessageServiceStub if isinstance(request, SendMessageRequest) else RawMessageServiceStub
+        async with self.channels.alease(stub_type) as stub:
+            return await stub.SendMessage(request)
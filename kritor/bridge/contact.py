@@ -0,0 +1,307 @@
+from collections import OrderedDict
+from typing import AbstractSet, Any, Dict, Hashable, Optional, Set, Tuple, TypeVar, Union
+
+from kritor.models.relationship import Friend, Group, Member, MemberPerm, Stranger
+from kritor.protos.common.contact_pb2 import Contact, Scene, Sender
+
+T = TypeVar("T")
+
+# protobuf 枚举的属性访问较慢, 热路径上使用模块级常量
+_GROUP = Scene.GROUP
+_FRIEND = Scene.FRIEND
+
+
+class ContactMap:
+    """账号的联系人身份映射.
+
+    以 (场景, 会话, QQ 号) 为键保存 `Group`, `Member` 与 `Friend` 实例, 同一个联系人在不同事件中得到的是同一个对象, \
+    不需要为每条消息重新校验模型. `ContactCache` 查询到更完整的信息 (群信息, 群成员信息) 或收到通知时原地更新实例, \
+    之前事件中拿到的对象也能看到最新的名称与权限.
+
+    每类实例按最近使用淘汰, 被淘汰的实例不会再被更新. 启用 `ContactCache` 时不淘汰, \
+    由缓存在每次拉取列表后用 `retain_*` 清理不在列表中的实例.
+    """
+
+    capacity: Optional[int]
+
+    def __init__(self, capacity: Optional[int] = 4096) -> None:
+        """
+        Args:
+            capacity (int, optional): 每类联系人最多保存的实例数, 为 None 时不淘汰. 默认为 4096.
+        """
+        if capacity is not None and capacity < 1:
+            raise ValueError("ContactMap capacity must be at least 1.")
+        self.capacity = capacity
+        self._groups: "OrderedDict[Hashable, Group]" = OrderedDict()
+        self._members: "OrderedDict[Hashable, Member]" = OrderedDict()
+        self._friends: "OrderedDict[Hashable, Friend]" = OrderedDict()
+        self._carded: Set[Tuple[int, int]] = set()
+        """群名片已知的成员, 消息中的昵称不会覆盖它们的名称"""
+        self._group_members: Dict[int, Set[int]] = {}
+        """群号 -> 保存了实例的成员"""
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._groups) + len(self._members) + len(self._friends)
+
+    def _touch(self, table: "OrderedDict[Hashable, T]", key: Hashable) -> Optional[T]:
+        value = table.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            table.move_to_end(key)
+        return value
+
+    def _put(self, table: "OrderedDict[Hashable, T]", key: Hashable, value: T) -> T:
+        table[key] = value
+        if self.capacity is not None and len(table) > self.capacity:
+            evicted, _ = table.popitem(last=False)
+            if table is self._members:
+                self._forget_member(evicted[1], evicted[2])
+        return value
+
+    def _forget_member(self, group_id: int, member_id: int) -> None:
+        self._carded.discard((group_id, member_id))
+        members = self._group_members.get(group_id)
+        if members is not None:
+            members.discard(member_id)
+            if not members:
+                del self._group_members[group_id]
+
+    def group(self, group_id: int, name: Optional[str] = None, permission: Optional[MemberPerm] = None) -> Group:
+        """获取群组实例, 不存在时创建.
+
+        Args:
+            group_id (int): 群号
+            name (str, optional): 已知的群名, 提供时更新实例
+            permission (MemberPerm, optional): 已知的账号在群中的权限, 提供时更新实例
+
+        Returns:
+            Group: 群组
+        """
+        group = self._touch(self._groups, (_GROUP, group_id, 0))
+        if group is None:
+            group = Group(id=group_id, name=name or "", permission=permission or MemberPerm.Member)
+            return self._put(self._groups, (_GROUP, group_id, 0), group)
+        if name and group.name != name:
+            group.name = name
+        if permission is not None and group.account_perm is not permission:
+            group.account_perm = permission
+        return group
+
+    def member(
+        self,
+        group_id: int,
+        member_id: int,
+        name: Optional[str] = None,
+        permission: Optional[MemberPerm] = None,
+    ) -> Member:
+        """获取群成员实例, 不存在时创建.
+
+        Args:
+            group_id (int): 群号
+            member_id (int): QQ 号
+            name (str, optional): 已知的显示名称, 提供时更新实例
+            permission (MemberPerm, optional): 已知的群权限, 提供时更新实例
+
+        Returns:
+            Member: 群成员
+        """
+        key = (_GROUP, group_id, member_id)
+        member = self._touch(self._members, key)
+        group_key = (_GROUP, group_id, 0)
+        group = self._groups.get(group_key)
+        if group is None:  # 群组实例尚未创建或已被淘汰
+            group = Group(id=group_id, name="", permission=MemberPerm.Member)
+            self._put(self._groups, group_key, group)
+        else:
+            self._groups.move_to_end(group_key)
+        if member is None:
+            member = Member(
+                id=member_id,
+                memberName=name or "",
+                permission=permission or MemberPerm.Member,
+                group=group,
+            )
+            self._group_members.setdefault(group_id, set()).add(member_id)
+            return self._put(self._members, key, member)
+        if member.group is not group:
+            member.group = group
+        # pydantic 的属性赋值较慢, 只在变化时赋值
+        if name and member.name != name:
+            member.name = name
+        if permission is not None and member.permission is not permission:
+            member.permission = permission
+        return member
+
+    def friend(self, friend_id: int, nickname: Optional[str] = None, remark: Optional[str] = None) -> Friend:
+        """获取好友实例, 不存在时创建.
+
+        Args:
+            friend_id (int): QQ 号
+            nickname (str, optional): 已知的昵称, 提供时更新实例
+            remark (str, optional): 已知的备注, 提供时更新实例
+
+        Returns:
+            Friend: 好友
+        """
+        key = (_FRIEND, friend_id, friend_id)
+        friend = self._touch(self._friends, key)
+        if friend is None:
+            friend = Friend(id=friend_id, nickname=nickname or "", remark=remark or "")
+            return self._put(self._friends, key, friend)
+        if nickname and friend.nickname != nickname:
+            friend.nickname = nickname
+        if remark is not None and friend.remark != remark:
+            friend.remark = remark
+        return friend
+
+    def sender(self, contact: Contact, sender: Sender) -> Union[Friend, Member, Stranger]:
+        """获取消息发送者, 昵称与已有实例不同时原地更新.
+
+        Args:
+            contact (Contact): 消息所在的会话
+            sender (Sender): 消息发送者
+
+        Returns:
+            Union[Friend, Member, Stranger]: 发送者
+        """
+        if contact.scene == _GROUP:
+            group_id = int(contact.peer)
+            # 消息只带有昵称, 已知群名片时保留群名片
+            known = (group_id, sender.uin) in self._carded
+            return self.member(group_id, sender.uin, name=None if known else sender.nick)
+        elif contact.scene == _FRIEND:
+            return self.friend(sender.uin, nickname=sender.nick)
+        raise NotImplementedError()
+
+    def update_member_info(self, group_id: int, info: Any) -> Member:
+        """以群成员信息 (`GroupMemberInfo`) 更新群成员实例.
+
+        Args:
+            group_id (int): 群号
+            info (GroupMemberInfo): 群成员信息
+
+        Returns:
+            Member: 更新后的群成员
+        """
+        if info.card:
+            self._carded.add((group_id, info.uin))
+        else:
+            self._carded.discard((group_id, info.uin))
+        member = self.member(group_id, info.uin, name=info.card or info.nick)
+        member.special_title = info.unique_title or None
+        member.join_timestamp = info.join_time or None
+        member.last_speak_timestamp = info.last_active_time or None
+        member.mute_time = info.shut_up_timestamp or None
+        return member
+
+    def update_member_card(self, group_id: int, member_id: int, card: str) -> Member:
+        """群名片变更时更新群成员实例, 名片为空时名称在下一条消息中恢复为昵称.
+
+        Args:
+            group_id (int): 群号
+            member_id (int): QQ 号
+            card (str): 新的群名片
+
+        Returns:
+            Member: 更新后的群成员
+        """
+        if card:
+            self._carded.add((group_id, member_id))
+        else:
+            self._carded.discard((group_id, member_id))
+        return self.member(group_id, member_id, name=card or None)
+
+    def update_group_info(self, info: Any) -> Group:
+        """以群信息 (`GroupInfo`) 更新群组实例.
+
+        Args:
+            info (GroupInfo): 群信息
+
+        Returns:
+            Group: 更新后的群组
+        """
+        return self.group(info.group_id, name=info.group_name)
+
+    def remove_member(self, group_id: int, member_id: int) -> None:
+        """移除群成员实例"""
+        if self._members.pop((_GROUP, group_id, member_id), None) is not None:
+            self._forget_member(group_id, member_id)
+
+    def remove_group(self, group_id: int) -> None:
+        """移除群组及其成员实例"""
+        self._groups.pop((_GROUP, group_id, 0), None)
+        for member_id in self._group_members.pop(group_id, ()):
+            del self._members[(_GROUP, group_id, member_id)]
+            self._carded.discard((group_id, member_id))
+
+    def remove_friend(self, friend_id: int) -> None:
+        """移除好友实例"""
+        self._friends.pop((_FRIEND, friend_id, friend_id), None)
+
+    def apply_notice(self, notice: Any, account: Optional[int] = None) -> None:
+        """以 Kritor 通知 (`NoticeEvent`) 更新实例: 群名片, 头衔与管理员变更原地更新, 退群与删除好友移除实例.
+
+        Args:
+            notice (NoticeEvent): Kritor 通知
+            account (int, optional): 接收通知的账号, 用于识别 Bot 自身的权限变更与退群
+        """
+        kind = notice.WhichOneof("notice")
+        if kind == "group_card_changed":
+            body = notice.group_card_changed
+            self.update_member_card(body.group_id, body.target_uin, body.new_card)
+        elif kind == "group_member_unique_title_changed":
+            body = notice.group_member_unique_title_changed
+            member = self.member(body.group_id, body.target)
+            if member.special_title != (body.title or None):
+                member.special_title = body.title or None
+        elif kind == "group_admin_changed":
+            body = notice.group_admin_changed
+            permission = MemberPerm.Administrator if body.is_admin else MemberPerm.Member
+            if body.target_uin == account:
+                self.group(body.group_id, permission=permission)
+            self.member(body.group_id, body.target_uin, permission=permission)
+        elif kind == "group_member_decrease":
+            body = notice.group_member_decrease
+            if body.type == body.KICK_ME or body.target_uin == account:
+                self.remove_group(body.group_id)
+            else:
+                self.remove_member(body.group_id, body.target_uin)
+        elif kind == "friend_increase":
+            body = notice.friend_increase
+            self.friend(body.friend_uin, nickname=body.friend_nick)
+        elif kind == "friend_decrease":
+            self.remove_friend(notice.friend_decrease.friend_uin)
+
+    def retain_members(self, group_id: int, member_ids: AbstractSet[int]) -> None:
+        """只保留群组中给定成员的实例, 用于以最新的成员列表清理已经离开的成员与临时的发送者"""
+        for member_id in list(self._group_members.get(group_id, ())):
+            if member_id not in member_ids:
+                self.remove_member(group_id, member_id)
+
+    def retain_groups(self, group_ids: AbstractSet[int]) -> None:
+        """只保留给定群组及其成员的实例"""
+        for _, group_id, _ in list(self._groups):
+            if group_id not in group_ids:
+                self.remove_group(group_id)
+        for group_id in list(self._group_members):  # 群组实例已被淘汰的成员
+            if group_id not in group_ids:
+                self.remove_group(group_id)
+
+    def retain_friends(self, friend_ids: AbstractSet[int]) -> None:
+        """只保留给定好友的实例"""
+        for key in [key for key in self._friends if key[1] not in friend_ids]:
+            del self._friends[key]
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "groups": len(self._groups),
+            "members": len(self._members),
+            "friends": len(self._friends),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,178 @@
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Set, Type
+
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.event import KritorEvent
+from kritor.event.message import FriendMessage, GroupMessage, MessageEvent
+from kritor.event.mirai import (
+    BotGroupPermissionChangeEvent,
+    BotJoinGroupEvent,
+    BotLeaveEventActive,
+    BotLeaveEventKick,
+    FriendEvent,
+    GroupEvent,
+    MemberCardChangeEvent,
+    MemberJoinEvent,
+    MemberLeaveEventKick,
+    MemberLeaveEventQuit,
+    MemberPermissionChangeEvent,
+    MemberSpecialTitleChangeEvent,
+    NudgeEvent,
+    RequestEvent,
+)
+from kritor.models.relationship import Member, MemberPerm
+from kritor.protos.common.contact_pb2 import Scene
+from kritor.protos.event.event_pb2 import EventStructure, EventType
+from kritor.utils import gen_subclass
+
+if TYPE_CHECKING:
+    from kritor.bridge.contact import ContactMap
+
+
+def event_stream_of(event_class: Type[Dispatchable]) -> Optional["EventType.ValueType"]:
+    """获取事件类所属的 Kritor 事件流, 不由 Kritor 推送的事件返回 None.
+
+    Args:
+        event_class (Type[Dispatchable]): 事件类
+
+    Returns:
+        Optional[EventType.ValueType]: 事件流类型
+    """
+    if not issubclass(event_class, KritorEvent):
+        return None
+    if issubclass(event_class, RequestEvent):
+        return EventType.EVENT_TYPE_REQUEST
+    if issubclass(event_class, MessageEvent):
+        return EventType.EVENT_TYPE_MESSAGE
+    if issubclass(event_class, (GroupEvent, FriendEvent, NudgeEvent)):
+        return EventType.EVENT_TYPE_NOTICE
+    return EventType.EVENT_TYPE_CORE_EVENT
+
+
+def subscribed_streams(event_classes: Iterable[Type[Dispatchable]]) -> Set["EventType.ValueType"]:
+    """获取监听给定事件类 (及其子类) 所需要的事件流.
+
+    Args:
+        event_classes (Iterable[Type[Dispatchable]]): 被监听的事件类
+
+    Returns:
+        Set[EventType.ValueType]: 需要打开的事件流类型
+    """
+    streams = set()
+    for event_class in event_classes:
+        for sub_class in gen_subclass(event_class):
+            stream = event_stream_of(sub_class)
+            if stream is not None:
+                streams.add(stream)
+    return streams
+
+
+def event_class_of(event: EventStructure, account: Optional[int] = None) -> Optional[Type[Dispatchable]]:
+    """在不转换事件内容的情况下获取事件将被转换成的事件类, 无法转换的事件返回 None.
+
+    Args:
+        event (EventStructure): Kritor 事件
+        account (int, optional): 接收事件的账号, 用于区分与 Bot 自身有关的通知
+
+    Returns:
+        Optional[Type[Dispatchable]]: 事件类
+    """
+    if event.type == EventType.EVENT_TYPE_MESSAGE:
+        scene = event.message.contact.scene
+        if scene == Scene.GROUP:
+            return GroupMessage
+        elif scene == Scene.FRIEND:
+            return FriendMessage
+    elif event.type == EventType.EVENT_TYPE_NOTICE:
+        return notice_class_of(event.notice, account)
+    return None
+
+
+def notice_class_of(notice: Any, account: Optional[int] = None) -> Optional[Type[Dispatchable]]:
+    """获取 Kritor 通知将被转换成的事件类, 没有对应事件的通知返回 None.
+
+    Args:
+        notice (NoticeEvent): Kritor 通知
+        account (int, optional): 接收通知的账号
+
+    Returns:
+        Optional[Type[Dispatchable]]: 事件类
+    """
+    kind = notice.WhichOneof("notice")
+    if kind == "group_card_changed":
+        return MemberCardChangeEvent
+    if kind == "group_member_unique_title_changed":
+        return MemberSpecialTitleChangeEvent
+    if kind == "group_admin_changed":
+        body = notice.group_admin_changed
+        return BotGroupPermissionChangeEvent if body.target_uin == account else MemberPermissionChangeEvent
+    if kind == "group_member_increase":
+        return BotJoinGroupEvent if notice.group_member_increase.target_uin == account else MemberJoinEvent
+    if kind == "group_member_decrease":
+        body = notice.group_member_decrease
+        if body.type == body.KICK_ME:
+            return BotLeaveEventKick
+        if body.target_uin == account:
+            return BotLeaveEventActive
+        return MemberLeaveEventKick if body.type == body.KICK else MemberLeaveEventQuit
+    return None
+
+
+def to_notice_event(notice: Any, contacts: "ContactMap", account: Optional[int] = None) -> Optional[Dispatchable]:
+    """将 Kritor 通知转换为事件, 事件中的群组与成员取自联系人映射.
+
+    变更前的名片, 头衔与权限取自映射中的实例, 须在以通知更新映射 (`ContactMap.apply_notice`) 之前调用.
+
+    Args:
+        notice (NoticeEvent): Kritor 通知
+        contacts (ContactMap): 联系人身份映射
+        account (int, optional): 接收通知的账号
+
+    Returns:
+        Optional[Dispatchable]: 转换得到的事件, 没有对应事件的通知返回 None
+    """
+    event_class = notice_class_of(notice, account)
+    if event_class is None:
+        return None
+
+    def operator_of(group_id: int, operator_uin: int) -> Optional[Member]:
+        # 操作者为 Bot 账号时为 None
+        return None if not operator_uin or operator_uin == account else contacts.member(group_id, operator_uin)
+
+    if event_class is MemberCardChangeEvent:
+        body = notice.group_card_changed
+        member = contacts.member(body.group_id, body.target_uin)
+        return MemberCardChangeEvent(
+            origin=member.name,
+            current=body.new_card,
+            member=member,
+            operator=operator_of(body.group_id, body.operator_uin),
+        )
+    if event_class is MemberSpecialTitleChangeEvent:
+        body = notice.group_member_unique_title_changed
+        member = contacts.member(body.group_id, body.target)
+        return MemberSpecialTitleChangeEvent(origin=member.special_title or "", current=body.title, member=member)
+    if event_class is BotGroupPermissionChangeEvent:
+        body = notice.group_admin_changed
+        group = contacts.group(body.group_id)
+        current = MemberPerm.Administrator if body.is_admin else MemberPerm.Member
+        return BotGroupPermissionChangeEvent(origin=group.account_perm, current=current, group=group)
+    if event_class is MemberPermissionChangeEvent:
+        body = notice.group_admin_changed
+        member = contacts.member(body.group_id, body.target_uin)
+        current = MemberPerm.Administrator if body.is_admin else MemberPerm.Member
+        return MemberPermissionChangeEvent(origin=member.permission, current=current, member=member)
+    if event_class is BotJoinGroupEvent or event_class is MemberJoinEvent:
+        body = notice.group_member_increase
+        inviter = operator_of(body.group_id, body.operator_uin) if body.type == body.INVITE else None
+        if event_class is BotJoinGroupEvent:
+            return BotJoinGroupEvent(group=contacts.group(body.group_id), invitor=inviter)
+        return MemberJoinEvent(member=contacts.member(body.group_id, body.target_uin), invitor=inviter)
+    body = notice.group_member_decrease
+    if event_class is BotLeaveEventKick:
+        return BotLeaveEventKick(group=contacts.group(body.group_id), operator=operator_of(body.group_id, body.operator_uin))
+    if event_class is BotLeaveEventActive:
+        return BotLeaveEventActive(group=contacts.group(body.group_id))
+    member = contacts.member(body.group_id, body.target_uin)
+    if event_class is MemberLeaveEventKick:
+        return MemberLeaveEventKick(member=member, operator=operator_of(body.group_id, body.operator_uin))
+    return MemberLeaveEventQuit(member=member)
@@ -1,24 +1,50 @@
+from collections import OrderedDict
 from datetime import datetime
-from typing import Any, List, Type, Union
+from hashlib import blake2b
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Type, Union
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from google.protobuf.json_format import MessageToDict, ParseDict
+from loguru import logger
+from pydantic import PrivateAttr
+
 from kritor.message import Source
-from kritor.message.chain import MessageChain
+from kritor.message.chain import Element_T, MessageChain
 from kritor.message.element import (
-    Plain,
+    App,
     At,
     AtAll,
+    Basketball,
+    BubbleFace,
+    ContactShare,
     Dice,
+    DisplayStrategy,
+    Element,
     Face,
-    Poke,
-    Quote,
-    Image,
-    Forward,
     File,
-    MultimediaElement,
     FlashImage,
-    Voice,
-    Video,
+    Forward,
+    Gift,
+    Image,
+    Json,
+    Keyboard,
+    Location,
+    Markdown,
+    MarketFace,
+    MultimediaElement,
     MusicShare,
-    
+    MusicShareKind,
+    Plain,
+    Poke,
+    Quote,
+    Rps,
+    Share,
+    Video,
+    Voice,
+    Weather,
+    Xml,
 )
 from kritor.models.relationship import (
     Client,
@@ -29,8 +55,9 @@ from kritor.models.relationship import (
     MemberPerm,
 )
 from kritor.protos.common.message_data_pb2 import PushMessageBody
+from kritor.protos.common.message_element_pb2 import Element as KritorElement
 from kritor.protos.common.message_element_pb2 import (
-    Element,
+    ImageType,
     TextElement,
     AtElement,
     FaceElement,
@@ -56,9 +83,16 @@ from kritor.protos.common.message_element_pb2 import (
     FileElement,
     MarkdownElement,
     KeyboardElement,
+    KeyboardRow,
+    Button,
+    CustomMusicData,
 )
+from kritor.protos.message.message_pb2 import SendMessageRequest
 from kritor.protos.common.contact_pb2 import Contact, Sender, Scene
 
+if TYPE_CHECKING:
+    from kritor.bridge.contact import ContactMap
+
 
 def to_contact(target: Union[Friend, Group]) -> Contact:
     if isinstance(target, Group):
@@ -68,167 +102,771 @@ def to_contact(target: Union[Friend, Group]) -> Contact:
     else:
         raise NotImplementedError()
 
-def to_multimedia(multimedia_type: str, multimedia_class: Type, element_field: Any):
-    out = None
+ElementDecoder = Callable[[Any], Optional[Element]]
+"""元素解码器, 接收 Kritor `Element` 中 `data` 字段的具体消息 (如 `TextElement`), 返回消息元素, 返回 None 时忽略该元素"""
+
+ELEMENT_DECODERS: Dict[str, ElementDecoder] = {}
+"""以 Kritor `Element.data` 字段名为键的元素解码器"""
+
+ELEMENT_CLASSES: Dict[str, Type[Element]] = {}
+"""解码结果类型固定的字段 -> 元素类型, 供 `LazyMessageChain` 在不解码的情况下判断元素类型"""
+
+
+def register_decoder(field: str, element_class: Optional[Type[Element]] = None) -> Callable[[ElementDecoder], ElementDecoder]:
+    """注册 (或覆盖) 一个元素解码器.
+
+    Args:
+        field (str): Kritor `Element.data` 的字段名, 如 `text`, `image`
+        element_class (Type[Element], optional): 解码结果的类型. 结果类型取决于内容 (如 `At` / `AtAll`) 时不填.
+
+    Returns:
+        Callable[[ElementDecoder], ElementDecoder]: 装饰器
+    """
+
+    def wrapper(decoder: ElementDecoder) -> ElementDecoder:
+        ELEMENT_DECODERS[field] = decoder
+        if element_class is None:
+            ELEMENT_CLASSES.pop(field, None)
+        else:
+            ELEMENT_CLASSES[field] = element_class
+        return decoder
+
+    return wrapper
+
+
+def to_multimedia(multimedia_class: Type[MultimediaElement], element_field: Any) -> MultimediaElement:
+    multimedia_type = element_field.WhichOneof("data")
+    file_id = element_field.file_md5 or None
     if multimedia_type == "file":
-        out = multimedia_class(
-            id=element_field.file_md5,
-            data_bytes=element_field.file,
-        )
+        return multimedia_class(id=file_id, data_bytes=element_field.file)
     elif multimedia_type == "file_name":
-        out = multimedia_class(
-            id=element_field.file_md5,
-            path=element_field.file_path,
-        )
+        return multimedia_class(id=file_id or element_field.file_name)
     elif multimedia_type == "file_path":
-        out = multimedia_class(
-            id=element_field.file_md5,
-            path=element_field.file_path,
-        )
+        # 路径位于 Kritor 端所在的机器上, 不在此处读取
+        path = Path(element_field.file_path)
+        return multimedia_class(id=file_id, url=path.as_uri() if path.is_absolute() else element_field.file_path)
     elif multimedia_type == "file_url":
-        out = multimedia_class(
-            id=element_field.file_md5,
-            url=element_field.file_url,
+        return multimedia_class(id=file_id, url=element_field.file_url)
+    return multimedia_class(id=file_id)
+
+
+@register_decoder("text", Plain)
+def _decode_text(text: TextElement) -> Element:
+    return Plain(text=text.text)
+
+
+@register_decoder("at")
+def _decode_at(at: AtElement) -> Element:
+    if at.uid == "all" or (at.HasField("uin") and at.uin == 0):
+        return AtAll()
+    return At(target=at.uin, uid=at.uid if at.HasField("uid") else None)
+
+
+@register_decoder("face", Face)
+def _decode_face(face: FaceElement) -> Element:
+    return Face(id=face.id, is_big=face.is_big, result=face.result if face.HasField("result") else None)
+
+
+@register_decoder("bubble_face", BubbleFace)
+def _decode_bubble_face(bubble_face: BubbleFaceElement) -> Element:
+    return BubbleFace(id=bubble_face.id, count=bubble_face.count)
+
+
+@register_decoder("reply", Quote)
+def _decode_reply(reply: ReplyElement) -> Quote:
+    return Quote(id=int(reply.message_id or 0))
+
+
+@register_decoder("image")
+def _decode_image(image: ImageElement) -> Element:
+    return to_multimedia(FlashImage if image.type == ImageType.FLASH else Image, image)
+
+
+@register_decoder("voice", Voice)
+def _decode_voice(voice: VoiceElement) -> Element:
+    return to_multimedia(Voice, voice)
+
+
+@register_decoder("video", Video)
+def _decode_video(video: VideoElement) -> Element:
+    return to_multimedia(Video, video)
+
+
+@register_decoder("basketball", Basketball)
+def _decode_basketball(basketball: BasketballElement) -> Element:
+    return Basketball(value=basketball.id)
+
+
+@register_decoder("dice", Dice)
+def _decode_dice(dice: DiceElement) -> Element:
+    return Dice(value=dice.id)
+
+
+@register_decoder("rps", Rps)
+def _decode_rps(rps: RpsElement) -> Element:
+    return Rps(value=rps.id)
+
+
+@register_decoder("poke", Poke)
+def _decode_poke(poke: PokeElement) -> Element:
+    return Poke(poke_id=poke.id, poke_type=poke.type, strength=poke.strength)
+
+
+_MUSIC_KINDS = {
+    MusicElement.MusicPlatform.QQ: MusicShareKind.QQMusic,
+    MusicElement.MusicPlatform.NetEase: MusicShareKind.NeteaseCloudMusic,
+    MusicElement.MusicPlatform.Custom: MusicShareKind.Custom,
+}
+
+
+@register_decoder("music", MusicShare)
+def _decode_music(music: MusicElement) -> Element:
+    kind = _MUSIC_KINDS.get(music.platform, MusicShareKind.Custom)
+    if music.WhichOneof("data") == "custom":
+        custom = music.custom
+        return MusicShare(
+            kind,
+            title=custom.title,
+            summary=custom.author,
+            jumpUrl=custom.url,
+            pictureUrl=custom.pic,
+            musicUrl=custom.audio,
         )
-    else:
-        raise Exception(f"Unsupported {multimedia_class} type.")
-    return out
+    return MusicShare(kind, music_id=music.id)
 
-def to_message_chain(elements: List[Element]) -> MessageChain:
-    """这里有bug，kritor的element.type永远为0，这里workaround想办法
 
-    Args:
-        elements (List[Element]): _description_
+@register_decoder("weather", Weather)
+def _decode_weather(weather: WeatherElement) -> Element:
+    return Weather(city=weather.city, code=weather.code)
+
+
+@register_decoder("location", Location)
+def _decode_location(location: LocationElement) -> Element:
+    return Location(lat=location.lat, lon=location.lon, title=location.title, address=location.address)
+
+
+@register_decoder("share", Share)
+def _decode_share(share: ShareElement) -> Element:
+    return Share(url=share.url, title=share.title, content=share.content, image=share.image)
+
+
+@register_decoder("gift", Gift)
+def _decode_gift(gift: GiftElement) -> Element:
+    return Gift(target=gift.qq, gift_id=gift.id)
+
+
+@register_decoder("market_face", MarketFace)
+def _decode_market_face(market_face: MarketFaceElement) -> Element:
+    return MarketFace(id=market_face.id)
+
+
+@register_decoder("forward", Forward)
+def _decode_forward(forward: ForwardElement) -> Element:
+    return Forward(
+        res_id=forward.res_id,
+        uniseq=forward.uniseq or None,
+        display=DisplayStrategy(summary=forward.summary or None, brief=forward.description or None),
+    )
+
+
+@register_decoder("contact", ContactShare)
+def _decode_contact(contact: ContactElement) -> Element:
+    return ContactShare(scene=contact.scene, peer=contact.peer)
+
+
+@register_decoder("json", Json)
+def _decode_json(json: JsonElement) -> Element:
+    return Json(json=json.json)
+
+
+@register_decoder("xml", Xml)
+def _decode_xml(xml: XmlElement) -> Element:
+    return Xml(xml=xml.xml)
+
+
+@register_decoder("file", File)
+def _decode_file(file: FileElement) -> Element:
+    return File(
+        id=file.id,
+        name=file.name,
+        size=file.size,
+        url=file.url if file.HasField("url") else None,
+        expire_time=file.expire_time if file.HasField("expire_time") else None,
+        biz=file.biz if file.HasField("biz") else None,
+        sub_id=file.sub_id if file.HasField("sub_id") else None,
+    )
 
-    Raises:
-        NotImplementedError: _description_
+
+@register_decoder("markdown", Markdown)
+def _decode_markdown(markdown: MarkdownElement) -> Element:
+    return Markdown(markdown=markdown.markdown)
+
+
+@register_decoder("keyboard", Keyboard)
+def _decode_keyboard(keyboard: KeyboardElement) -> Element:
+    return Keyboard(
+        rows=[[MessageToDict(button, preserving_proto_field_name=True) for button in row.buttons] for row in keyboard.rows],
+        bot_appid=keyboard.bot_appid,
+    )
+
+
+def to_message_chain(elements: Iterable[KritorElement], lazy: bool = False) -> MessageChain:
+    """将 Kritor 消息元素转换为消息链.
+
+    按 `Element.data` 实际设置的字段查表解码 (kritor 端的 `Element.type` 并不可靠), \
+    没有对应解码器的元素会被忽略并记录调试日志.
+
+    Args:
+        elements (Iterable[Element]): Kritor 消息元素
+        lazy (bool, optional): 是否返回按需解码的 `LazyMessageChain`. 默认为 False.
 
     Returns:
-        MessageChain: _description_
+        MessageChain: 消息链
     """
-    message_chain = MessageChain([])
+    if lazy:
+        return LazyMessageChain(elements if hasattr(elements, "__len__") else list(elements))  # type: ignore
+    content: List[Element] = []
     for element in elements:
         data_field = element.WhichOneof("data")
-        if data_field == "text":  # element.type == Element.ElementType.TEXT
-            message_chain.content.append(Plain(text=element.text.text))
-        elif data_field == "at":  # element.type == Element.ElementType.AT
-            message_chain.content.append(At(target=element.at.uin))
-        elif data_field == "face":  # element.type == Element.ElementType.FACE
-            message_chain.content.append(
-                Face(
-                    id=element.face.id,
-                    face_id=element.face.result,
-                    name=None,
-                    is_big=element.face.is_big,
-                )
-            )
-        elif (
-            data_field == "bubble_face"
-        ):  # element.type == Element.ElementType.BUBBLE_FACE
-            message_chain.content.append(
-                BubbleFaceElement(
-                    target=element.bubble_face.id,
-                    count=element.bubble_face.count,
-                )
-            )
-        elif data_field == "reply":  # element.type == Element.ElementType.REPLY
-            message_chain.content.append(
-                Quote(
-                    id=int(element.reply.message_id),
-                )
-            )
-        elif data_field == "image":  # element.type == Element.ElementType.IMAGE
-            image_data_field = element.image.WhichOneof("data")
-            message_chain.content.append(to_multimedia(image_data_field, Image, element.image))
-        elif data_field == "voice":
-            voice_data_field = element.voice.WhichOneof("data")
-            message_chain.content.append(to_multimedia(voice_data_field, Voice, element.voice))
-        elif data_field == "video":
-            video_data_field = element.video.WhichOneof("data")
-            message_chain.content.append(to_multimedia(video_data_field, Video, element.video))
-        elif data_field == "basketball":
-            pass
-        elif data_field == "dice":
-            message_chain.content.append(Dice(value=element.dice.id))
-        elif data_field == "rps":
-            pass
-        elif data_field == "poke":
-            pass
-            # TODO: poke id和poke method str对应起来
-            # message_chain.content.append(Poke(value=element.poke.id))
-        elif data_field == "music":
-            # TODO
-            pass
-        elif data_field == "weather":
-            pass
-        elif data_field == "location":
-            pass
-        elif data_field == "share":
-            pass
-        elif data_field == "gift":
-            pass
-        elif data_field == "market_face":
-            pass
-        elif data_field == "forward":
-            pass
-        elif data_field == "contact":
-            pass
-        elif data_field == "json":
-            pass
-        elif data_field == "xml":
-            pass
-        elif data_field == "file":
-            pass
-        elif data_field == "markdown":
-            pass
-        elif data_field == "keyboard":
-            pass
+        decoder = ELEMENT_DECODERS.get(data_field)
+        if decoder is None:
+            logger.debug(f"No decoder for kritor element {data_field!r}, skipped")
+            continue
+        decoded = decoder(getattr(element, data_field))
+        if decoded is not None:
+            content.append(decoded)
+    return MessageChain(content, inline=True)
+
+
+def _is_raw(elements: Any) -> bool:
+    """是否为 Kritor 原始消息元素的序列"""
+    if isinstance(elements, (str, Element, MessageChain)):
+        return False
+    try:
+        return len(elements) == 0 or isinstance(elements[0], KritorElement)
+    except TypeError:
+        return False
+
+
+class LazyMessageChain(MessageChain):
+    """持有 Kritor 原始消息元素, 按需解码的消息链.
+
+    `display`, `startswith`, `endswith`, `only`, `has`, `get` 等直接读取 protobuf 字段, \
+    只解码需要的元素; 索引、迭代或访问 `content` 时才解码全部元素, 此后与普通消息链相同.
+
+    切片, 复制, `+`, `include` 等以 `self.__class__(...)` 构造新消息链的方法得到的是普通的 `MessageChain`.
+    """
+
+    _elements: List[KritorElement] = PrivateAttr(default_factory=list)
+    _decoded: Dict[int, Optional[Element]] = PrivateAttr(default_factory=dict)
+
+    def __new__(cls, *args: Any, **kwargs: Any) -> Any:
+        if not args and not kwargs:  # copy / pickle
+            return super().__new__(cls)
+        if not kwargs and len(args) == 1 and _is_raw(args[0]):
+            return super().__new__(cls)
+        # 由已解码的元素构造, 如切片或 copy() 的结果; 返回值不是本类的实例, 不会再调用 __init__
+        return MessageChain(*args, **kwargs)
+
+    def __init__(self, elements: Sequence[KritorElement]) -> None:
+        # 绕过 pydantic 的校验与私有属性初始化, 它们的开销比解码一条纯文本消息还大
+        private = {
+            name: attr.get_default()
+            for name, attr in self.__private_attributes__.items()
+            if name not in ("_elements", "_decoded")
+        }
+        # 没有解码器的元素在解码时也会被忽略, 这里提前去掉
+        private["_elements"] = [i for i in elements if i.WhichOneof("data") in ELEMENT_DECODERS]
+        private["_decoded"] = {}
+        object.__setattr__(self, "__dict__", {})
+        object.__setattr__(self, "__pydantic_fields_set__", set())
+        object.__setattr__(self, "__pydantic_extra__", {})
+        object.__setattr__(self, "__pydantic_private__", private)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "content":
+            content = self.__dict__["content"] = self._materialize()
+            return content
+        return super().__getattr__(name)  # type: ignore
+
+    @property
+    def materialized(self) -> bool:
+        """是否已经解码全部元素"""
+        return "content" in self.__dict__
+
+    @property
+    def raw_elements(self) -> List[KritorElement]:
+        """Kritor 原始消息元素"""
+        return self.__pydantic_private__["_elements"]  # type: ignore
+
+    def _decode(self, index: int) -> Optional[Element]:
+        decoded: Dict[int, Optional[Element]] = self.__pydantic_private__["_decoded"]  # type: ignore
+        if index not in decoded:
+            element = self.raw_elements[index]
+            field = element.WhichOneof("data")
+            decoded[index] = ELEMENT_DECODERS[field](getattr(element, field))
+        return decoded[index]
+
+    def _materialize(self) -> List[Element]:
+        content = []
+        for index in range(len(self.raw_elements)):
+            element = self._decode(index)
+            if element is not None:
+                content.append(element)
+        return content
+
+    def _class_of(self, index: int) -> Optional[Type[Element]]:
+        """不解码地获取元素类型, 类型取决于内容的字段只解码这一个元素"""
+        element_class = ELEMENT_CLASSES.get(self.raw_elements[index].WhichOneof("data"))
+        if element_class is None:
+            decoded = self._decode(index)
+            return None if decoded is None else decoded.__class__
+        return element_class
+
+    def __str__(self) -> str:
+        if "content" in self.__dict__:
+            return super().__str__()
+        parts = []
+        for index, element in enumerate(self.raw_elements):
+            if element.WhichOneof("data") == "text":
+                parts.append(element.text.text)
+            else:
+                decoded = self._decode(index)
+                if decoded is not None:
+                    parts.append(str(decoded))
+        return "".join(parts)
+
+    def startswith(self, string: str) -> bool:
+        if "content" in self.__dict__:
+            return super().startswith(string)
+        elements = self.raw_elements
+        return bool(elements) and elements[0].WhichOneof("data") == "text" and elements[0].text.text.startswith(string)
+
+    def endswith(self, string: str) -> bool:
+        if "content" in self.__dict__:
+            return super().endswith(string)
+        elements = self.raw_elements
+        return bool(elements) and elements[-1].WhichOneof("data") == "text" and elements[-1].text.text.endswith(string)
+
+    def only(self, *element_classes: Type[Element]) -> bool:
+        if "content" in self.__dict__:
+            return super().only(*element_classes)
+        return all(
+            element_class is None or issubclass(element_class, element_classes)
+            for element_class in map(self._class_of, range(len(self.raw_elements)))
+        )
+
+    def has(self, item: Any) -> bool:
+        if "content" in self.__dict__ or not isinstance(item, type):
+            return super().has(item)
+        return any(self._class_of(index) is item for index in range(len(self.raw_elements)))
+
+    def get(self, element_class: Type[Element_T], count: int = -1) -> List[Element_T]:
+        if "content" in self.__dict__:
+            return super().get(element_class, count)
+        result: List[Element_T] = []
+        for index in range(len(self.raw_elements)):
+            if count >= 0 and len(result) >= count:
+                break
+            found = self._class_of(index)
+            if found is not None and issubclass(found, element_class):
+                result.append(self._decode(index))  # type: ignore
+        return result
+
+
+ElementEncoder = Callable[[Any], Optional[KritorElement]]
+"""元素编码器, 接收消息元素, 返回 Kritor `Element`, 返回 None 时忽略该元素"""
+
+ELEMENT_ENCODERS: Dict[type, ElementEncoder] = {}
+"""以消息元素类为键的元素编码器, 子类未注册时沿 MRO 查找"""
+
+_encoder_cache: Dict[type, Optional[ElementEncoder]] = {}
+
+
+def register_encoder(element_class: type) -> Callable[[ElementEncoder], ElementEncoder]:
+    """注册 (或覆盖) 一个元素编码器, 同时作用于未单独注册编码器的子类.
+
+    Args:
+        element_class (type): 消息元素类, 如 `Plain`, `Image`
+
+    Returns:
+        Callable[[ElementEncoder], ElementEncoder]: 装饰器
+    """
+
+    def wrapper(encoder: ElementEncoder) -> ElementEncoder:
+        ELEMENT_ENCODERS[element_class] = encoder
+        _encoder_cache.clear()
+        return encoder
+
+    return wrapper
+
+
+def encoder_of(element_class: type) -> Optional[ElementEncoder]:
+    """获取消息元素类对应的编码器"""
+    try:
+        return _encoder_cache[element_class]
+    except KeyError:
+        encoder = next((ELEMENT_ENCODERS[i] for i in element_class.__mro__ if i in ELEMENT_ENCODERS), None)
+        _encoder_cache[element_class] = encoder
+        return encoder
+
+
+def from_multimedia(element: MultimediaElement) -> Dict[str, Any]:
+    """获取多媒体元素对应的 Kritor `data` 字段"""
+    binary = element.binary
+    # 解码时 file_md5 被读取为元素 ID, 编码时写回以保证往返一致
+    data: Dict[str, Any] = {"file_md5": element.id} if element.id else {}
+    if binary is not None:
+        # protobuf 的 bytes 字段只接受 bytes, 其他缓冲区在此复制一次
+        data["file"] = binary if isinstance(binary, bytes) else bytes(binary)
+    elif element.url:
+        if element.url.startswith("file://"):
+            data["file_path"] = url2pathname(urlparse(element.url).path)
         else:
-            pass
-            # raise NotImplementedError()
-    return message_chain
+            data["file_url"] = element.url
+    elif element.id:
+        data["file_name"] = element.id
+    else:
+        raise ValueError(f"{element.type} has neither binary data, url nor id.")
+    return data
+
+
+@register_encoder(Plain)
+def _encode_plain(element: Plain) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.TEXT, text=TextElement(text=element.text))
+
+
+@register_encoder(At)
+def _encode_at(element: At) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.AT, at=AtElement(uin=element.target, uid=element.uid))
+
+
+@register_encoder(AtAll)
+def _encode_at_all(element: AtAll) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.AT, at=AtElement(uid="all"))
+
+
+@register_encoder(Face)
+def _encode_face(element: Face) -> KritorElement:
+    if element.face_id is None:
+        raise ValueError("Face without face_id can not be sent.")
+    return KritorElement(
+        type=KritorElement.ElementType.FACE,
+        face=FaceElement(id=element.face_id, is_big=element.is_big, result=element.result),
+    )
+
 
+@register_encoder(BubbleFace)
+def _encode_bubble_face(element: BubbleFace) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.BUBBLE_FACE,
+        bubble_face=BubbleFaceElement(id=element.face_id, count=element.count),
+    )
+
+
+@register_encoder(Quote)
+def _encode_quote(element: Quote) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.REPLY, reply=ReplyElement(message_id=str(element.id)))
+
+
+@register_encoder(Source)
+def _encode_source(element: Source) -> None:
+    return None
+
+
+@register_encoder(Image)
+def _encode_image(element: Image) -> KritorElement:
+    image_type = ImageType.FLASH if isinstance(element, FlashImage) else ImageType.COMMON
+    return KritorElement(
+        type=KritorElement.ElementType.IMAGE, image=ImageElement(type=image_type, **from_multimedia(element))
+    )
+
+
+@register_encoder(Voice)
+def _encode_voice(element: Voice) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.VOICE, voice=VoiceElement(**from_multimedia(element)))
+
+
+@register_encoder(Video)
+def _encode_video(element: Video) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.VIDEO, video=VideoElement(**from_multimedia(element)))
+
+
+@register_encoder(Basketball)
+def _encode_basketball(element: Basketball) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.BASKETBALL, basketball=BasketballElement(id=element.value)
+    )
 
-def to_message(chain: MessageChain) -> List[Element]:
-    message = MessageChain([])
+
+@register_encoder(Dice)
+def _encode_dice(element: Dice) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.DICE, dice=DiceElement(id=element.value))
+
+
+@register_encoder(Rps)
+def _encode_rps(element: Rps) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.RPS, rps=RpsElement(id=element.value))
+
+
+@register_encoder(Poke)
+def _encode_poke(element: Poke) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.POKE,
+        poke=PokeElement(id=element.poke_id or 0, type=element.poke_type or 0, strength=element.strength or 0),
+    )
+
+
+_MUSIC_PLATFORMS = {kind: platform for platform, kind in _MUSIC_KINDS.items()}
+
+
+@register_encoder(MusicShare)
+def _encode_music(element: MusicShare) -> KritorElement:
+    platform = _MUSIC_PLATFORMS.get(element.kind, MusicElement.MusicPlatform.Custom)
+    if element.music_id and platform != MusicElement.MusicPlatform.Custom:
+        music = MusicElement(platform=platform, id=element.music_id)
+    else:
+        music = MusicElement(
+            platform=MusicElement.MusicPlatform.Custom,
+            custom=CustomMusicData(
+                url=element.jumpUrl or "",
+                audio=element.musicUrl or "",
+                title=element.title or "",
+                author=element.summary or "",
+                pic=element.pictureUrl or "",
+            ),
+        )
+    return KritorElement(type=KritorElement.ElementType.MUSIC, music=music)
+
+
+@register_encoder(Weather)
+def _encode_weather(element: Weather) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.WEATHER, weather=WeatherElement(city=element.city, code=element.code)
+    )
+
+
+@register_encoder(Location)
+def _encode_location(element: Location) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.LOCATION,
+        location=LocationElement(lat=element.lat, lon=element.lon, title=element.title, address=element.address),
+    )
+
+
+@register_encoder(Share)
+def _encode_share(element: Share) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.SHARE,
+        share=ShareElement(url=element.url, title=element.title, content=element.content, image=element.image),
+    )
+
+
+@register_encoder(Gift)
+def _encode_gift(element: Gift) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.GIFT, gift=GiftElement(qq=element.target, id=element.gift_id))
+
+
+@register_encoder(MarketFace)
+def _encode_market_face(element: MarketFace) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.MARKET_FACE, market_face=MarketFaceElement(id=str(element.face_id or ""))
+    )
+
+
+@register_encoder(Forward)
+def _encode_forward(element: Forward) -> KritorElement:
+    if not element.res_id:
+        raise ValueError("Forward must be uploaded first, only Forward with res_id can be sent as an element.")
+    display = element.display_strategy or DisplayStrategy()
+    return KritorElement(
+        type=KritorElement.ElementType.FORWARD,
+        forward=ForwardElement(
+            res_id=element.res_id,
+            uniseq=element.uniseq or "",
+            summary=display.summary or "",
+            description=display.brief or "",
+        ),
+    )
+
+
+@register_encoder(ContactShare)
+def _encode_contact(element: ContactShare) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.CONTACT, contact=ContactElement(scene=element.scene, peer=element.peer)
+    )
+
+
+@register_encoder(Json)
+def _encode_json(element: Json) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.JSON, json=JsonElement(json=element.Json))
+
+
+@register_encoder(App)
+def _encode_app(element: App) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.JSON, json=JsonElement(json=element.content))
+
+
+@register_encoder(Xml)
+def _encode_xml(element: Xml) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.XML, xml=XmlElement(xml=element.xml))
+
+
+@register_encoder(File)
+def _encode_file(element: File) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.FILE,
+        file=FileElement(
+            id=element.id,
+            name=element.name,
+            size=element.size,
+            url=element.url,
+            expire_time=element.expire_time,
+            biz=element.biz,
+            sub_id=element.sub_id,
+        ),
+    )
+
+
+@register_encoder(Markdown)
+def _encode_markdown(element: Markdown) -> KritorElement:
+    return KritorElement(type=KritorElement.ElementType.MARKDOWN, markdown=MarkdownElement(markdown=element.markdown))
+
+
+@register_encoder(Keyboard)
+def _encode_keyboard(element: Keyboard) -> KritorElement:
+    return KritorElement(
+        type=KritorElement.ElementType.KEYBOARD,
+        keyboard=KeyboardElement(
+            rows=[KeyboardRow(buttons=[ParseDict(button, Button()) for button in row]) for row in element.rows],
+            bot_appid=element.bot_appid,
+        ),
+    )
+
+
+def to_message(chain: Union[MessageChain, str]) -> List[KritorElement]:
+    """将消息链转换为 Kritor 消息元素.
+
+    Args:
+        chain (Union[MessageChain, str]): 消息链, 字符串视为纯文本
+
+    Raises:
+        NotImplementedError: 消息链中有没有编码器的元素
+
+    Returns:
+        List[Element]: Kritor 消息元素
+    """
+    if isinstance(chain, str):
+        return [KritorElement(type=KritorElement.ElementType.TEXT, text=TextElement(text=chain))]
+    elements: List[KritorElement] = []
     for element in chain.content:
-        if element.type == "Plain":
-            message.append(TextElement(text=element.text))
-        elif element.type == "At":
-            message.append(AtElement(target=element.at.uid))
-        elif element.type == "AtAll":
-            pass
-        elif element.type == "Face":
-            message.append(
-                FaceElement(id=element.face_id, is_big=False, result=element.name)
-            )
-        elif element.type == "Xml":
-            pass
-        elif element.type == "Json":
-            pass
-        elif element.type == "App":
-            pass
-        elif element.type == "Poke":
-            pass
-        elif element.type == "Dice":
-            pass
-        elif element.type == "MusicShare":
-            pass
-        elif element.type == "Forward":
-            pass
-        else:
-            raise NotImplementedError()
-    return message
+        encoder = encoder_of(element.__class__)
+        if encoder is None:
+            raise NotImplementedError(f"No encoder for element {element.__class__.__name__}")
+        encoded = encoder(element)
+        if encoded is not None:
+            elements.append(encoded)
+    return elements
+
+
+def _digest_multimedia(digest: Any, element: MultimediaElement) -> None:
+    """以原始字节或 id / url 更新多媒体元素的指纹, 不经过 base64 编码.
+
+    文件引用以路径, 大小与修改时间标识, 不读取文件内容.
+    """
+    digest.update(f"{element.id}\0{element.url}\0".encode())
+    payload = element._payload
+    if payload is None:
+        return
+    if payload.buffer is not None:
+        digest.update(payload.buffer)
+    else:
+        stat = payload.path.stat()  # type: ignore[union-attr]
+        digest.update(f"{payload.path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+
+
+class EncodedMessageCache:
+    """已序列化消息元素的 LRU 缓存, 以消息链指纹为键.
+
+    缓存的是 `SendMessageRequest` 中 `elements` 字段的 protobuf 编码, 可以直接与其他字段的编码拼接成完整请求,
+    适合反复发送的固定回复与菜单. 指纹需要序列化整条消息链, 对只发送一次的消息没有收益.
+    """
+
+    capacity: int
+    hits: int
+    misses: int
+
+    def __init__(self, capacity: int = 256) -> None:
+        """
+        Args:
+            capacity (int, optional): 最多缓存的消息链数量. 默认为 256.
+        """
+        if capacity < 1:
+            raise ValueError("EncodedMessageCache capacity must be at least 1.")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def fingerprint(chain: Union[MessageChain, str]) -> Hashable:
+        """计算消息链的指纹, 内容相同的消息链指纹相同."""
+        if isinstance(chain, str):
+            return chain
+        digest = blake2b(digest_size=16)
+        for element in chain.content:
+            digest.update(element.__class__.__qualname__.encode())
+            if isinstance(element, MultimediaElement):
+                _digest_multimedia(digest, element)
+            elif isinstance(element, Forward):
+                # 转发只按 res_id 发送, 不序列化其中的消息节点
+                digest.update(element.model_dump_json(exclude={"node_list"}).encode())
+            else:
+                digest.update(element.model_dump_json().encode())
+        return digest.digest()
+
+    def encode(self, chain: Union[MessageChain, str]) -> bytes:
+        """获取消息链编码后的 `elements` 字段, 未命中时编码并缓存.
+
+        Args:
+            chain (Union[MessageChain, str]): 消息链
+
+        Returns:
+            bytes: `SendMessageRequest.elements` 的 protobuf 编码
+        """
+        key = self.fingerprint(chain)
+        data = self._entries.get(key)
+        if data is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return data
+        self.misses += 1
+        data = SendMessageRequest(elements=to_message(chain)).SerializeToString()
+        self._entries[key] = data
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return data
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
 
 
 def to_sender(
-    contact: Contact, sender: Sender
+    contact: Contact, sender: Sender, contacts: Optional["ContactMap"] = None
 ) -> Union[Friend, Member, Client, Stranger]:
     """这里有bug，kritor的element.scene永远为0，这里workaround想办法
 
     Args:
         contact (Contact): _description_
         sender (Sender): _description_
+        contacts (ContactMap, optional): 联系人身份映射, 提供时复用其中的实例
 
     Raises:
         NotImplementedError: _description_
@@ -236,6 +874,8 @@ def to_sender(
     Returns:
         Union[Friend, Member, Client, Stranger]: _description_
     """
+    if contacts is not None:
+        return contacts.sender(contact, sender)
     if contact.scene == Scene.GROUP:
         group = Group(id=int(contact.peer), name="", permission=MemberPerm.Member)
         return Member(
@@ -5,12 +5,16 @@ import sys
 import traceback
 from contextlib import asynccontextmanager
 from typing import (
+    Any,
     Callable,
     Dict,
+    FrozenSet,
     Iterable,
     List,
+    Mapping,
     Optional,
     Set,
+    Tuple,
     Type,
     Union,
     get_origin,
@@ -22,7 +26,7 @@ from .builtin.derive import DeriveDispatcher
 from .builtin.event import EventExceptionThrown
 from .entities.decorator import Decorator
 from .entities.dispatcher import BaseDispatcher
-from .entities.event import Dispatchable
+from .entities.event import Dispatchable, event_registry
 from .entities.exectarget import ExecTarget
 from .entities.listener import Listener
 from .entities.namespace import Namespace
@@ -32,13 +36,18 @@ from .exceptions import (
     ExecutionStop,
     ExistedNamespace,
     InvalidEventName,
+    ListenerTimeout,
     PropagationCancelled,
     RegisteredEventListener,
     RequirementCrashed,
     UnexistedNamespace,
 )
+from .filter import DecisionIndex
 from .interfaces.decorator import DecoratorInterface
 from .interfaces.dispatcher import DispatcherInterface
+from .limiter import ConcurrencyGate, Overflow
+from .plan import compile_plan as compile_plan_of
+from .serial import SerialKey, SerialTicket
 from .typing import T_Dispatcher
 from .utilles import (
     CoverDispatcher,
@@ -48,6 +57,7 @@ from .utilles import (
     group_dict,
     run_always_await,
 )
+from .wheel import TimingWheel, WheelTimer
 
 
 class Broadcast:
@@ -62,13 +72,54 @@ class Broadcast:
     prelude_dispatchers: List["T_Dispatcher"]
     finale_dispatchers: List["T_Dispatcher"]
 
-    _background_tasks: Set[asyncio.Task] = set()
+    _background_tasks: Set[asyncio.Task]
+    max_in_flight: Optional[int]
 
-    def __init__(self):
+    listener_change_hooks: List[Callable[[], None]]
+
+    timers: TimingWheel
+    """监听器超时, 等待器超时与延迟事件共用的时间轮"""
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        compile_plans: bool = True,
+        inline_listeners: bool = True,
+        cancel_on_propagation: bool = True,
+        timer_resolution: float = 0.05,
+    ):
+        """
+        Args:
+            max_in_flight (int, optional): 同时调度中的事件数上限, 供 `wait_for_capacity` 使用. 默认不限制.
+            compile_plans (bool, optional): 是否为监听器编译参数解析计划. 默认为 True.
+            inline_listeners (bool, optional): 是否在调度任务中直接执行同步监听器与只有一个监听器的层, \
+                而不是为每个监听器创建 Task. 默认为 True.
+            cancel_on_propagation (bool, optional): 监听器抛出 `PropagationCancelled` 时, \
+                是否取消同层中尚未完成的监听器. 默认为 True.
+            timer_resolution (float, optional): 时间轮的刻度 (秒), 各类超时最多因此延后一个刻度. 默认为 0.05.
+        """
+        self._background_tasks = set()
+        self.timers = TimingWheel(timer_resolution)
+        self.compile_plans = compile_plans
+        self.inline_listeners = inline_listeners
+        self.cancel_on_propagation = cancel_on_propagation
+        self.max_in_flight = max_in_flight
+        # 在第一次等待时 (即在运行中的循环内) 创建, Python 3.9 及以下的 asyncio.Event 在创建时绑定事件循环
+        self._capacity_event: Optional[asyncio.Event] = None
         self.default_namespace = Namespace(name="default", default=True)
         self.namespaces = []
         self.listeners = []
         self.event_ctx = Ctx("bcc_event_ctx")
+        self.listener_change_hooks = []
+        self._subscriptions: Optional[FrozenSet[Type[Dispatchable]]] = None
+        # 事件类 -> 监听器, 由 receiver / removeListener / 命名空间操作维护, 按需建立
+        self._dispatch_index: Dict[Type[Dispatchable], Tuple[Listener, ...]] = {}
+        # 事件类 -> (Listener.priority_generation, 优先级分层, 有监听器带过滤条件时的决策索引)
+        self._layer_cache: Dict[
+            Type[Dispatchable], Tuple[int, Tuple[Tuple[Listener, ...], ...], Optional[DecisionIndex]]
+        ] = {}
+        # 指定了 serialize_by 的监听器数, 为 0 时调度不必领取串行名额
+        self._serial_listeners = 0
         self.decorator_interface = DecoratorInterface()
         self.prelude_dispatchers = [self.decorator_interface, DependDispatcher(), DeriveDispatcher()]
         self.finale_dispatchers = [DeferDispatcher()]
@@ -88,41 +139,292 @@ class Broadcast:
                     return interface.event
 
     def default_listener_generator(self, event_class) -> Iterable[Listener]:
-        return list(
-            filter(
-                lambda x: all(
-                    [
-                        not x.namespace.hide,
-                        not x.namespace.disabled,
-                        event_class in x.listening_events,
-                    ]
-                ),
-                self.listeners,
+        listeners = self._dispatch_index.get(event_class)
+        if listeners is None:
+            # 监听父类 (如 MessageEvent) 的监听器同样会收到子类事件
+            lineage = event_registry.lineage(event_class)
+            listeners = self._dispatch_index[event_class] = tuple(
+                x
+                for x in self.listeners
+                if not x.namespace.hide
+                and not x.namespace.disabled
+                and any(i in x.listening_events for i in lineage)
             )
-        )
+        return listeners
+
+    def _clear_index(self) -> None:
+        self._dispatch_index.clear()
+        self._layer_cache.clear()
+
+    def _index_add(self, listener: Listener, event_class: Type[Dispatchable]) -> None:
+        if listener.namespace.hide or listener.namespace.disabled:
+            return
+        for indexed, listeners in list(self._dispatch_index.items()):
+            if event_class in event_registry.lineage(indexed) and listener not in listeners:
+                self._dispatch_index[indexed] = listeners + (listener,)
+                self._layer_cache.pop(indexed, None)
+
+    def _index_remove(self, listener: Listener) -> None:
+        for indexed, listeners in list(self._dispatch_index.items()):
+            if listener in listeners:
+                self._dispatch_index[indexed] = tuple(x for x in listeners if x is not listener)
+                self._layer_cache.pop(indexed, None)
+
+    @staticmethod
+    def group_layers(listeners: Iterable[Listener], event_class: Type[Dispatchable]) -> "Tuple[Tuple[Listener, ...], ...]":
+        """按优先级将监听器分层, 数值小的层先执行"""
+        grouped: Dict[int, List[Listener]] = group_dict(listeners, lambda x: x.priority_of(event_class))
+        return tuple(tuple(group) for _, group in sorted(grouped.items(), key=lambda x: x[0]))
+
+    def listener_layers(self, event_class: Type[Dispatchable]) -> "Tuple[Tuple[Listener, ...], ...]":
+        """获取事件类的监听器优先级分层, 结果会被缓存直到监听器或其优先级发生变化"""
+        cached = self._layer_cache.get(event_class)
+        if cached is not None and cached[0] == Listener.priority_generation:
+            return cached[1]
+        layers = self.group_layers(self.default_listener_generator(event_class), event_class)
+        index = None
+        if any(i.conditions for layer in layers for i in layer):
+            index = DecisionIndex(layers, event_class)
+        self._layer_cache[event_class] = (Listener.priority_generation, layers, index)
+        return layers
+
+    def layers_for(self, event: Dispatchable) -> "Tuple[Tuple[Listener, ...], ...]":
+        """获取需要调度事件的监听器分层, 过滤条件不满足的监听器不在其中"""
+        cached = self._layer_cache.get(event.__class__)
+        if cached is None or cached[0] != Listener.priority_generation:
+            self.listener_layers(event.__class__)
+            cached = self._layer_cache[event.__class__]
+        index = cached[2]
+        if index is None:
+            return cached[1]
+        errors: List[Exception] = []
+        layers = index.layers_for(event, errors)
+        for error in errors:
+            self._report_selection_error(error, event)
+        return layers
+
+    def _report_selection_error(self, error: Exception, event: Dispatchable) -> None:
+        """过滤条件或串行键求值出错时仅跳过相应的监听器, 并广播 EventExceptionThrown"""
+        if event.__class__ is not EventExceptionThrown:
+            traceback.print_exception(type(error), error, error.__traceback__)
+            self.postEvent(EventExceptionThrown(exception=error, event=event))
+
+    def _conditions_met(self, listener: Listener, event: Dispatchable) -> bool:
+        try:
+            return all(condition.test(event) for condition in listener.conditions)
+        except Exception as e:
+            self._report_selection_error(e, event)
+            return False
 
     async def layered_scheduler(
         self,
-        listener_generator: Iterable[Listener],
+        listener_generator: Optional[Iterable[Listener]],
         event: Dispatchable,
         addition_dispatchers: Optional[List["T_Dispatcher"]] = None,
+        layers: "Optional[Tuple[Tuple[Listener, ...], ...]]" = None,
     ):
-        grouped: Dict[int, List[Listener]] = group_dict(
-            listener_generator, lambda x: x.priorities.get(event.__class__) or x.priority
-        )
+        if layers is None:
+            layers = self.group_layers(
+                (
+                    i
+                    for i in listener_generator or ()
+                    if not i.conditions or self._conditions_met(i, event)
+                ),
+                event.__class__,
+            )
         event_dispatcher_mixin = dispatcher_mixin_handler(event.Dispatcher)
         if addition_dispatchers:
             event_dispatcher_mixin = event_dispatcher_mixin + addition_dispatchers
+        if not self._serial_listeners:
+            return await self._run_layers(layers, event, event_dispatcher_mixin, not addition_dispatchers)
+        tickets: Dict[Listener, SerialTicket] = {}
+        try:
+            # 串行名额须在首次 await 之前领取, 这样同一个键上的顺序与事件投递顺序一致
+            skipped: List[Listener] = []
+            for current_group in layers:
+                for i in current_group:
+                    if i.serializer is not None:
+                        try:
+                            ticket = i.serializer.reserve(event)
+                        except Exception as e:
+                            self._report_selection_error(e, event)
+                            skipped.append(i)
+                            continue
+                        if ticket is not None:
+                            tickets[i] = ticket
+            if skipped:
+                layers = tuple(tuple(i for i in group if i not in skipped) for group in layers)
+            await self._run_layers(layers, event, event_dispatcher_mixin, not addition_dispatchers, tickets)
+        finally:
+            # 因传播被取消或调度被取消而没有执行的监听器也要归还名额
+            for ticket in tickets.values():
+                ticket.release()
+
+    async def _run_layers(
+        self,
+        layers: "Tuple[Tuple[Listener, ...], ...]",
+        event: Dispatchable,
+        event_dispatcher_mixin: List["T_Dispatcher"],
+        plannable: bool,
+        tickets: Optional[Dict[Listener, SerialTicket]] = None,
+    ):
         with self.event_ctx.use(event):
-            for _, current_group in sorted(grouped.items(), key=lambda x: x[0]):
-                tasks = [
-                    asyncio.create_task(self.Executor(target=i, dispatchers=event_dispatcher_mixin))
-                    for i in current_group
-                ]
-                done_tasks, _ = await asyncio.wait(tasks)
-                for task in done_tasks:
-                    if task.exception().__class__ is PropagationCancelled:
-                        return
+            # 上游事件的 Dispatcher 只在本次调度中存在, 此时不使用也不编译参数解析计划
+            use_plans = self.compile_plans and plannable
+            for current_group in layers:
+                concurrent = current_group
+                if self.inline_listeners:
+                    # 同步监听器本就会阻塞事件循环, 单个异步监听器也无需并发, 它们都直接在此执行
+                    concurrent = [i for i in current_group if i.is_async]
+                    inline = [i for i in current_group if not i.is_async]
+                    if len(concurrent) == 1:
+                        inline.append(concurrent.pop())
+                    for i in inline:
+                        try:
+                            await self.run_listener(
+                                i, event, event_dispatcher_mixin, use_plans, tickets.get(i) if tickets else None
+                            )
+                        except PropagationCancelled:
+                            return
+                        except Exception:
+                            pass  # 已由 Executor 输出并广播 EventExceptionThrown
+                if not concurrent:
+                    continue
+                pending = {
+                    asyncio.create_task(
+                        self.run_listener(
+                            i, event, event_dispatcher_mixin, use_plans, tickets.get(i) if tickets else None
+                        )
+                    )
+                    for i in concurrent
+                }
+                return_when = asyncio.FIRST_EXCEPTION if self.cancel_on_propagation else asyncio.ALL_COMPLETED
+                cancelled = False
+                while pending:
+                    done_tasks, pending = await asyncio.wait(pending, return_when=return_when)
+                    exceptions = [task.exception() for task in done_tasks if not task.cancelled()]
+                    if any(e.__class__ is PropagationCancelled for e in exceptions):
+                        cancelled = True
+                        if self.cancel_on_propagation:
+                            for task in pending:
+                                task.cancel()
+                            break
+                if cancelled:
+                    return
+
+    async def run_listener(
+        self,
+        listener: Listener,
+        event: Dispatchable,
+        dispatchers: List[T_Dispatcher],
+        use_plan: bool = True,
+        ticket: Optional[SerialTicket] = None,
+    ):
+        """执行监听器, 并施加监听器与其命名空间的串行、并发限制与超时"""
+        if ticket is not None:
+            try:
+                await ticket.wait()
+                return await self.run_listener(listener, event, dispatchers, use_plan)
+            finally:
+                ticket.release()
+        namespace = listener.namespace
+        if listener.gate or namespace.gate or listener.timeout is not None or namespace.timeout is not None:
+            return await self._run_limited(listener, event, dispatchers, use_plan)
+        return await self._execute_listener(listener, event, dispatchers, use_plan)
+
+    async def _run_limited(
+        self,
+        listener: Listener,
+        event: Dispatchable,
+        dispatchers: List[T_Dispatcher],
+        use_plan: bool,
+    ):
+        namespace = listener.namespace
+        acquired: List[ConcurrencyGate] = []
+        task: Optional[asyncio.Task] = None
+        try:
+            for gate in (namespace.gate, listener.gate):
+                if gate is None:
+                    continue
+                if not await gate.acquire():
+                    return None
+                acquired.append(gate)
+            # 在独立的 Task 中执行, 以便超时或 cancel_oldest 时只取消这一次执行
+            task = asyncio.create_task(self._execute_listener(listener, event, dispatchers, use_plan))
+            for gate in acquired:
+                gate.attach(task)
+            timeouts = [i for i in (listener.timeout, namespace.timeout) if i is not None]
+            timer: Optional[WheelTimer] = None
+            expired: List[bool] = []
+            if timeouts:
+                timer = self.timers.call_later(min(timeouts), _expire_task, task, expired)
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+            if expired:
+                error = ListenerTimeout(f"{listener.callable!r} timed out handling {event.__class__.__name__}")
+                if event.__class__ is not EventExceptionThrown:
+                    self.postEvent(EventExceptionThrown(exception=error, event=event))
+                raise error
+            if task.cancelled():
+                return None
+            return task.result()
+        finally:
+            for gate in acquired:
+                gate.release(task)
+
+    async def _execute_listener(
+        self,
+        listener: Listener,
+        event: Dispatchable,
+        dispatchers: List[T_Dispatcher],
+        use_plan: bool,
+    ):
+        """执行监听器, 有可用的参数解析计划时跳过完整的参数解析"""
+        plan = listener.plans.get(event.__class__) if use_plan else None
+        if plan is None:
+            return await self.Executor(target=listener, dispatchers=dispatchers, compile_plan=use_plan)
+        if listener.namespace.disabled:
+            raise DisabledNamespace("caught a disabled namespace: {0}".format(listener.namespace.name))
+
+        params = {}
+        for name, accessor in plan.accessors:
+            value = accessor(event)
+            if value is None:
+                return await self.Executor(target=listener, dispatchers=dispatchers)
+            params[name] = value
+        if plan.dispatched:
+            dii = DispatcherInterface(self, dispatchers, 0)
+            dii_token = dii.ctx.set(dii)
+            try:
+                for name, annotation, default, dispatcher in plan.dispatched:
+                    value = await dii.lookup_by_directly(dispatcher, name, annotation, default)
+                    if value is None:
+                        return await self.Executor(target=listener, dispatchers=dispatchers)
+                    params[name] = value
+            finally:
+                dii.ctx.reset(dii_token)
+
+        try:
+            result = await run_always_await(listener.callable, **params)
+        except (ExecutionStop, PropagationCancelled):
+            raise
+        except Exception as e:
+            if event.__class__ is not EventExceptionThrown:
+                traceback.print_exc()
+                self.postEvent(EventExceptionThrown(exception=e, event=event))
+            raise
+        if result.__class__ is Force:
+            return result.target
+        elif result is RemoveMe:
+            if listener in self.listeners:
+                self.removeListener(listener)
+        return result
 
     async def Executor(
         self,
@@ -132,6 +434,7 @@ class Broadcast:
         print_exception: bool = True,
         use_global_dispatchers: bool = True,
         depth: int = 0,
+        compile_plan: bool = False,
     ):
         is_exectarget = is_listener = False
         current_oplog = None
@@ -174,6 +477,17 @@ class Broadcast:
                     if name not in dii.success:
                         current_oplog[name] = dii.current_oplog  # type: ignore
 
+                if compile_plan and is_listener:
+                    event_class = self.event_ctx.get().__class__
+                    if event_class not in target.plans:  # type: ignore
+                        target.plans[event_class] = compile_plan_of(  # type: ignore
+                            target,  # type: ignore
+                            self.event_ctx.get(),  # type: ignore
+                            dispatchers,
+                            argument_signature(target_callable),
+                            parameter_compile_result,
+                        )
+
                 dii.current_oplog = []
                 for hl_d in target.decorators:
                     await dii.lookup_by_directly(
@@ -247,7 +561,7 @@ class Broadcast:
             return result.target
         elif result is RemoveMe:
             if is_listener and target in self.listeners:
-                self.listeners.remove(target)
+                self.removeListener(target)
         return result
 
     @asynccontextmanager
@@ -295,12 +609,16 @@ class Broadcast:
 
     def postEvent(self, event: Dispatchable, upper_event: Optional[Dispatchable] = None):
         if not hasattr(self, "_loop"):
-            from creart import it
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                from creart import it
 
-            self._loop = it(asyncio.AbstractEventLoop)
+                self._loop = it(asyncio.AbstractEventLoop)
         task = self._loop.create_task(
             self.layered_scheduler(
-                listener_generator=self.default_listener_generator(event.__class__),
+                listener_generator=None,
+                layers=self.layers_for(event),
                 event=event,
                 addition_dispatchers=(
                     [CoverDispatcher(i, upper_event) for i in dispatcher_mixin_handler(upper_event.Dispatcher)]
@@ -310,11 +628,46 @@ class Broadcast:
             )
         )
         self._background_tasks.add(task)
-        task.add_done_callback(self._background_tasks.discard)
+        task.add_done_callback(self._on_task_done)
         return task
 
+    def postEventLater(
+        self, delay: float, event: Dispatchable, upper_event: Optional[Dispatchable] = None
+    ) -> WheelTimer:
+        """在 delay 秒后广播事件, 返回的定时器可用于取消.
+
+        Args:
+            delay (float): 延迟时间 (秒)
+            event (Dispatchable): 事件
+            upper_event (Dispatchable, optional): 上游事件
+
+        Returns:
+            WheelTimer: 定时器
+        """
+        return self.timers.call_later(delay, self.postEvent, event, upper_event)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if self._capacity_event is not None:
+            self._capacity_event.set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._background_tasks)
+
+    async def wait_for_capacity(self) -> None:
+        """等待直到正在执行的事件调度任务数低于 `max_in_flight`."""
+        if self.max_in_flight is None:
+            return
+        if self._capacity_event is None:
+            self._capacity_event = asyncio.Event()
+        while len(self._background_tasks) >= self.max_in_flight:
+            self._capacity_event.clear()
+            await self._capacity_event.wait()
+
     @staticmethod
     def event_class_generator(target=Dispatchable):
+        """遍历 target 的所有子类, 按名称查找事件请使用 `findEvent`"""
         for i in target.__subclasses__():
             yield i
             if i.__subclasses__():
@@ -322,17 +675,57 @@ class Broadcast:
 
     @staticmethod
     def findEvent(name: str):
-        for i in Broadcast.event_class_generator():
-            if i.__name__ == name:
-                return i
+        """按类名或 `模块.类名` 查找事件类, 类名对应多个事件类时抛出 `AmbiguousEventName`"""
+        return event_registry.find(name)
+
+    def _notify_listener_change(self):
+        self._subscriptions = None
+        for hook in self.listener_change_hooks:
+            hook()
+
+    @property
+    def subscriptions(self) -> FrozenSet[Type[Dispatchable]]:
+        """当前有可用监听器的事件类型."""
+        if self._subscriptions is None:
+            self._subscriptions = frozenset(
+                event
+                for listener in self.listeners
+                if not listener.namespace.hide and not listener.namespace.disabled
+                for event in listener.listening_events
+            )
+        return self._subscriptions
+
+    def is_subscribed(self, event_class: Type[Dispatchable]) -> bool:
+        subscriptions = self.subscriptions
+        return any(i in subscriptions for i in event_registry.lineage(event_class))
 
     def getDefaultNamespace(self):
         return self.default_namespace
 
-    def createNamespace(self, name, *, priority: int = 0, hide: bool = False, disabled: bool = False):
+    def createNamespace(
+        self,
+        name,
+        *,
+        priority: int = 0,
+        hide: bool = False,
+        disabled: bool = False,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        overflow: Overflow = "queue",
+    ):
         if self.containNamespace(name):
             raise ExistedNamespace(name, "has been created!")
-        self.namespaces.append(Namespace(name=name, priority=priority, hide=hide, disabled=disabled))
+        self.namespaces.append(
+            Namespace(
+                name=name,
+                priority=priority,
+                hide=hide,
+                disabled=disabled,
+                max_concurrency=max_concurrency,
+                timeout=timeout,
+                overflow=overflow,
+            )
+        )
         return self.namespaces[-1]
 
     def removeNamespace(self, name):
@@ -341,6 +734,8 @@ class Broadcast:
         for index, i in enumerate(self.namespaces):
             if i.name == name:
                 self.namespaces.pop(index)
+                self._clear_index()
+                self._notify_listener_change()
                 return
 
     def containNamespace(self, name):
@@ -356,18 +751,26 @@ class Broadcast:
     def hideNamespace(self, name):
         ns = self.getNamespace(name)
         ns.hide = True
+        self._clear_index()
+        self._notify_listener_change()
 
     def unhideNamespace(self, name):
         ns = self.getNamespace(name)
         ns.hide = False
+        self._clear_index()
+        self._notify_listener_change()
 
     def disableNamespace(self, name):
         ns = self.getNamespace(name)
         ns.disabled = True
+        self._clear_index()
+        self._notify_listener_change()
 
     def enableNamespace(self, name):
         ns = self.getNamespace(name)
         ns.disabled = False
+        self._clear_index()
+        self._notify_listener_change()
 
     def containListener(self, target):
         return any(i.callable == target for i in self.listeners)
@@ -379,6 +782,10 @@ class Broadcast:
 
     def removeListener(self, target):
         self.listeners.remove(target)
+        if target.serializer is not None:
+            self._serial_listeners -= 1
+        self._index_remove(target)
+        self._notify_listener_change()
 
     def receiver(
         self,
@@ -387,7 +794,28 @@ class Broadcast:
         dispatchers: Optional[List[T_Dispatcher]] = None,
         namespace: Optional[Namespace] = None,
         decorators: Optional[List[Decorator]] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        overflow: Overflow = "queue",
+        serialize_by: Optional[SerialKey] = None,
+        where: Optional[Mapping[str, Any]] = None,
     ):
+        """注册监听器.
+
+        Args:
+            event (Union[str, Type[Dispatchable]]): 监听的事件类或事件类名
+            priority (int, optional): 优先级, 数值小的先执行. 默认为 16.
+            dispatchers (List[T_Dispatcher], optional): 监听器专属的 Dispatcher
+            namespace (Namespace, optional): 所属命名空间. 默认为默认命名空间.
+            decorators (List[Decorator], optional): 监听器的 Decorator
+            max_concurrency (int, optional): 同时执行的最大次数. 默认不限制.
+            timeout (float, optional): 单次执行的超时时间 (秒). 默认不限制.
+            overflow (Overflow, optional): 达到 max_concurrency 时的处理方式. 默认排队等待.
+            serialize_by (SerialKey, optional): 从事件得到串行键的函数, 同一个键的事件按投递顺序依次执行, \
+                不同键之间并发. 监听器中不应等待同一个键上之后的事件, 否则会互相等待.
+            where (Mapping[str, Any], optional): 过滤条件, 见 `kritor.broadcast.filter`. \
+                条件不满足的事件不会调度此监听器, 也不会为其解析参数.
+        """
         if isinstance(event, str):
             _name = event
             event = self.findEvent(event)  # type: ignore
@@ -398,20 +826,34 @@ class Broadcast:
         def receiver_wrapper(callable_target):
             listener = self.getListener(callable_target)
             if not listener:
-                self.listeners.append(
-                    Listener(
-                        callable=callable_target,
-                        namespace=namespace or self.getDefaultNamespace(),
-                        inline_dispatchers=dispatchers or [],
-                        priority=priority,
-                        listening_events=[event],  # type: ignore
-                        decorators=decorators or [],
-                    )
+                listener = Listener(
+                    callable=callable_target,
+                    namespace=namespace or self.getDefaultNamespace(),
+                    inline_dispatchers=dispatchers or [],
+                    priority=priority,
+                    listening_events=[event],  # type: ignore
+                    decorators=decorators or [],
+                    max_concurrency=max_concurrency,
+                    timeout=timeout,
+                    overflow=overflow,
+                    serialize_by=serialize_by,
+                    where=where,
                 )
+                self.listeners.append(listener)
+                if listener.serializer is not None:
+                    self._serial_listeners += 1
             elif event in listener.listening_events:
                 raise RegisteredEventListener(event.__name__, "has been registered!")  # type: ignore
             else:
                 listener.listening_events.append(event)  # type: ignore
+            self._index_add(listener, event)  # type: ignore
+            self._notify_listener_change()
             return callable_target
 
         return receiver_wrapper
+
+
+def _expire_task(task: asyncio.Task, expired: List[bool]) -> None:
+    if not task.done():
+        expired.append(True)
+        task.cancel()
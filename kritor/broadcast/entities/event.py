@@ -1,4 +1,4 @@
-from typing import Type
+from typing import Dict, Iterator, List, Optional, Tuple, Type
 
 from .dispatcher import BaseDispatcher
 
@@ -6,5 +6,74 @@ from .dispatcher import BaseDispatcher
 class Dispatchable:
     Dispatcher: Type[BaseDispatcher]
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        event_registry.register(cls)
+
 
 BaseEvent = Dispatchable
+
+
+class EventRegistry:
+    """所有事件类的注册表, 由 `Dispatchable.__init_subclass__` 维护"""
+
+    def __init__(self) -> None:
+        self._by_path: Dict[str, Type[Dispatchable]] = {}
+        self._by_name: Dict[str, Dict[str, Type[Dispatchable]]] = {}
+        self._lineage: Dict[Type[Dispatchable], Tuple[Type[Dispatchable], ...]] = {}
+
+    @staticmethod
+    def path_of(event_class: Type[Dispatchable]) -> str:
+        return f"{event_class.__module__}.{event_class.__qualname__}"
+
+    def register(self, event_class: Type[Dispatchable]) -> None:
+        """登记事件类, 同一路径的类被重新定义时以新的为准"""
+        path = self.path_of(event_class)
+        self._by_path[path] = event_class
+        self._by_name.setdefault(event_class.__name__, {})[path] = event_class
+
+    def find(self, name: str) -> Optional[Type[Dispatchable]]:
+        """按类名或 `模块.类名` 查找事件类.
+
+        Args:
+            name (str): 类名或完整路径
+
+        Returns:
+            Optional[Type[Dispatchable]]: 事件类, 不存在时返回 None
+        """
+        event_class = self._by_path.get(name)
+        if event_class is not None:
+            return event_class
+        candidates = self._by_name.get(name)
+        if not candidates:
+            return None
+        if len(candidates) > 1:
+            from ..exceptions import AmbiguousEventName
+
+            raise AmbiguousEventName(f"{name} matches {', '.join(sorted(candidates))}, use the full path instead")
+        return next(iter(candidates.values()))
+
+    def duplicates(self) -> Dict[str, List[Type[Dispatchable]]]:
+        """类名重复的事件类"""
+        return {name: list(classes.values()) for name, classes in self._by_name.items() if len(classes) > 1}
+
+    def lineage(self, event_class: Type[Dispatchable]) -> Tuple[Type[Dispatchable], ...]:
+        """事件类自身及其所有作为事件类的父类, 按 MRO 顺序. 监听这些类的监听器都会收到该事件."""
+        lineage = self._lineage.get(event_class)
+        if lineage is None:
+            lineage = self._lineage[event_class] = tuple(
+                i
+                for i in event_class.__mro__
+                if i is not Dispatchable and isinstance(i, type) and issubclass(i, Dispatchable)
+            )
+        return lineage
+
+    def __iter__(self) -> Iterator[Type[Dispatchable]]:
+        return iter(self._by_path.values())
+
+    def __len__(self) -> int:
+        return len(self._by_path)
+
+
+event_registry = EventRegistry()
+"""全局事件类注册表"""
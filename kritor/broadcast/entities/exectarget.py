@@ -1,8 +1,12 @@
-from typing import Callable, Dict, Hashable, List, Optional
+import inspect
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, List, Optional
 
 from ..typing import T_Dispatcher
 from .decorator import Decorator
 
+if TYPE_CHECKING:
+    from ..plan import ParameterPlan
+
 
 class ExecTarget:
     callable: Callable
@@ -10,6 +14,11 @@ class ExecTarget:
     decorators: List[Decorator]
 
     oplog: Dict[Hashable, Dict[str, List[T_Dispatcher]]]
+    plans: Dict[Hashable, Optional["ParameterPlan"]]
+    """按事件类缓存的参数解析计划, None 表示无法编译"""
+
+    is_async: bool
+    """callable 是否为异步函数"""
 
     def __init__(
         self,
@@ -22,3 +31,7 @@ class ExecTarget:
         self.decorators = decorators or []
 
         self.oplog = {}
+        self.plans = {}
+        self.is_async = inspect.iscoroutinefunction(callable) or inspect.iscoroutinefunction(
+            getattr(callable, "__call__", None)
+        )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Callable, Dict, List, Optional, Type
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Dict, List, Mapping, Optional, Tuple, Type
 
 from ..typing import T_Dispatcher
 from .decorator import Decorator
@@ -8,12 +8,37 @@ from .event import Dispatchable
 from .exectarget import ExecTarget
 from .namespace import Namespace
 
+if TYPE_CHECKING:
+    from ..filter import Condition
+    from ..limiter import ConcurrencyGate, Overflow
+    from ..serial import KeyedSerializer, SerialKey
+
 
 class Listener(ExecTarget):
     namespace: Namespace
     listening_events: List[Type[Dispatchable]]
     priorities: Dict[Type[Dispatchable] | None, int]
 
+    max_concurrency: Optional[int]
+    """同时执行的最大次数, None 为不限制"""
+
+    timeout: Optional[float]
+    """单次执行的超时时间 (秒), None 为不限制"""
+
+    overflow: Overflow
+    """并发达到上限时的处理方式"""
+
+    gate: Optional[ConcurrencyGate]
+
+    serializer: Optional[KeyedSerializer]
+    """按 `serialize_by` 得到的键串行执行时使用的队列"""
+
+    conditions: Tuple[Condition, ...]
+    """由 `where` 编译得到的过滤条件, 全部满足时监听器才会被调度"""
+
+    priority_generation: ClassVar[int] = 0
+    """每次调用 `add_priority` 时递增, 用于使 Broadcast 缓存的优先级分层失效"""
+
     def __init__(
         self,
         callable: Callable,
@@ -22,16 +47,35 @@ class Listener(ExecTarget):
         inline_dispatchers: Optional[List[T_Dispatcher]] = None,
         decorators: Optional[List[Decorator]] = None,
         priority: int = 16,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        overflow: Overflow = "queue",
+        serialize_by: Optional[SerialKey] = None,
+        where: Optional[Mapping[str, Any]] = None,
     ) -> None:
+        from ..filter import compile_where
+        from ..limiter import ConcurrencyGate
+        from ..serial import KeyedSerializer
+
         super().__init__(callable, inline_dispatchers, decorators)
 
         self.namespace = namespace
         self.listening_events = listening_events
         self.priorities = {None: priority}
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.overflow = overflow
+        self.gate = ConcurrencyGate(max_concurrency, overflow) if max_concurrency is not None else None
+        self.serializer = KeyedSerializer(serialize_by) if serialize_by is not None else None
+        self.conditions = compile_where(where) if where else ()
 
     @property
     def priority(self) -> int:
         return self.priorities[None]
 
+    def priority_of(self, event: Type[Dispatchable]) -> int:
+        return self.priorities.get(event, self.priorities[None])
+
     def add_priority(self, event: Type[Dispatchable], priority: int) -> None:
         self.priorities[event] = priority
+        Listener.priority_generation += 1
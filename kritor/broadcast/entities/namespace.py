@@ -1,7 +1,8 @@
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Optional
 
 if TYPE_CHECKING:
+    from ..limiter import ConcurrencyGate, Overflow
     from ..typing import T_Dispatcher
 
 
@@ -15,3 +16,17 @@ class Namespace:
 
     hide: bool = False
     disabled: bool = False
+
+    max_concurrency: Optional[int] = None
+    """命名空间内所有监听器合计的最大同时执行数"""
+    timeout: Optional[float] = None
+    """命名空间内监听器单次执行的超时时间 (秒)"""
+    overflow: "Overflow" = "queue"
+
+    gate: Optional["ConcurrencyGate"] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.max_concurrency is not None:
+            from ..limiter import ConcurrencyGate
+
+            self.gate = ConcurrencyGate(self.max_concurrency, self.overflow)
@@ -40,3 +40,11 @@ class PropagationCancelled(Exception):
 
 class ExecutionStop(Exception):
     pass
+
+
+class ListenerTimeout(Exception):
+    pass
+
+
+class AmbiguousEventName(InvalidEventName):
+    pass
@@ -0,0 +1,243 @@
+"""监听器的声明式过滤条件.
+
+`receiver(..., where={...})` 中每一项为 `属性路径: 条件`, 所有条件都满足时监听器才会被调度:
+
+- `"sender.group.id": 12345`: 属性等于给定值;
+- `"sender.id": {1, 2, 3}`: 属性等于其中任意一个值 (set / frozenset / list / tuple);
+- `"message_chain": Prefix("/roll")`: 属性的字符串形式以任意一个前缀开头;
+- `"__class__": GroupMessage`: 事件类等于给定的类.
+
+Broadcast 为每个事件类把所有监听器的条件编译为一个 `DecisionIndex`: 等值条件放入哈希表, \
+前缀条件放入前缀树, 每个事件只对每个属性路径取值与查找一次, 不满足条件的监听器不会被执行.
+
+属性不存在时条件视为不满足; 取值或比较时抛出其他异常的条件同样视为不满足, \
+异常会交由 Broadcast 广播为 `EventExceptionThrown`, 不影响其他监听器.
+"""
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .entities.event import Dispatchable
+from .entities.listener import Listener
+
+_LAYER_CACHE_SIZE = 256
+
+
+class Prefix:
+    """前缀条件, 匹配字符串形式以任意一个前缀开头的属性"""
+
+    __slots__ = ("prefixes",)
+
+    def __init__(self, *prefixes: str) -> None:
+        if not prefixes or not all(isinstance(i, str) and i for i in prefixes):
+            raise ValueError("Prefix needs at least one non-empty string.")
+        self.prefixes = prefixes
+
+    def __repr__(self) -> str:
+        return f"Prefix{self.prefixes!r}"
+
+
+class Condition:
+    """编译后的单个过滤条件"""
+
+    __slots__ = ("path", "values", "prefixes")
+
+    path: str
+    values: Optional[FrozenSet[Hashable]]
+    prefixes: Optional[Tuple[str, ...]]
+
+    def __init__(
+        self,
+        path: str,
+        values: Optional[FrozenSet[Hashable]] = None,
+        prefixes: Optional[Tuple[str, ...]] = None,
+    ) -> None:
+        self.path = path
+        self.values = values
+        self.prefixes = prefixes
+
+    def test(self, event: Dispatchable) -> bool:
+        """对单个事件求值, 用于不经过索引的调度.
+
+        Raises:
+            Exception: 取值或比较时抛出的 AttributeError / TypeError 以外的异常
+        """
+        try:
+            value = attrgetter(self.path)(event)
+        except AttributeError:
+            return False
+        if self.prefixes is not None:
+            return str(value).startswith(self.prefixes)
+        try:
+            return value in self.values  # type: ignore
+        except TypeError:
+            return False
+
+    def __repr__(self) -> str:
+        return f"Condition({self.path!r}, {self.prefixes if self.prefixes is not None else set(self.values or ())})"
+
+
+def compile_where(where: Mapping[str, Any]) -> Tuple[Condition, ...]:
+    """将 `where` 参数编译为过滤条件.
+
+    Args:
+        where (Mapping[str, Any]): 属性路径到条件的映射
+
+    Returns:
+        Tuple[Condition, ...]: 过滤条件
+    """
+    conditions: List[Condition] = []
+    for path, expected in where.items():
+        if not isinstance(path, str) or not path:
+            raise ValueError(f"Invalid attribute path in where: {path!r}")
+        if isinstance(expected, Prefix):
+            conditions.append(Condition(path, prefixes=expected.prefixes))
+        elif isinstance(expected, (set, frozenset, list, tuple)):
+            if not expected:
+                raise ValueError(f"Empty value set for {path!r} in where.")
+            conditions.append(Condition(path, values=frozenset(expected)))
+        else:
+            conditions.append(Condition(path, values=frozenset((expected,))))
+    return tuple(conditions)
+
+
+class _Trie:
+    __slots__ = ("root", "depth")
+
+    def __init__(self) -> None:
+        # 每个节点为 dict, 字符 -> 子节点, 键 None 存放以此结尾的前缀所属的监听器
+        self.root: Dict[Any, Any] = {}
+        self.depth = 0
+
+    def add(self, prefix: str, listener: Listener) -> None:
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(listener)
+        self.depth = max(self.depth, len(prefix))
+
+    def match(self, text: str) -> Set[Listener]:
+        matched: Set[Listener] = set()
+        node = self.root
+        for char in text[: self.depth]:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                matched.update(node[None])
+        return matched
+
+
+class _Field:
+    __slots__ = ("getter", "hashed", "trie")
+
+    def __init__(self, path: str) -> None:
+        self.getter: Callable[[Any], Any] = attrgetter(path)
+        self.hashed: Dict[Hashable, List[Listener]] = {}
+        self.trie: Optional[_Trie] = None
+
+
+class DecisionIndex:
+    """某个事件类上所有带过滤条件的监听器的决策索引"""
+
+    def __init__(self, layers: "Tuple[Tuple[Listener, ...], ...]", event_class: type) -> None:
+        """
+        Args:
+            layers (Tuple[Tuple[Listener, ...], ...]): 事件类的全部监听器分层
+            event_class (type): 事件类
+        """
+        self._fields: Dict[str, _Field] = {}
+        self._required: Dict[Listener, int] = {}
+        self._priority: Dict[Listener, int] = {}
+        self._order: Dict[Listener, int] = {}
+        base: Dict[int, List[Listener]] = {}
+        for layer in layers:
+            for listener in layer:
+                priority = listener.priority_of(event_class)
+                self._order[listener] = len(self._order)
+                if not listener.conditions:
+                    base.setdefault(priority, []).append(listener)
+                    continue
+                self._priority[listener] = priority
+                self._required[listener] = len(listener.conditions)
+                for condition in listener.conditions:
+                    self._add(listener, condition)
+        self._base = base
+        self.base_layers = tuple(tuple(group) for _, group in sorted(base.items()))
+        """没有过滤条件的监听器分层"""
+        self._cache: Dict[FrozenSet[Listener], "Tuple[Tuple[Listener, ...], ...]"] = {}
+
+    def _add(self, listener: Listener, condition: Condition) -> None:
+        field = self._fields.get(condition.path)
+        if field is None:
+            field = self._fields[condition.path] = _Field(condition.path)
+        if condition.prefixes is not None:
+            if field.trie is None:
+                field.trie = _Trie()
+            for prefix in condition.prefixes:
+                field.trie.add(prefix, listener)
+        else:
+            for value in condition.values or ():
+                field.hashed.setdefault(value, []).append(listener)
+
+    def match(self, event: Dispatchable, errors: Optional[List[Exception]] = None) -> List[Listener]:
+        """获取所有条件都被事件满足的监听器.
+
+        Args:
+            event (Dispatchable): 事件
+            errors (List[Exception], optional): 收集取值或比较时抛出的异常, 相应的条件视为不满足
+
+        Returns:
+            List[Listener]: 条件都被满足的监听器
+        """
+        counts: Dict[Listener, int] = {}
+        for field in self._fields.values():
+            try:
+                value = field.getter(event)
+            except AttributeError:
+                continue
+            except Exception as e:
+                if errors is not None:
+                    errors.append(e)
+                continue
+            if field.hashed:
+                try:
+                    hit: Iterable[Listener] = field.hashed.get(value, ())
+                except TypeError:
+                    hit = ()
+                except Exception as e:
+                    if errors is not None:
+                        errors.append(e)
+                    hit = ()
+                for listener in hit:
+                    counts[listener] = counts.get(listener, 0) + 1
+            if field.trie is not None:
+                try:
+                    text = value if isinstance(value, str) else str(value)
+                except Exception as e:
+                    if errors is not None:
+                        errors.append(e)
+                    continue
+                for listener in field.trie.match(text):
+                    counts[listener] = counts.get(listener, 0) + 1
+        required = self._required
+        return [listener for listener, count in counts.items() if count == required[listener]]
+
+    def layers_for(
+        self, event: Dispatchable, errors: Optional[List[Exception]] = None
+    ) -> "Tuple[Tuple[Listener, ...], ...]":
+        """获取事件需要调度的监听器分层, `errors` 的含义同 `match`"""
+        matched = self.match(event, errors)
+        if not matched:
+            return self.base_layers
+        key = frozenset(matched)
+        layers = self._cache.get(key)
+        if layers is None:
+            groups = {priority: list(group) for priority, group in self._base.items()}
+            for listener in matched:
+                groups.setdefault(self._priority[listener], []).append(listener)
+            order = self._order.__getitem__
+            layers = tuple(tuple(sorted(group, key=order)) for _, group in sorted(groups.items()))
+            if len(self._cache) >= _LAYER_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = layers
+        return layers
@@ -1,10 +1,10 @@
-import asyncio
 from asyncio import Future, get_running_loop
-from typing import Optional, Type, Union
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, Type, Union
 
 from .. import Broadcast
 from ..entities.event import Dispatchable
 from ..entities.exectarget import ExecTarget
+from ..entities.listener import Listener
 from ..entities.signatures import RemoveMe
 from ..exceptions import PropagationCancelled
 from ..priority import Priority
@@ -12,6 +12,65 @@ from ..utilles import dispatcher_mixin_handler
 from .waiter import Waiter
 
 
+class _PendingWait:
+    __slots__ = ("waiter", "target", "future")
+
+    def __init__(self, waiter: Waiter, future: Future) -> None:
+        self.waiter = waiter
+        self.target = ExecTarget(
+            callable=waiter.detected_event,
+            inline_dispatchers=waiter.using_dispatchers,
+            decorators=waiter.using_decorators,
+        )
+        self.future = future
+
+
+KeyBy = Callable[[Dispatchable], Hashable]
+
+
+class _WaiterHub:
+    """某一事件类型与优先级上所有按键等待的索引, 由一个共享的监听器统一分发.
+
+    监听器在第一个等待登记时挂载, 最后一个等待结束时移除, 没有等待时不占用事件订阅.
+    """
+
+    tables: Dict[KeyBy, Dict[Hashable, Dict[int, _PendingWait]]]
+    """key_by -> 会话键 -> 等待, 只有同一个 key_by 对象的等待共用一张表"""
+
+    listener: Optional[Listener]
+
+    def __init__(self) -> None:
+        self.tables = {}
+        self.size = 0
+        self.listener = None
+
+    def add(self, key_by: KeyBy, key: Hashable, pending: _PendingWait) -> None:
+        self.tables.setdefault(key_by, {}).setdefault(key, {})[id(pending)] = pending
+        self.size += 1
+
+    def remove(self, key_by: KeyBy, key: Hashable, pending: _PendingWait) -> None:
+        table = self.tables.get(key_by)
+        entries = table.get(key) if table else None
+        if not entries or entries.pop(id(pending), None) is None:
+            return
+        self.size -= 1
+        if not entries:
+            del table[key]  # type: ignore
+            if not table:
+                del self.tables[key_by]
+
+    def lookup(self, event: Dispatchable) -> List[_PendingWait]:
+        matched: List[_PendingWait] = []
+        for key_by, table in self.tables.items():
+            try:
+                entries = table.get(key_by(event))
+            except Exception:
+                continue
+            if entries:
+                matched.extend(entries.values())
+        return matched
+
+
 class InterruptControl:
     """即中断控制, 主要是用于监听器/其他地方进行对符合特定要求的事件的捕获, 并返回事件.
 
@@ -25,9 +84,20 @@ class InterruptControl:
 
     def __init__(self, broadcast: Broadcast) -> None:
         self.broadcast = broadcast
+        self._hubs: Dict[Tuple[Type[Dispatchable], int], _WaiterHub] = {}
+
+    @property
+    def pending(self) -> int:
+        """按键等待中的数量"""
+        return sum(hub.size for hub in self._hubs.values())
 
     async def wait(
-        self, waiter: Waiter, priority: Optional[Union[int, Priority]] = None, timeout: Optional[float] = None, **kwargs
+        self,
+        waiter: Waiter,
+        priority: Optional[Union[int, Priority]] = None,
+        timeout: Optional[float] = None,
+        key: Optional[Hashable] = None,
+        **kwargs,
     ):
         """生成一一次性使用的监听器并将其挂载, 该监听器用于获取特定类型的事件, 并根据设定对事件进行过滤;
         当获取到符合条件的对象时, 堵塞将被解除, 同时该方法返回从监听器得到的值.
@@ -35,27 +105,102 @@ class InterruptControl:
         Args:
             waiter (Waiter): 等待器
             priority (Union[int, Priority]): 中断 inline 监听器的优先级, Defaults to 15.
-            **kwargs: 都会直接传入 Broadcast.receiver.
+            timeout (float, optional): 超时时间 (秒), 超时后抛出 `asyncio.TimeoutError`.
+            key (Hashable, optional): 只等待 `waiter.key_by(event) == key` 的事件. 按键等待登记在索引中, \
+                每个事件只查找一次, 不再为每次等待挂载监听器.
+            **kwargs: 都会直接传入 Broadcast.receiver, 按键等待时不可用.
 
         Returns:
             Any: 通常这个值由中断本身定义并返回.
         """
         future = get_running_loop().create_future()
+        if key is not None:
+            return await self._wait_keyed(waiter, priority, timeout, key, future, kwargs)
 
         listeners = set()
+        # 优先级 0 也是有效的优先级, 只有未指定时才使用 Waiter 的优先级
+        priority = waiter.priority if priority is None else priority
         for event_type in waiter.listening_events:
             listener_callable = self.leader_listener_generator(waiter, event_type, future)
-            self.broadcast.receiver(event_type, priority=priority or waiter.priority, **kwargs)(listener_callable)
+            self.broadcast.receiver(event_type, priority=priority, **kwargs)(listener_callable)
             listener = self.broadcast.getListener(listener_callable)
             listeners.add(listener)
 
         try:
-            return await asyncio.wait_for(future, timeout) if timeout else await future
+            return await self.broadcast.timers.wait_future(future, timeout or None)
         finally:  # 删除 Listener
-            if not future.done():
-                for i in listeners:
+            for i in listeners:
+                if i in self.broadcast.listeners:
                     self.broadcast.removeListener(i)
 
+    async def _wait_keyed(
+        self,
+        waiter: Waiter,
+        priority: Optional[Union[int, Priority]],
+        timeout: Optional[float],
+        key: Hashable,
+        future: Future,
+        kwargs: dict,
+    ):
+        key_by = waiter.key_by
+        if key_by is None:
+            raise ValueError("Waiting with a key requires the waiter to define key_by.")
+        if kwargs:
+            raise ValueError("Keyed waits share one listener per event type and priority, receiver options are not supported.")
+        priority = int(waiter.priority if priority is None else priority)
+        pending = _PendingWait(waiter, future)
+        hubs = [(event_type, self._hub(event_type, priority)) for event_type in waiter.listening_events]
+        for _, hub in hubs:
+            hub.add(key_by, key, pending)
+        try:
+            return await self.broadcast.timers.wait_future(future, timeout or None)
+        finally:
+            for event_type, hub in hubs:
+                hub.remove(key_by, key, pending)
+                if not hub.size:
+                    self._release(event_type, priority, hub)
+
+    def _hub(self, event_type: Type[Dispatchable], priority: int) -> _WaiterHub:
+        hub = self._hubs.get((event_type, priority))
+        if hub is None:
+            hub = self._hubs[(event_type, priority)] = _WaiterHub()
+            listener_callable = self.hub_listener_generator(hub, event_type)
+            self.broadcast.receiver(event_type, priority=priority)(listener_callable)
+            hub.listener = self.broadcast.getListener(listener_callable)
+        return hub
+
+    def _release(self, event_type: Type[Dispatchable], priority: int, hub: _WaiterHub) -> None:
+        """最后一个等待结束后移除共享监听器, 使不再被监听的事件流可以关闭"""
+        if self._hubs.get((event_type, priority)) is hub:
+            del self._hubs[(event_type, priority)]
+        if hub.listener is not None and hub.listener in self.broadcast.listeners:
+            self.broadcast.removeListener(hub.listener)
+        hub.listener = None
+
+    def hub_listener_generator(self, hub: _WaiterHub, event_type: Type[Dispatchable]):
+        async def hub_listener(event: event_type):
+            if not hub.size:
+                return
+            matched = hub.lookup(event)
+            if not matched:
+                return
+            dispatchers = dispatcher_mixin_handler(event.Dispatcher)
+            block = False
+            for pending in matched:
+                if pending.future.done():
+                    continue
+                try:
+                    result = await self.broadcast.Executor(target=pending.target, dispatchers=dispatchers)
+                except Exception:
+                    continue  # 已由 Executor 处理, 不影响同一事件上的其他等待
+                if result is not None and not pending.future.done():
+                    pending.future.set_result(result)
+                    block = block or pending.waiter.block_propagation
+            if block:
+                raise PropagationCancelled()
+
+        return hub_listener
+
     def leader_listener_generator(self, waiter: Waiter, event_type: Type[Dispatchable], future: Future):
         async def inside_listener(event: event_type):
             if future.done():
@@ -1,5 +1,5 @@
 from abc import ABCMeta, abstractmethod
-from typing import Any, Callable, List, Optional, Type
+from typing import Any, Callable, Hashable, List, Optional, Type
 
 from ..entities.decorator import Decorator
 from ..entities.event import Dispatchable
@@ -14,6 +14,12 @@ class Waiter(metaclass=ABCMeta):
     block_propagation: bool
     detected_event: Callable[..., Any]
 
+    key_by: Optional[Callable[[Dispatchable], Hashable]] = None
+    """从事件得到会话键的函数 (如发送者 QQ 号). 设置后可以 `InterruptControl.wait(waiter, key=...)` \
+    只等待该键上的事件, 这类等待共用一个按键索引的监听器, 不再各自挂载监听器.
+    使用同一个 key_by 对象的等待共用一张按键索引的表, 每个不同的 key_by 对象在每个事件上都会被调用一次, \
+    因此宜使用模块级函数, 而不是在每次等待时新建的 lambda 或闭包."""
+
     @classmethod
     def create(
         cls,
@@ -22,6 +28,7 @@ class Waiter(metaclass=ABCMeta):
         using_decorators: Optional[List[Decorator]] = None,
         priority: int = 15,  # 默认情况下都是需要高于默认 16 的监听吧...
         block_propagation: bool = False,
+        key_by: Optional[Callable[[Dispatchable], Hashable]] = None,
     ) -> Type["Waiter"]:
         async def detected_event(self) -> Any:
             pass
@@ -36,6 +43,7 @@ class Waiter(metaclass=ABCMeta):
                 "priority": priority,
                 "block_propagation": block_propagation,
                 "detected_event": abstractmethod(detected_event),
+                "key_by": staticmethod(key_by) if key_by else None,
             },
         )
 
@@ -47,6 +55,7 @@ class Waiter(metaclass=ABCMeta):
         using_decorators: Optional[List[Decorator]] = None,
         priority: int = 15,  # 默认情况下都是需要高于默认 16 的监听吧...
         block_propagation: bool = False,
+        key_by: Optional[Callable[[Dispatchable], Hashable]] = None,
     ):
         def wrapper(func):
             return type(
@@ -58,6 +67,7 @@ class Waiter(metaclass=ABCMeta):
                         using_decorators,
                         priority,
                         block_propagation,
+                        key_by,
                     ),
                 ),
                 {"detected_event": staticmethod(func)},
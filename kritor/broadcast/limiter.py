@@ -0,0 +1,78 @@
+"""监听器与命名空间的并发限制"""
+import asyncio
+from collections import deque
+from typing import Deque, Literal, Optional
+
+Overflow = Literal["queue", "drop", "cancel_oldest"]
+"""并发数达到上限时的处理方式: 排队等待, 丢弃本次执行, 或取消最早的一次执行"""
+
+
+class ConcurrencyGate:
+    """限制同时执行数的闸门, 由监听器或命名空间持有."""
+
+    limit: Optional[int]
+    overflow: Overflow
+
+    active: int
+    """占用的执行名额数"""
+
+    dropped: int
+    """因并发已满被丢弃的执行数"""
+
+    cancelled: int
+    """因并发已满被取消的执行数"""
+
+    def __init__(self, limit: Optional[int], overflow: Overflow = "queue") -> None:
+        if limit is not None and limit < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if overflow not in ("queue", "drop", "cancel_oldest"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.limit = limit
+        self.overflow = overflow
+        self.active = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self._running: Deque[asyncio.Task] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> bool:
+        """占用一个执行名额, 返回 False 表示本次执行应当被丢弃."""
+        if self.limit is None or self.active < self.limit:
+            self.active += 1
+            return True
+        if self.overflow == "drop":
+            self.dropped += 1
+            return False
+        if self.overflow == "cancel_oldest" and self._running:
+            self._running.popleft().cancel()
+            self.cancelled += 1
+            return True  # 名额直接转交给本次执行
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)  # 名额已经转交, 归还
+            else:
+                self._waiters.remove(waiter)
+            raise
+        return True
+
+    def attach(self, task: asyncio.Task) -> None:
+        """记录占用名额的执行任务, 供 `cancel_oldest` 使用."""
+        self._running.append(task)
+
+    def release(self, task: Optional[asyncio.Task]) -> None:
+        """归还执行名额. 已经被 `cancel_oldest` 取消的任务不再持有名额."""
+        if task is not None:
+            try:
+                self._running.remove(task)
+            except ValueError:
+                return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # 名额直接转交给等待者
+                return
+        self.active -= 1
@@ -0,0 +1,123 @@
+"""监听器参数解析计划.
+
+第一次为某个 (监听器, 事件类) 完整解析参数后, 记录每个参数的来源:
+
+- 事件本身, 或事件上的属性 (最多两层, 如 `event.sender.group`): 之后直接读取属性;
+- 其他情况: 之后直接调用上次成功的 Dispatcher, 不再依次询问所有 Dispatcher.
+
+任意一步得到 None 时放弃计划, 回到完整的参数解析.
+"""
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from typing_extensions import Annotated, get_origin
+
+from .builtin.defer import DeferDispatcher
+from .builtin.depend import DependDispatcher
+from .entities.decorator import Decorator
+from .entities.event import Dispatchable
+from .interfaces.decorator import DecoratorInterface
+from .typing import T_Dispatcher
+
+if TYPE_CHECKING:
+    from .entities.exectarget import ExecTarget
+
+Accessor = Callable[[Dispatchable], Any]
+
+_PRIMITIVES = (int, float, complex, str, bytes, bool, tuple, frozenset, type(None))
+"""这些类型的值可能被驻留, 不能通过 `is` 判断来源"""
+
+_SCOPED_HOOK_DISPATCHERS = (DependDispatcher, DeferDispatcher, DecoratorInterface)
+"""这些 Dispatcher 的执行前后钩子只服务于 Decorator / Depend, 计划中没有它们时可以跳过"""
+
+
+def _identity(event: Dispatchable) -> Dispatchable:
+    return event
+
+
+def _attributes(obj: Any) -> Dict[str, Any]:
+    try:
+        return vars(obj)
+    except TypeError:
+        return {}
+
+
+def find_accessor(event: Dispatchable, value: Any) -> Optional[Accessor]:
+    """查找从事件取得 value 的属性路径, 找不到时返回 None"""
+    if value is event:
+        return _identity
+    if isinstance(value, _PRIMITIVES):
+        return None
+    for name, first in _attributes(event).items():
+        if first is value:
+            return attrgetter(name)
+        if isinstance(first, _PRIMITIVES):
+            continue
+        for sub_name, second in _attributes(first).items():
+            if second is value:
+                return attrgetter(f"{name}.{sub_name}")
+    return None
+
+
+class ParameterPlan:
+    """编译后的参数解析计划"""
+
+    __slots__ = ("accessors", "dispatched")
+
+    accessors: Tuple[Tuple[str, Accessor], ...]
+    """直接从事件读取的参数"""
+
+    dispatched: Tuple[Tuple[str, Any, Any, T_Dispatcher], ...]
+    """由固定 Dispatcher 解析的参数: (名称, 注解, 默认值, Dispatcher)"""
+
+    def __init__(
+        self,
+        accessors: Tuple[Tuple[str, Accessor], ...],
+        dispatched: Tuple[Tuple[str, Any, Any, T_Dispatcher], ...],
+    ) -> None:
+        self.accessors = accessors
+        self.dispatched = dispatched
+
+
+def compile_plan(
+    target: "ExecTarget",
+    event: Dispatchable,
+    dispatchers: List[T_Dispatcher],
+    signature: List[Tuple[str, Any, Any]],
+    resolved: Dict[str, Any],
+) -> Optional[ParameterPlan]:
+    """根据一次完整解析的结果编译参数解析计划, 无法安全编译时返回 None.
+
+    Args:
+        target (ExecTarget): 执行目标, 其 oplog 中记录了各参数上次成功的 Dispatcher
+        event (Dispatchable): 本次解析使用的事件
+        dispatchers (List[T_Dispatcher]): 本次解析使用的全部 Dispatcher
+        signature (List[Tuple[str, Any, Any]]): 目标的参数签名
+        resolved (Dict[str, Any]): 解析得到的参数
+
+    Returns:
+        Optional[ParameterPlan]: 参数解析计划
+    """
+    if target.decorators:
+        return None
+    for dispatcher in dispatchers:
+        if isinstance(dispatcher, _SCOPED_HOOK_DISPATCHERS):
+            continue
+        if any(getattr(dispatcher, i, None) for i in ("beforeExecution", "afterDispatch", "afterExecution")):
+            return None
+
+    oplog = target.oplog.get(event.__class__, {})
+    accessors: List[Tuple[str, Accessor]] = []
+    dispatched: List[Tuple[str, Any, Any, T_Dispatcher]] = []
+    for name, annotation, default in signature:
+        if isinstance(default, Decorator) or get_origin(annotation) is Annotated:
+            return None
+        accessor = find_accessor(event, resolved[name])
+        if accessor is not None:
+            accessors.append((name, accessor))
+            continue
+        path = oplog.get(name)
+        if not path:
+            return None
+        dispatched.append((name, annotation, default, path[0]))
+    return ParameterPlan(tuple(accessors), tuple(dispatched))
@@ -0,0 +1,117 @@
+"""按键串行执行监听器.
+
+监听器指定 `serialize_by` 后, 同一个键 (如群号) 的事件按投递顺序依次执行该监听器, \
+不同键之间仍然并发. 每个键只在有事件排队或执行时占用一个队列, 空闲后立即移除.
+"""
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .entities.event import Dispatchable
+
+SerialKey = Callable[[Dispatchable], Optional[Hashable]]
+"""从事件得到串行键的函数, 返回 None 表示该事件不需要串行执行"""
+
+
+class _KeyQueue:
+    __slots__ = ("tail", "pending")
+
+    def __init__(self) -> None:
+        self.tail: Optional[SerialTicket] = None
+        self.pending = 0
+
+
+class SerialTicket:
+    """某个键上的一次执行名额, 在事件开始调度时按投递顺序领取."""
+
+    __slots__ = ("serializer", "key", "queue", "previous", "future", "released")
+
+    def __init__(
+        self,
+        serializer: "KeyedSerializer",
+        key: Hashable,
+        queue: _KeyQueue,
+        previous: "Optional[SerialTicket]",
+    ) -> None:
+        self.serializer = serializer
+        self.key = key
+        self.queue = queue
+        self.previous = previous
+        self.future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self.released = False
+
+    async def wait(self) -> None:
+        """等待同一个键上之前的执行全部结束."""
+        previous = self.previous
+        if previous is not None and not previous.future.done():
+            # 不直接 await, 以免本次执行被取消时连带取消前一个名额
+            await asyncio.wait((previous.future,))
+
+    def release(self) -> None:
+        """归还名额. 未执行就被放弃的名额会等到前一个名额结束后再归还, 保证后续执行的顺序."""
+        if self.released:
+            return
+        self.released = True
+        previous = self.previous
+        if previous is None or previous.future.done():
+            self._finish()
+        else:
+            previous.future.add_done_callback(self._finish)
+
+    def _finish(self, _: Any = None) -> None:
+        self.previous = None
+        if not self.future.done():
+            self.future.set_result(None)
+        queue = self.queue
+        queue.pending -= 1
+        if not queue.pending:
+            self.serializer._evict(self.key, queue)
+
+
+class KeyedSerializer:
+    """监听器持有的按键串行队列"""
+
+    key_func: SerialKey
+
+    peak: int
+    """同时存在的键队列数的峰值"""
+
+    def __init__(self, key_func: SerialKey) -> None:
+        self.key_func = key_func
+        self.peak = 0
+        self._queues: Dict[Hashable, _KeyQueue] = {}
+
+    def __len__(self) -> int:
+        return len(self._queues)
+
+    def reserve(self, event: Dispatchable) -> Optional[SerialTicket]:
+        """为事件领取执行名额, 须在事件调度开始、首次 await 之前调用以保证顺序.
+
+        Args:
+            event (Dispatchable): 事件
+
+        Returns:
+            Optional[SerialTicket]: 执行名额, 事件不需要串行执行时返回 None
+
+        Raises:
+            Exception: key_func 抛出的异常或键不可哈希, 此时不会领取名额, Broadcast 会跳过该监听器
+        """
+        key = self.key_func(event)
+        if key is None:
+            return None
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _KeyQueue()
+            if len(self._queues) > self.peak:
+                self.peak = len(self._queues)
+        ticket = SerialTicket(self, key, queue, queue.tail)
+        queue.tail = ticket
+        queue.pending += 1
+        return ticket
+
+    def _evict(self, key: Hashable, queue: _KeyQueue) -> None:
+        if self._queues.get(key) is queue:
+            del self._queues[key]
+
+    @property
+    def stats(self) -> dict:
+        return {"keys": len(self._queues), "peak": self.peak}
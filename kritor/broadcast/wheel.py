@@ -0,0 +1,183 @@
+"""分层时间轮.
+
+大量超时 (等待器超时, 监听器超时, 延迟事件) 共用一个事件循环定时器. 插入与取消都是 O(1), \
+代价是触发时间被取整到 `resolution` 的整数倍, 最多晚一个 `resolution`.
+"""
+import asyncio
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class WheelTimer:
+    """时间轮上的一个定时器"""
+
+    __slots__ = ("wheel", "target", "callback", "args", "slot", "cancelled")
+
+    def __init__(self, wheel: "TimingWheel", target: int, callback: Callable[..., Any], args: Sequence[Any]) -> None:
+        self.wheel = wheel
+        self.target = target
+        """到期时的刻度"""
+        self.callback = callback
+        self.args = args
+        self.slot: Optional[Dict[int, "WheelTimer"]] = None
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """取消定时器, 已经触发或取消的定时器不受影响."""
+        if self.cancelled or self.slot is None:
+            return
+        self.cancelled = True
+        if self.slot.pop(id(self), None) is not None:
+            self.wheel._count -= 1
+        self.slot = None
+
+
+class TimingWheel:
+    """分层时间轮, 由 `Broadcast.timers` 持有"""
+
+    resolution: float
+    """刻度长度 (秒)"""
+
+    def __init__(self, resolution: float = 0.05, wheel_sizes: Sequence[int] = (256, 64, 64, 64)) -> None:
+        """
+        Args:
+            resolution (float, optional): 刻度长度 (秒). 默认为 0.05.
+            wheel_sizes (Sequence[int], optional): 每层的槽数, 第 n 层每个槽覆盖前 n 层全部槽数个刻度. \
+                默认的四层在 0.05 秒刻度下可以覆盖约 168 天, 更远的定时器会在到达最高层时重新放置.
+        """
+        if resolution <= 0:
+            raise ValueError("resolution must be positive.")
+        if not wheel_sizes or any(size < 2 for size in wheel_sizes):
+            raise ValueError("Every wheel needs at least two slots.")
+        self.resolution = resolution
+        self._sizes = tuple(wheel_sizes)
+        self._spans: List[int] = []
+        span = 1
+        for size in self._sizes:
+            self._spans.append(span)
+            span *= size
+        self._wheels: List[List[Dict[int, WheelTimer]]] = [[{} for _ in range(size)] for size in self._sizes]
+        self._tick = 0
+        self._count = 0
+        self._origin = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> WheelTimer:
+        """在 delay 秒后调用 callback(*args).
+
+        Args:
+            delay (float): 延迟时间 (秒)
+            callback (Callable[..., Any]): 回调函数
+            *args: 传递给回调函数的参数
+
+        Returns:
+            WheelTimer: 定时器, 可用于取消
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._bind(loop)
+        if not self._count:
+            # 空闲期间不推进刻度, 放入第一个定时器前对齐到当前时间
+            self._tick = max(self._tick, int((loop.time() - self._origin) / self.resolution))
+        target = math.ceil((loop.time() - self._origin + delay) / self.resolution)
+        timer = WheelTimer(self, max(target, self._tick + 1), callback, args)
+        self._place(timer)
+        self._count += 1
+        if self._handle is None:
+            self._schedule()
+        return timer
+
+    async def wait_future(self, future: "asyncio.Future[T]", timeout: Optional[float]) -> T:
+        """等待 future, 超时后将 `asyncio.TimeoutError` 设置到 future 上.
+
+        与 `asyncio.wait_for` 不同, 不创建额外的 Task 与事件循环定时器; future 须由调用方独占.
+        """
+        if timeout is None:
+            return await future
+        timer = self.call_later(timeout, _expire, future)
+        try:
+            return await future
+        finally:
+            timer.cancel()
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._count:
+            logger.warning(f"Dropping {self._count} timer(s) bound to a previous event loop")
+            for wheel in self._wheels:
+                for slot in wheel:
+                    slot.clear()
+            self._count = 0
+        self._loop = loop
+        self._origin = loop.time()
+        self._tick = 0
+
+    def _place(self, timer: WheelTimer) -> None:
+        delta = timer.target - self._tick
+        level = 0
+        while level < len(self._sizes) - 1 and delta >= self._spans[level + 1]:
+            level += 1
+        # 超出最高层范围的定时器会提前被取出, 重新放置即可
+        slot = self._wheels[level][(timer.target // self._spans[level]) % self._sizes[level]]
+        slot[id(timer)] = timer
+        timer.slot = slot
+
+    def _cascade(self, level: int) -> None:
+        index = (self._tick // self._spans[level]) % self._sizes[level]
+        if index == 0 and level + 1 < len(self._sizes):
+            self._cascade(level + 1)
+        slot = self._wheels[level][index]
+        if not slot:
+            return
+        timers = list(slot.values())
+        slot.clear()
+        for timer in timers:
+            self._place(timer)
+
+    def _schedule(self) -> None:
+        assert self._loop is not None
+        self._handle = self._loop.call_at(self._origin + (self._tick + 1) * self.resolution, self._on_tick)
+
+    def _on_tick(self) -> None:
+        self._handle = None
+        assert self._loop is not None
+        now = int((self._loop.time() - self._origin) / self.resolution)
+        while self._tick < now and self._count:
+            self._tick += 1
+            if self._tick % self._sizes[0] == 0 and len(self._sizes) > 1:
+                self._cascade(1)
+            slot = self._wheels[0][self._tick % self._sizes[0]]
+            if not slot:
+                continue
+            timers = list(slot.values())
+            slot.clear()
+            for timer in timers:
+                self._count -= 1
+                if timer.cancelled:  # 被同一刻度中先触发的回调取消
+                    continue
+                timer.slot = None
+                try:
+                    timer.callback(*timer.args)
+                except Exception:
+                    logger.exception("Error in timing wheel callback")
+        if self._count:
+            self._schedule()
+
+    @property
+    def stats(self) -> dict:
+        return {"timers": self._count, "tick": self._tick, "resolution": self.resolution}
+
+
+def _expire(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_exception(asyncio.TimeoutError())
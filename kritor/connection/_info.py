@@ -1,7 +1,5 @@
 from typing import Dict, NamedTuple, TypeVar, Union
 
-from yarl import URL
-
 
 class GrpcClientInfo(NamedTuple):
     account: int
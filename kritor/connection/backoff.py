@@ -0,0 +1,35 @@
+"""重连退避策略"""
+import math
+import random
+
+
+class ExponentialBackoff:
+    """带随机抖动的指数退避.
+
+    第 n 次重试的基准等待时间为 `min(maximum, initial * multiplier ** n)`,
+    实际等待时间在 `[base * (1 - jitter), base]` 中随机选取, 以避免大量连接同时重连.
+    """
+
+    initial: float
+    maximum: float
+    multiplier: float
+    jitter: float
+
+    def __init__(self, initial: float = 0.5, maximum: float = 30.0, multiplier: float = 2.0, jitter: float = 0.5) -> None:
+        if initial <= 0 or maximum < initial:
+            raise ValueError("Backoff requires 0 < initial <= maximum.")
+        if multiplier < 1:
+            raise ValueError("Backoff multiplier must be at least 1.")
+        if not 0 <= jitter <= 1:
+            raise ValueError("Backoff jitter must be within [0, 1].")
+        self.initial = initial
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.jitter = jitter
+        # 达到上限后不再增大指数, 长时间断线时 attempt 会无限增长, 浮点乘方会溢出
+        self._ceiling = math.ceil(math.log(maximum / initial, multiplier)) if multiplier > 1 else 0
+
+    def delay(self, attempt: int) -> float:
+        """获取第 `attempt` 次 (从 0 开始) 重试前的等待时间"""
+        base = min(self.maximum, self.initial * self.multiplier ** min(attempt, self._ceiling))
+        return base - random.uniform(0, base * self.jitter)
@@ -0,0 +1,150 @@
+"""Grpc 通道池"""
+import itertools
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Literal, Optional, Sequence, Tuple, Type, TypeVar
+
+import grpc
+
+T_Stub = TypeVar("T_Stub")
+
+ChannelStrategy = Literal["round_robin", "least_loaded"]
+
+
+class SubChannel:
+    """通道池中的一条连接, 在第一次使用时才会建立."""
+
+    target: str
+    aio: bool
+    load: int
+    """当前正在进行的调用数"""
+
+    def __init__(self, target: str, options: Sequence[Tuple[str, Any]], aio: bool) -> None:
+        self.target = target
+        self.options = list(options)
+        self.aio = aio
+        self.load = 0
+        self._channel: Optional[Any] = None
+        self._stubs: Dict[type, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def channel(self) -> Any:
+        if self._channel is None:
+            with self._lock:
+                if self._channel is None:
+                    if self.aio:
+                        self._channel = grpc.aio.insecure_channel(self.target, options=self.options)
+                    else:
+                        self._channel = grpc.insecure_channel(self.target, options=self.options)
+        return self._channel
+
+    def stub(self, stub_type: Type[T_Stub]) -> T_Stub:
+        stub = self._stubs.get(stub_type)
+        if stub is None:
+            stub = self._stubs[stub_type] = stub_type(self.channel)
+        return stub
+
+    def close(self) -> None:
+        if self._channel is not None and not self.aio:
+            self._channel.close()
+        self._channel = None
+        self._stubs.clear()
+
+    async def aclose(self) -> None:
+        if self._channel is not None and self.aio:
+            await self._channel.close()
+            self._channel = None
+            self._stubs.clear()
+        else:
+            self.close()
+
+
+class ChannelPool:
+    """面向同一目标的长连接通道池.
+
+    通道与 stub 都在第一次使用时创建, 并在整个应用生命周期内复用.
+    同步调用与异步调用各自持有 `size` 条互相独立的 HTTP/2 连接,
+    每次调用按 `strategy` 选择其中一条.
+    """
+
+    target: str
+    size: int
+    strategy: ChannelStrategy
+
+    def __init__(
+        self,
+        target: str,
+        size: int = 1,
+        strategy: ChannelStrategy = "round_robin",
+        options: Optional[Sequence[Tuple[str, Any]]] = None,
+    ) -> None:
+        """
+        Args:
+            target (str): 连接目标, 形如 `host:port`
+            size (int, optional): 子通道数量. 默认为 1.
+            strategy (ChannelStrategy, optional): 子通道选择策略, \
+                `round_robin` 为轮询, `least_loaded` 为选择正在进行的调用最少的通道. 默认为 `round_robin`.
+            options (Sequence[Tuple[str, Any]], optional): 额外的 grpc 通道参数.
+        """
+        if size < 1:
+            raise ValueError("ChannelPool size must be at least 1.")
+        if strategy not in ("round_robin", "least_loaded"):
+            raise ValueError(f"Unknown channel strategy: {strategy}")
+        self.target = target
+        self.size = size
+        self.strategy = strategy
+
+        options = list(options or [])
+        if size > 1:
+            # grpc 默认会在相同参数的通道之间共享底层连接
+            options.append(("grpc.use_local_subchannel_pool", 1))
+        self._channels: List[SubChannel] = [SubChannel(target, options, aio=False) for _ in range(size)]
+        self._aio_channels: List[SubChannel] = [SubChannel(target, options, aio=True) for _ in range(size)]
+        self._counter = itertools.count()
+
+    def _select(self, channels: List[SubChannel]) -> SubChannel:
+        if len(channels) == 1:
+            return channels[0]
+        if self.strategy == "least_loaded":
+            return min(channels, key=lambda x: x.load)
+        return channels[next(self._counter) % len(channels)]
+
+    def stub(self, stub_type: Type[T_Stub]) -> T_Stub:
+        """获取同步 stub, 适用于不需要计入负载的调用."""
+        return self._select(self._channels).stub(stub_type)
+
+    def astub(self, stub_type: Type[T_Stub]) -> T_Stub:
+        """获取异步 stub, 适用于长期存在的流式调用."""
+        return self._select(self._aio_channels).stub(stub_type)
+
+    @contextmanager
+    def lease(self, stub_type: Type[T_Stub]) -> Iterator[T_Stub]:
+        """借出一个同步 stub, 在上下文中计入所在子通道的负载."""
+        channel = self._select(self._channels)
+        channel.load += 1
+        try:
+            yield channel.stub(stub_type)
+        finally:
+            channel.load -= 1
+
+    @asynccontextmanager
+    async def alease(self, stub_type: Type[T_Stub]) -> AsyncIterator[T_Stub]:
+        """借出一个异步 stub, 在上下文中计入所在子通道的负载."""
+        channel = self._select(self._aio_channels)
+        channel.load += 1
+        try:
+            yield channel.stub(stub_type)
+        finally:
+            channel.load -= 1
+
+    def close(self) -> None:
+        """关闭所有同步通道."""
+        for channel in self._channels:
+            channel.close()
+
+    async def aclose(self) -> None:
+        """关闭所有通道."""
+        self.close()
+        for channel in self._aio_channels:
+            await channel.aclose()
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Dict, List, NamedTuple, Sequence, Type, Union, overload
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Sequence, Type, Union, overload
 from typing_extensions import NotRequired, Required, TypedDict
 
 from ..typing import DictStrAny
@@ -6,6 +6,7 @@ from ._info import GrpcClientInfo, GrpcServerInfo, U_Info
 
 if TYPE_CHECKING:
     from ..app import KritorApp
+    from ..runtime import KritorRuntime
 
 
 class GrpcClientConfig(NamedTuple):
@@ -24,10 +25,6 @@ class GrpcServerConfig(NamedTuple):
 
 U_Config = Union[GrpcClientConfig, GrpcServerConfig]
 
-_CFG_INFO_MAP = {
-    GrpcClientConfig: GrpcClientInfo,
-    GrpcServerConfig: GrpcServerInfo,
-}
 
 def config(account: Union[int, str], ticket: str, *configs: Union[Type[U_Config], U_Config]) -> List[U_Info]:
     """生成 Kritor 账号配置
@@ -41,32 +38,39 @@ def config(account: Union[int, str], ticket: str, *configs: Union[Type[U_Config]
     for cfg in configs:
         if isinstance(cfg, type):
             cfg = cfg()
-        infos.append(_CFG_INFO_MAP[type(cfg)](account, ticket, *cfg))
+        if isinstance(cfg, GrpcServerConfig):
+            infos.append(GrpcServerInfo(*cfg))
+        else:
+            infos.append(GrpcClientInfo(account, ticket, *cfg))
     return infos
 
 
 class ConfigTypedDict(TypedDict):
     account: Required[int]
     verify_key: Required[str]
-    http_client: NotRequired[DictStrAny]
-    websocket_client: NotRequired[DictStrAny]
-    http_server: NotRequired[DictStrAny]
-    websocket_server: NotRequired[DictStrAny]
+    grpc_client: NotRequired[DictStrAny]
+    grpc_server: NotRequired[DictStrAny]
 
 
 @overload
-def from_obj(obj: Sequence[ConfigTypedDict]) -> List["KritorApp"]:
+def from_obj(obj: Sequence[ConfigTypedDict], runtime: Optional["KritorRuntime"] = None) -> List["KritorApp"]:
     ...
 
 
 @overload
-def from_obj(obj: ConfigTypedDict) -> "KritorApp":
+def from_obj(obj: ConfigTypedDict, runtime: Optional["KritorRuntime"] = None) -> "KritorApp":
     ...
 
 
-def from_obj(obj: Union[ConfigTypedDict, Sequence[ConfigTypedDict]]) -> Union[List["KritorApp"], "KritorApp"]:
+def from_obj(
+    obj: Union[ConfigTypedDict, Sequence[ConfigTypedDict]], runtime: Optional["KritorRuntime"] = None
+) -> Union[List["KritorApp"], "KritorApp"]:
+    """从配置对象创建 KritorApp, 传入 runtime 时账号将加入该多账号运行时.
+
+    未配置 `grpc_server` 的账号以被动模式运行.
+    """
     if isinstance(obj, Sequence):
-        return [from_obj(o) for o in obj]
+        return [from_obj(o, runtime) for o in obj]
     if isinstance(obj, dict):
         extras: List[U_Config] = []
         if "grpc_client" in obj:
@@ -74,6 +78,20 @@ def from_obj(obj: Union[ConfigTypedDict, Sequence[ConfigTypedDict]]) -> Union[Li
         if "grpc_server" in obj:
             extras.append(GrpcServerConfig(**obj["grpc_server"]))
 
+        infos = config(obj["account"], obj["verify_key"], *extras)
+        client = next((i for i in infos if isinstance(i, GrpcClientInfo)), None) or GrpcClientInfo(
+            str(obj["account"]), obj["verify_key"], *GrpcClientConfig()
+        )
+        server = next((i for i in infos if isinstance(i, GrpcServerInfo)), None)
+        kwargs = dict(
+            server_host=server.host if server else None,
+            server_port=server.port if server else None,
+            passive=server is None,
+        )
+        if runtime is not None:
+            return runtime.create_app(client.account, client.ticket, client.host, client.port, **kwargs)
+
         from ..app import KritorApp
 
-        return KritorApp(config(obj["account"], obj["verify_key"], *extras))
+        return KritorApp(client.account, client.ticket, client.host, client.port, **kwargs)
+    raise TypeError(f"Unsupported config object: {obj!r}")
@@ -0,0 +1,403 @@
+"""联系人信息缓存.
+
+`ContactCache` 在启动时批量拉取好友, 群组与群成员列表, 之后的查询直接由内存提供; 数据超过 `ttl` 后在后台刷新. \
+同一份数据的并发查询只会发出一次 RPC.
+
+群名片, 头衔, 管理员变更, 入群退群与好友增删的通知由 `KritorApp` 交给 `apply_notice` 增量更新, \
+定期刷新用于修正错过的通知 (如断线期间发生的变化).
+
+缓存中的实例与 `KritorApp.contacts` 共用, 消息事件中的发送者也能看到缓存中的群名片与权限.
+"""
+import asyncio
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from kritor.models.relationship import Friend, Group, Member, MemberPerm
+from kritor.protos.friend.friend_pb2 import GetFriendListRequest
+from kritor.protos.friend.friend_pb2_grpc import FriendServiceStub
+from kritor.protos.group.group_pb2 import (
+    GetGroupInfoRequest,
+    GetGroupListRequest,
+    GetGroupMemberInfoRequest,
+    GetGroupMemberListRequest,
+)
+from kritor.protos.group.group_pb2_grpc import GroupServiceStub
+
+if TYPE_CHECKING:
+    from kritor.app import KritorApp
+
+
+class ContactCache:
+    """账号的联系人信息缓存, 由 `KritorApp.contact_cache` 持有"""
+
+    ttl: float
+    """数据的有效期 (秒), 过期的数据在后台刷新, 刷新完成前仍使用旧数据"""
+
+    rpcs: int
+    """已发出的 RPC 数"""
+
+    def __init__(self, app: "KritorApp", ttl: float = 300.0, concurrency: int = 4) -> None:
+        """
+        Args:
+            app (KritorApp): 所属的账号
+            ttl (float, optional): 数据的有效期 (秒). 默认为 300.
+            concurrency (int, optional): 批量拉取与刷新时同时进行的 RPC 数. 默认为 4.
+        """
+        self.app = app
+        self.contacts = app.contacts
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.rpcs = 0
+        self._friend_ids: Optional[Set[int]] = None
+        self._group_ids: Optional[Set[int]] = None
+        self._member_ids: Dict[int, Set[int]] = {}
+        self._roles: Dict[int, Tuple[int, FrozenSet[int]]] = {}
+        """群号 -> (群主, 管理员)"""
+        self._loaded: Dict[Hashable, float] = {}
+        """数据键 -> 上次拉取的时间"""
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._refresher: Optional[asyncio.Task] = None
+        self._updaters: Set[asyncio.Task] = set()
+        """由通知触发的单项查询"""
+
+    # 读取
+
+    async def get_friends(self) -> List[Friend]:
+        """获取好友列表"""
+        await self._ensure(("friends",), self._load_friends)
+        return [self.contacts.friend(friend_id) for friend_id in self._friend_ids or ()]
+
+    async def get_friend(self, friend_id: int) -> Optional[Friend]:
+        """获取好友, 不是好友时返回 None"""
+        await self._ensure(("friends",), self._load_friends)
+        if self._friend_ids is None or friend_id not in self._friend_ids:
+            return None
+        return self.contacts.friend(friend_id)
+
+    async def get_groups(self) -> List[Group]:
+        """获取群组列表"""
+        await self._ensure(("groups",), self._load_groups)
+        return [self.contacts.group(group_id) for group_id in self._group_ids or ()]
+
+    async def get_group(self, group_id: int) -> Optional[Group]:
+        """获取群组, 列表中没有时单独查询一次, 不在群组中时返回 None"""
+        await self._ensure(("groups",), self._load_groups)
+        if self._group_ids is not None and group_id in self._group_ids:
+            return self.contacts.group(group_id)
+        return await self._single(("group", group_id), lambda: self._load_group(group_id))
+
+    async def get_members(self, group_id: int) -> List[Member]:
+        """获取群成员列表"""
+        await self._ensure(("members", group_id), self._member_loader(group_id))
+        return [self.contacts.member(group_id, member_id) for member_id in self._member_ids.get(group_id, ())]
+
+    async def get_member(self, group_id: int, member_id: int) -> Optional[Member]:
+        """获取群成员, 列表中没有时 (如刚刚入群) 单独查询一次, 不在群组中时返回 None"""
+        await self._ensure(("members", group_id), self._member_loader(group_id))
+        if member_id in self._member_ids.get(group_id, ()):
+            return self.contacts.member(group_id, member_id)
+        return await self._single(("member", group_id, member_id), lambda: self._load_member(group_id, member_id))
+
+    async def prefetch(self, members: bool = True) -> None:
+        """批量拉取好友与群组列表, 以及 (members 为 True 时) 所有群组的成员列表.
+
+        失败的列表只记录日志, 可以通过 `prefetched` 检查是否全部拉取成功.
+        """
+        await self._bounded(
+            (
+                self._ensure(("friends",), self._load_friends),
+                self._ensure(("groups",), self._load_groups),
+            )
+        )
+        if members:
+            await self._bounded(
+                self._ensure(("members", group_id), self._member_loader(group_id))
+                for group_id in list(self._group_ids or ())
+            )
+
+    # 拉取
+
+    async def _single(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """执行 load, 同一个键的并发调用共用一次执行"""
+        inflight = self._inflight.get(key)
+        while inflight is not None:
+            await asyncio.wait((inflight,))
+            if not inflight.cancelled():
+                return inflight.result()
+            inflight = self._inflight.get(key)
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def _ensure(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> None:
+        """数据没有拉取过时拉取一次"""
+        if key not in self._loaded:
+            await self._single(key, load)
+
+    async def _bounded(self, coroutines: Any) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(coroutine: Awaitable[Any]) -> None:
+            async with semaphore:
+                try:
+                    await coroutine
+                except Exception as e:
+                    logger.warning(f"Failed to load contacts: {e!r}")
+
+        await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
+    def _member_loader(self, group_id: int) -> Callable[[], Awaitable[None]]:
+        return lambda: self._load_members(group_id)
+
+    def _loader_of(self, key: Hashable) -> Callable[[], Awaitable[None]]:
+        if key == ("friends",):
+            return self._load_friends
+        if key == ("groups",):
+            return self._load_groups
+        return self._member_loader(key[1])  # type: ignore
+
+    def _mark(self, key: Hashable) -> None:
+        self._loaded[key] = asyncio.get_running_loop().time()
+
+    async def _load_friends(self) -> None:
+        self.rpcs += 1
+        async with self.app.channels.alease(FriendServiceStub) as stub:
+            response = await stub.GetFriendList(GetFriendListRequest(refresh=False))
+        friend_ids = set()
+        for info in response.friends_info:
+            self.contacts.friend(info.uin, nickname=info.nick, remark=info.remark)
+            friend_ids.add(info.uin)
+        self.contacts.retain_friends(friend_ids)
+        self._friend_ids = friend_ids
+        self._mark(("friends",))
+
+    async def _load_groups(self) -> None:
+        self.rpcs += 1
+        async with self.app.channels.alease(GroupServiceStub) as stub:
+            response = await stub.GetGroupList(GetGroupListRequest(refresh=False))
+        group_ids = set()
+        for info in response.groups_info:
+            self._apply_group_info(info)
+            group_ids.add(info.group_id)
+        for group_id in set(self._member_ids) - group_ids:
+            self._forget_group(group_id)
+        # 不在列表中的群组及其成员 (包括只在消息中出现过的) 一并移除
+        self.contacts.retain_groups(group_ids)
+        self._group_ids = group_ids
+        self._mark(("groups",))
+
+    async def _load_group(self, group_id: int) -> Optional[Group]:
+        self.rpcs += 1
+        async with self.app.channels.alease(GroupServiceStub) as stub:
+            response = await stub.GetGroupInfo(GetGroupInfoRequest(group_id=group_id))
+        if not response.HasField("group_info"):
+            return None
+        group = self._apply_group_info(response.group_info)
+        if self._group_ids is not None:
+            self._group_ids.add(group_id)
+        return group
+
+    async def _load_members(self, group_id: int) -> None:
+        self.rpcs += 1
+        async with self.app.channels.alease(GroupServiceStub) as stub:
+            response = await stub.GetGroupMemberList(GetGroupMemberListRequest(group_id=group_id, refresh=False))
+        member_ids = set()
+        for info in response.group_members_info:
+            self._apply_member_info(group_id, info)
+            member_ids.add(info.uin)
+        self.contacts.retain_members(group_id, member_ids)
+        self._member_ids[group_id] = member_ids
+        self._mark(("members", group_id))
+
+    async def _load_member(self, group_id: int, member_id: int) -> Optional[Member]:
+        self.rpcs += 1
+        async with self.app.channels.alease(GroupServiceStub) as stub:
+            response = await stub.GetGroupMemberInfo(
+                GetGroupMemberInfoRequest(group_id=group_id, target_uin=member_id, refresh=False)
+            )
+        if not response.HasField("group_member_info"):
+            return None
+        self._member_ids.setdefault(group_id, set()).add(member_id)
+        return self._apply_member_info(group_id, response.group_member_info)
+
+    def _apply_group_info(self, info: Any) -> Group:
+        self._roles[info.group_id] = (info.owner, frozenset(info.admins))
+        group = self.contacts.update_group_info(info)
+        account = self._account_id
+        if account is not None:
+            self.contacts.group(info.group_id, permission=self._role_of(info.group_id, account))
+        # 成员列表可能先于群信息拉取
+        for member_id in self._member_ids.get(info.group_id, ()):
+            self.contacts.member(info.group_id, member_id, permission=self._role_of(info.group_id, member_id))
+        return group
+
+    def _apply_member_info(self, group_id: int, info: Any) -> Member:
+        member = self.contacts.update_member_info(group_id, info)
+        if group_id in self._roles:
+            self.contacts.member(group_id, info.uin, permission=self._role_of(group_id, info.uin))
+        return member
+
+    def apply_notice(self, notice: Any) -> None:
+        """以 Kritor 通知 (`NoticeEvent`) 增量更新缓存.
+
+        新成员 (或 Bot 新加入的群组) 的信息在后台查询, 退群与删除好友立即从缓存中移除.
+
+        Args:
+            notice (NoticeEvent): Kritor 通知
+        """
+        account = self._account_id
+        self.contacts.apply_notice(notice, account)
+        kind = notice.WhichOneof("notice")
+        if kind == "group_admin_changed":
+            body = notice.group_admin_changed
+            self.set_admin(body.group_id, body.target_uin, body.is_admin)
+        elif kind == "group_member_increase":
+            body = notice.group_member_increase
+            group_id, member_id = body.group_id, body.target_uin
+            if member_id == account:
+                self._update(("group", group_id), lambda: self._load_group(group_id))
+            else:
+                self._update(("member", group_id, member_id), lambda: self._load_member(group_id, member_id))
+        elif kind == "group_member_decrease":
+            body = notice.group_member_decrease
+            if body.type == body.KICK_ME or body.target_uin == account:
+                self._forget_group(body.group_id)
+                if self._group_ids is not None:
+                    self._group_ids.discard(body.group_id)
+            else:
+                self._member_ids.get(body.group_id, set()).discard(body.target_uin)
+        elif kind == "friend_increase":
+            if self._friend_ids is not None:
+                self._friend_ids.add(notice.friend_increase.friend_uin)
+        elif kind == "friend_decrease":
+            if self._friend_ids is not None:
+                self._friend_ids.discard(notice.friend_decrease.friend_uin)
+
+    def _update(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> None:
+        async def run() -> None:
+            try:
+                await self._single(key, load)
+            except Exception as e:
+                logger.warning(f"Failed to load contacts: {e!r}")
+
+        task = asyncio.create_task(run())
+        self._updaters.add(task)
+        task.add_done_callback(self._updaters.discard)
+
+    def set_admin(self, group_id: int, member_id: int, is_admin: bool) -> Member:
+        """群成员被设置或取消管理员后更新缓存, 之后的刷新以 Kritor 返回的数据为准.
+
+        Args:
+            group_id (int): 群号
+            member_id (int): QQ 号
+            is_admin (bool): 是否为管理员
+
+        Returns:
+            Member: 更新后的群成员
+        """
+        if group_id in self._roles:
+            owner, admins = self._roles[group_id]
+            self._roles[group_id] = (owner, admins | {member_id} if is_admin else admins - {member_id})
+            permission = self._role_of(group_id, member_id)
+        else:
+            permission = MemberPerm.Administrator if is_admin else MemberPerm.Member
+        if member_id == self._account_id:
+            self.contacts.group(group_id, permission=permission)
+        return self.contacts.member(group_id, member_id, permission=permission)
+
+    def _role_of(self, group_id: int, member_id: int) -> MemberPerm:
+        owner, admins = self._roles[group_id]
+        if member_id == owner:
+            return MemberPerm.Owner
+        return MemberPerm.Administrator if member_id in admins else MemberPerm.Member
+
+    @property
+    def _account_id(self) -> Optional[int]:
+        try:
+            return int(self.app.account)
+        except (TypeError, ValueError):
+            return None
+
+    # 刷新
+
+    def start(self, prefetch: bool = True) -> None:
+        """启动后台任务: 批量拉取 (prefetch 为 True 时) 并定期刷新过期数据. 已经启动时不做任何事.
+
+        由 `KritorApp` 在账号连接 (完成认证) 后调用.
+        """
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._run(prefetch))
+
+    async def stop(self) -> None:
+        """停止后台任务"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+        for task in list(self._updaters):
+            task.cancel()
+        await asyncio.gather(*self._updaters, return_exceptions=True)
+
+    @property
+    def prefetched(self) -> bool:
+        """好友, 群组与所有群组的成员列表是否都已拉取"""
+        return (
+            ("friends",) in self._loaded
+            and ("groups",) in self._loaded
+            and all(("members", group_id) in self._loaded for group_id in self._group_ids or ())
+        )
+
+    async def _run(self, prefetch: bool) -> None:
+        attempt = 0
+        # 拉取失败的列表不会出现在 _loaded 中, 定期刷新不会重试它们, 这里按重连的退避策略重试直到全部成功
+        while prefetch and not self.prefetched:
+            try:
+                await self.prefetch()
+            except Exception as e:
+                logger.warning(f"Failed to prefetch contacts: {e!r}")
+            if self.prefetched:
+                break
+            await asyncio.sleep(self.app.reconnect_backoff.delay(attempt))
+            attempt += 1
+        while True:
+            await asyncio.sleep(max(self.ttl / 4, 1.0))
+            await self.refresh(stale_only=True)
+
+    async def refresh(self, stale_only: bool = False) -> None:
+        """重新拉取已缓存的列表.
+
+        Args:
+            stale_only (bool, optional): 是否只刷新超过有效期的列表. 默认为 False.
+        """
+        deadline = asyncio.get_running_loop().time() - self.ttl
+        keys = [key for key, loaded in self._loaded.items() if not stale_only or loaded <= deadline]
+        await self._bounded(self._single(key, self._loader_of(key)) for key in keys)
+
+    def _forget_group(self, group_id: int) -> None:
+        self.contacts.remove_group(group_id)
+        self._member_ids.pop(group_id, None)
+        self._roles.pop(group_id, None)
+        self._loaded.pop(("members", group_id), None)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "friends": len(self._friend_ids or ()),
+            "groups": len(self._group_ids or ()),
+            "members": sum(len(ids) for ids in self._member_ids.values()),
+            "rpcs": self.rpcs,
+            "inflight": len(self._inflight),
+        }
@@ -32,19 +32,20 @@ class ContextDispatcher(AbstractDispatcher):
 
     @staticmethod
     async def catch(interface: DispatcherInterface):
-        from .app import Ariadne
+        from .app import KritorApp
+        from .context import kritor_ctx
 
         if generic_isinstance(interface.event, interface.annotation):
             return interface.event
 
         if generic_issubclass(Broadcast, interface.annotation):
-            return Ariadne.service.broadcast
+            return interface.broadcast
 
         if generic_issubclass(asyncio.AbstractEventLoop, interface.annotation):
-            return Ariadne.service.loop
+            return asyncio.get_running_loop()
 
-        if generic_issubclass(Ariadne, interface.annotation):
-            return Ariadne.current()
+        if generic_issubclass(KritorApp, interface.annotation):
+            return kritor_ctx.get(None)
 
 class NoneDispatcher(AbstractDispatcher):
     """给 Optional[...] 提供 None 的 Dispatcher"""
@@ -0,0 +1,165 @@
+"""有界的事件接收队列"""
+import asyncio
+from collections import Counter, deque
+from enum import Enum
+from typing import Deque, Dict, Optional, Tuple, Type
+
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.event.lifecycle import ApplicationLifecycleEvent
+from kritor.event.message import MessageEvent
+from kritor.event.mirai import RequestEvent
+
+
+class OverflowPolicy(str, Enum):
+    """接收队列已满时的处理策略"""
+
+    Block = "block"
+    """阻塞写入方, 直到队列腾出空间 (对 grpc 流即为流量控制背压)"""
+
+    DropOldest = "drop_oldest"
+    """丢弃队列中最早的事件"""
+
+    DropNewest = "drop_newest"
+    """丢弃新到达的事件"""
+
+    DropByPriority = "drop_by_priority"
+    """丢弃优先级最低的事件, 同优先级时丢弃最早的事件"""
+
+
+DEFAULT_EVENT_PRIORITIES: Dict[Type[Dispatchable], int] = {
+    ApplicationLifecycleEvent: 0,
+    MessageEvent: 8,
+    RequestEvent: 8,
+}
+"""默认的事件优先级, 数值越小越重要, 未列出的事件为 16"""
+
+_QueueItem = Tuple[int, Dispatchable, Optional[Dispatchable]]
+
+
+class EventIntake:
+    """有界的异步事件接收队列, 在生产者 (事件流) 与 Broadcast 之间做缓冲与削峰."""
+
+    capacity: int
+    policy: OverflowPolicy
+
+    received: int
+    """写入过的事件总数"""
+
+    shed: "Counter[str]"
+    """按事件类名统计的被丢弃事件数"""
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        policy: OverflowPolicy = OverflowPolicy.Block,
+        priorities: Optional[Dict[Type[Dispatchable], int]] = None,
+        default_priority: int = 16,
+    ) -> None:
+        """
+        Args:
+            capacity (int, optional): 队列容量. 默认为 1024.
+            policy (OverflowPolicy, optional): 队列满时的处理策略. 默认为阻塞.
+            priorities (Dict[Type[Dispatchable], int], optional): 事件优先级, 按 MRO 匹配, \
+                仅在 `DropByPriority` 策略下使用. 默认为 `DEFAULT_EVENT_PRIORITIES`.
+            default_priority (int, optional): 未匹配到优先级的事件所用的优先级. 默认为 16.
+        """
+        if capacity < 1:
+            raise ValueError("EventIntake capacity must be at least 1.")
+        self.capacity = capacity
+        self.policy = OverflowPolicy(policy)
+        self.priorities = DEFAULT_EVENT_PRIORITIES if priorities is None else priorities
+        self.default_priority = default_priority
+
+        self.received = 0
+        self.shed = Counter()
+
+        self._items: Deque[_QueueItem] = deque()
+        self._priority_cache: Dict[type, int] = {}
+        # Python 3.9 及以下的 asyncio 原语在创建时绑定事件循环, 推迟到第一次使用时 (即在运行中的循环内) 创建
+        self._conditions: Optional[Tuple[asyncio.Condition, asyncio.Condition]] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def shed_total(self) -> int:
+        """被丢弃的事件总数"""
+        return sum(self.shed.values())
+
+    def priority_of(self, event_class: type) -> int:
+        """获取事件类的优先级"""
+        priority = self._priority_cache.get(event_class)
+        if priority is None:
+            priority = next(
+                (self.priorities[i] for i in event_class.__mro__ if i in self.priorities),
+                self.default_priority,
+            )
+            self._priority_cache[event_class] = priority
+        return priority
+
+    def _get_conditions(self) -> Tuple[asyncio.Condition, asyncio.Condition]:
+        """获取 (非空, 非满) 条件, 两者共用一把锁"""
+        if self._conditions is None:
+            lock = asyncio.Lock()
+            self._conditions = (asyncio.Condition(lock), asyncio.Condition(lock))
+        return self._conditions
+
+    def _shed(self, event: Dispatchable) -> None:
+        self.shed[event.__class__.__name__] += 1
+
+    def _make_room(self, priority: int, event: Dispatchable) -> bool:
+        """在队列已满且不阻塞时腾出空间, 返回新事件是否应当入队."""
+        if self.policy is OverflowPolicy.DropNewest:
+            self._shed(event)
+            return False
+        if self.policy is OverflowPolicy.DropOldest:
+            self._shed(self._items.popleft()[1])
+            return True
+        # DropByPriority: 仅在溢出时线性扫描一次
+        lowest = max(item[0] for item in self._items)
+        if priority >= lowest:
+            self._shed(event)
+            return False
+        for index, item in enumerate(self._items):
+            if item[0] == lowest:
+                del self._items[index]
+                self._shed(item[1])
+                break
+        return True
+
+    async def put(self, event: Dispatchable, upper_event: Optional[Dispatchable] = None) -> bool:
+        """写入一个事件.
+
+        Returns:
+            bool: 事件是否被接收 (未被丢弃).
+        """
+        priority = self.priority_of(event.__class__)
+        not_empty, not_full = self._get_conditions()
+        async with not_full:
+            self.received += 1
+            if len(self._items) >= self.capacity:
+                if self.policy is OverflowPolicy.Block:
+                    await not_full.wait_for(lambda: len(self._items) < self.capacity)
+                elif not self._make_room(priority, event):
+                    return False
+            self._items.append((priority, event, upper_event))
+            not_empty.notify()
+        return True
+
+    async def get(self) -> Tuple[Dispatchable, Optional[Dispatchable]]:
+        """取出最早的事件, 队列为空时等待."""
+        not_empty, not_full = self._get_conditions()
+        async with not_empty:
+            await not_empty.wait_for(lambda: self._items)
+            _, event, upper_event = self._items.popleft()
+            not_full.notify()
+        return event, upper_event
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """队列统计信息"""
+        return {
+            "queued": len(self._items),
+            "received": self.received,
+            "shed": self.shed_total,
+        }
@@ -0,0 +1,236 @@
+"""多媒体数据缓存.
+
+`MultimediaElement.get_bytes` 与 `MessageChain.download_binary` 通过这里获取数据. 缓存以元素的 md5 (没有时为 url) 为键, \
+分为内存 LRU 与可选的磁盘两层, 同一个键的并发请求只下载一次.
+"""
+import asyncio
+import hashlib
+import os
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional, Union
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from kritor.message.element import MultimediaElement
+
+Fetcher = Callable[[str], Awaitable[bytes]]
+"""下载函数, 接收 url 返回数据"""
+
+
+async def urllib_fetcher(url: str) -> bytes:
+    """默认的下载函数, 在线程池中使用 urllib 下载, 不需要额外依赖."""
+
+    def fetch() -> bytes:
+        with urllib.request.urlopen(url, timeout=30) as response:  # noqa: S310
+            return response.read()
+
+    return await asyncio.get_running_loop().run_in_executor(None, fetch)
+
+
+def media_key(element: "MultimediaElement") -> Optional[str]:
+    """获取元素的缓存键: 有 md5 等内容标识时使用它, 否则使用 url, 都没有时返回 None."""
+    if element.uuid:
+        return f"id:{element.uuid}"
+    if element.url:
+        return f"url:{element.url}"
+    return None
+
+
+class _DiskTier:
+    """以文件保存的缓存层, 按最近使用淘汰到总大小不超过上限"""
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._index: "Optional[OrderedDict[str, int]]" = None
+
+    def _load(self) -> "OrderedDict[str, int]":
+        if self._index is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for path in self.directory.iterdir():
+                if path.is_file() and not path.name.endswith(".tmp"):
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, path.name, stat.st_size))
+            self._index = OrderedDict((name, size) for _, name, size in sorted(entries))
+            self.size = sum(self._index.values())
+        return self._index
+
+    @staticmethod
+    def name_of(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        index = self._load()
+        name = self.name_of(key)
+        if name not in index:
+            return None
+        path = self.directory / name
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            self.size -= index.pop(name)
+            return None
+        index.move_to_end(name)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        index = self._load()
+        name = self.name_of(key)
+        path = self.directory / name
+        temp = path.with_name(f"{name}.{os.getpid()}.tmp")
+        temp.write_bytes(data)
+        os.replace(temp, path)
+        self.size += len(data) - index.pop(name, 0)
+        index[name] = len(data)
+        while self.size > self.max_bytes and index:
+            evicted, size = index.popitem(last=False)
+            self.size -= size
+            try:
+                (self.directory / evicted).unlink()
+            except OSError:
+                pass
+
+
+class MediaCache:
+    """多媒体数据的两层缓存, 同一个键的并发请求合并为一次下载."""
+
+    def __init__(
+        self,
+        memory_bytes: int = 64 * 1024 * 1024,
+        directory: Optional[Union[str, Path]] = None,
+        disk_bytes: int = 1024 * 1024 * 1024,
+        fetcher: Optional[Fetcher] = None,
+    ) -> None:
+        """
+        Args:
+            memory_bytes (int, optional): 内存层的总大小上限. 默认为 64 MiB.
+            directory (Union[str, Path], optional): 磁盘层的目录, 不提供时不使用磁盘层.
+            disk_bytes (int, optional): 磁盘层的总大小上限. 默认为 1 GiB.
+            fetcher (Fetcher, optional): 下载函数. 默认在线程池中使用 urllib.
+        """
+        self.memory_bytes = memory_bytes
+        self.fetcher: Fetcher = fetcher or urllib_fetcher
+        self.disk = _DiskTier(directory, disk_bytes) if directory is not None else None
+        self.memory_size = 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future[bytes]"] = {}
+        self.hits = {"memory": 0, "disk": 0, "shared": 0}
+        self.downloads = 0
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        self.memory_size += len(data) - len(self._memory.pop(key, b""))
+        self._memory[key] = data
+        while self.memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self.memory_size -= len(evicted)
+
+    async def get(self, key: str, url: Optional[str]) -> bytes:
+        """获取数据, 依次查找内存层, 磁盘层, 正在进行的下载, 最后下载 url.
+
+        Args:
+            key (str): 缓存键
+            url (str, optional): 下载地址
+
+        Returns:
+            bytes: 数据
+        """
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.hits["memory"] += 1
+            return data
+        inflight = self._inflight.get(key)
+        while inflight is not None:
+            # asyncio.wait 不会把本次等待的取消传给共享的下载
+            await asyncio.wait((inflight,))
+            if not inflight.cancelled():
+                self.hits["shared"] += 1
+                return inflight.result()
+            inflight = self._inflight.get(key)  # 发起下载的一方被取消, 重新发起
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            data = await self._load(key, url)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 没有其他等待者时避免 "exception was never retrieved"
+            raise
+        else:
+            future.set_result(data)
+            return data
+        finally:
+            del self._inflight[key]
+
+    async def _load(self, key: str, url: Optional[str]) -> bytes:
+        loop = asyncio.get_running_loop()
+        if self.disk is not None:
+            data = await loop.run_in_executor(None, self.disk.get, key)
+            if data is not None:
+                self.hits["disk"] += 1
+                self._remember(key, data)
+                return data
+        if not url:
+            raise ValueError(f"{key} is not cached and has no url.")
+        data = await self.fetcher(url)
+        self.downloads += 1
+        self._remember(key, data)
+        if self.disk is not None:
+            try:
+                await loop.run_in_executor(None, self.disk.put, key, data)
+            except OSError as e:
+                logger.warning(f"Failed to write media cache: {e}")
+        return data
+
+    async def fetch(self, element: "MultimediaElement") -> bytes:
+        """获取多媒体元素的数据.
+
+        Args:
+            element (MultimediaElement): 多媒体元素
+
+        Returns:
+            bytes: 数据
+        """
+        key = media_key(element)
+        if key is None:
+            raise ValueError("you should offer a url.")
+        return await self.get(key, element.url)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "memory_bytes": self.memory_size,
+            "memory_items": len(self._memory),
+            "disk_bytes": self.disk.size if self.disk is not None else 0,
+            "downloads": self.downloads,
+            "inflight": len(self._inflight),
+            **{f"{tier}_hits": count for tier, count in self.hits.items()},
+        }
+
+
+_media_cache: Optional[MediaCache] = None
+
+
+def get_media_cache() -> MediaCache:
+    """获取全局多媒体缓存, 未设置时创建一个只有内存层的缓存."""
+    global _media_cache
+    if _media_cache is None:
+        _media_cache = MediaCache()
+    return _media_cache
+
+
+def set_media_cache(cache: MediaCache) -> None:
+    """替换全局多媒体缓存, 例如启用磁盘层或使用自定义的下载函数."""
+    global _media_cache
+    _media_cache = cache
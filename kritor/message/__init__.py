@@ -45,3 +45,6 @@ class Quote(KritorBaseModel):
 
     def as_persistent_string(self) -> str:
         return ""
+
+    def __str__(self) -> str:
+        return ""
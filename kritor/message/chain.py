@@ -1,4 +1,5 @@
 """Ariadne 消息链的实现"""
+import asyncio
 import re
 from copy import deepcopy
 from typing import (
@@ -8,6 +9,7 @@ from typing import (
     Iterable,
     List,
     Literal,
+    Optional,
     Sequence,
     Tuple,
     Type,
@@ -18,7 +20,7 @@ from typing import (
 from typing_extensions import Self
 
 from graia.amnesia.message import MessageChain as BaseMessageChain
-from pydantic import RootModel
+from pydantic import RootModel, SerializerFunctionWrapHandler, model_serializer
 
 from ..models.base import KritorBaseModel
 from ..utils import gen_subclass
@@ -36,6 +38,7 @@ from .element import (
 )
 
 if TYPE_CHECKING:
+    from ..media import MediaCache
     from ..typing import ReprArgs
 
 
@@ -134,6 +137,11 @@ class MessageChain(BaseMessageChain, KritorBaseModel):
             KritorBaseModel.__init__(self)
             self.content = __root__  # type: ignore
 
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler: SerializerFunctionWrapHandler) -> Dict[str, Any]:
+        self.content  # noqa: B018  子类 (如 LazyMessageChain) 在首次访问时才生成 content
+        return handler(self)
+
     def __repr_args__(self) -> "ReprArgs":
         return [(None, list(self.content))]
 
@@ -254,11 +262,23 @@ class MessageChain(BaseMessageChain, KritorBaseModel):
                     string_list.append(i.as_persistent_string(binary=binary))
         return "".join(string_list)
 
-    async def download_binary(self) -> Self:
-        """下载消息中所有的二进制数据并保存在元素实例内"""
-        for elem in self.content:
-            if isinstance(elem, MultimediaElement):
-                await elem.get_bytes()
+    async def download_binary(self, limit: int = 8, cache: Optional["MediaCache"] = None) -> Self:
+        """并发下载消息中所有的二进制数据并保存在元素实例内
+
+        Args:
+            limit (int, optional): 同时进行的下载数. 默认为 8.
+            cache (MediaCache, optional): 使用的多媒体缓存. 默认为全局缓存.
+        """
+        elements = [elem for elem in self.content if isinstance(elem, MultimediaElement) and elem.binary is None]
+        if not elements:
+            return self
+        semaphore = asyncio.Semaphore(limit)
+
+        async def download(elem: MultimediaElement) -> None:
+            async with semaphore:
+                await elem.get_bytes(cache)
+
+        await asyncio.gather(*(download(elem) for elem in elements))
         return self
 
     @classmethod
@@ -474,3 +494,9 @@ class MessageChain(BaseMessageChain, KritorBaseModel):
     def __hash__(self) -> int:
         return id(self)
 
+
+
+from .element import Forward, ForwardNode  # noqa: E402
+
+ForwardNode.model_rebuild(_types_namespace={"MessageChain": MessageChain})
+Forward.model_rebuild()
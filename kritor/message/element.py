@@ -4,10 +4,12 @@ from datetime import datetime
 from enum import Enum
 from io import BytesIO
 from json import dumps as j_dump
+from mmap import mmap
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Union, overload
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Union, overload
 from typing_extensions import Self
 
+from pydantic import PrivateAttr, computed_field
 from pydantic.fields import Field
 
 from graia.amnesia.message import Element as BaseElement
@@ -21,6 +23,7 @@ from . import Source as Source  # noqa: F401
 
 if TYPE_CHECKING:
     from ..event.message import MessageEvent
+    from ..media import MediaCache
     from ..typing import ReprArgs
     from .chain import MessageChain
 
@@ -134,6 +137,9 @@ class At(Element):
     representation: Optional[str] = Field(None, alias="display")
     """显示名称"""
 
+    uid: Optional[str] = None
+    """At 的目标 uid"""
+
     def __init__(self, target: Union[int, Member] = ..., **data) -> None:
         """实例化一个 At 消息元素, 用于承载消息中用于提醒/呼唤特定用户的部分.
 
@@ -177,6 +183,12 @@ class Face(Element):
     name: Optional[str] = None
     """QQ 表情名称"""
 
+    is_big: bool = False
+    """是否为大表情"""
+
+    result: Optional[int] = None
+    """随机表情 (如骰子, 猜拳) 的结果"""
+
     def __init__(self, id: int = ..., name: str = ..., **data) -> None:
         """
         Args:
@@ -196,13 +208,28 @@ class Face(Element):
         return isinstance(other, Face) and (self.face_id == other.face_id or self.name == other.name)
 
 
+class BubbleFace(Element):
+    """表示消息中的弹射表情"""
+
+    type: str = "BubbleFace"
+
+    face_id: int = Field(alias="id")
+    """QQ 表情编号"""
+
+    count: int = 1
+    """表情数量"""
+
+    def __str__(self) -> str:
+        return f"[弹射表情: {self.face_id}x{self.count}]"
+
+
 @internal_cls()
 class MarketFace(Element):
     """表示消息中的商城表情."""
 
     type: str = "MarketFace"
 
-    face_id: Optional[int] = Field(None, alias="id")
+    face_id: Optional[Union[int, str]] = Field(None, alias="id")
     """QQ 表情编号"""
 
     name: Optional[str] = None
@@ -326,11 +353,28 @@ class Poke(Element):
 
     type: str = "Poke"
 
-    name: PokeMethods
+    name: PokeMethods = PokeMethods.Unknown
     """戳一戳使用的方法"""
 
-    def __init__(self, name: PokeMethods, *_, **__) -> None:
-        super().__init__(name=name)
+    poke_id: Optional[int] = None
+    """戳一戳编号"""
+
+    poke_type: Optional[int] = None
+    """戳一戳类型"""
+
+    strength: Optional[int] = None
+    """戳一戳强度"""
+
+    def __init__(
+        self,
+        name: PokeMethods = PokeMethods.Unknown,
+        *_,
+        poke_id: Optional[int] = None,
+        poke_type: Optional[int] = None,
+        strength: Optional[int] = None,
+        **__,
+    ) -> None:
+        super().__init__(name=name, poke_id=poke_id, poke_type=poke_type, strength=strength)
 
     def __str__(self) -> str:
         return f"[戳一戳:{self.name}]"
@@ -351,6 +395,36 @@ class Dice(Element):
         return f"[骰子:{self.value}]"
 
 
+class Basketball(Element):
+    """表示消息中投篮消息元素"""
+
+    type: str = "Basketball"
+
+    value: int
+    """投篮结果"""
+
+    def __init__(self, value: int, *_, **__) -> None:
+        super().__init__(value=value)
+
+    def __str__(self) -> str:
+        return f"[投篮:{self.value}]"
+
+
+class Rps(Element):
+    """表示消息中猜拳消息元素"""
+
+    type: str = "Rps"
+
+    value: int
+    """猜拳结果"""
+
+    def __init__(self, value: int, *_, **__) -> None:
+        super().__init__(value=value)
+
+    def __str__(self) -> str:
+        return f"[猜拳:{self.value}]"
+
+
 class MusicShareKind(str, Enum):
     """音乐分享的来源。"""
 
@@ -369,6 +443,9 @@ class MusicShareKind(str, Enum):
     KuwoMusic = "KuwoMusic"
     """酷我音乐"""
 
+    Custom = "Custom"
+    """自定义音乐"""
+
 
 class MusicShare(Element):
     """表示消息中音乐分享消息元素"""
@@ -396,6 +473,9 @@ class MusicShare(Element):
     brief: Optional[str]
     """音乐简介"""
 
+    music_id: Optional[str] = None
+    """音乐平台上的歌曲 ID, 设置时由 Kritor 端生成分享卡片"""
+
     def __init__(
         self,
         kind: MusicShareKind,
@@ -406,6 +486,7 @@ class MusicShare(Element):
         musicUrl: Optional[str] = None,
         brief: Optional[str] = None,
         *_,
+        music_id: Optional[str] = None,
         **__,
     ) -> None:
         super().__init__(
@@ -416,12 +497,130 @@ class MusicShare(Element):
             pictureUrl=pictureUrl,
             musicUrl=musicUrl,
             brief=brief,
+            music_id=music_id,
         )
 
     def __str__(self) -> str:
         return f"[音乐分享:{self.title}, {self.brief}]"
 
 
+class Weather(Element):
+    """表示消息中的天气分享消息元素"""
+
+    type: str = "Weather"
+
+    city: str
+    """城市名"""
+
+    code: str
+    """城市代码"""
+
+    def __str__(self) -> str:
+        return f"[天气:{self.city}]"
+
+
+class Location(Element):
+    """表示消息中的位置分享消息元素"""
+
+    type: str = "Location"
+
+    lat: float
+    """纬度"""
+
+    lon: float
+    """经度"""
+
+    title: str = ""
+    """标题"""
+
+    address: str = ""
+    """地址"""
+
+    def __str__(self) -> str:
+        return f"[位置:{self.title or self.address}]"
+
+
+class Share(Element):
+    """表示消息中的链接分享消息元素"""
+
+    type: str = "Share"
+
+    url: str
+    """链接"""
+
+    title: str = ""
+    """标题"""
+
+    content: str = ""
+    """摘要"""
+
+    image: str = ""
+    """预览图链接"""
+
+    def __str__(self) -> str:
+        return f"[分享:{self.title}]"
+
+
+class Gift(Element):
+    """表示消息中的礼物消息元素"""
+
+    type: str = "Gift"
+
+    target: int
+    """礼物接收者 QQ 号"""
+
+    gift_id: int
+    """礼物编号"""
+
+    def __str__(self) -> str:
+        return f"[礼物:{self.gift_id}]"
+
+
+class ContactShare(Element):
+    """表示消息中的联系人 (好友或群) 推荐消息元素"""
+
+    type: str = "ContactShare"
+
+    scene: int
+    """联系人场景, 即 Kritor 的 Scene"""
+
+    peer: str
+    """联系人 ID"""
+
+    def __str__(self) -> str:
+        return f"[推荐联系人:{self.peer}]"
+
+
+class Markdown(Element):
+    """表示消息中的 Markdown 消息元素"""
+
+    type: str = "Markdown"
+
+    markdown: str
+    """Markdown 文本"""
+
+    def __init__(self, markdown: str, **_) -> None:
+        super().__init__(markdown=markdown)
+
+    def __str__(self) -> str:
+        return "[Markdown消息]"
+
+
+class Keyboard(Element):
+    """表示消息中的按钮键盘消息元素"""
+
+    type: str = "Keyboard"
+
+    rows: List[List[Dict[str, Any]]] = Field(default_factory=list)
+    """按钮行, 每个按钮为 Kritor Button 的字典形式"""
+
+    bot_appid: int = 0
+    """机器人 AppID"""
+
+    def __str__(self) -> str:
+        return "[按钮]"
+
+
 class ForwardNode(KritorBaseModel):
     """表示合并转发中的一个节点"""
 
@@ -518,6 +717,12 @@ class Forward(Element):
     display_strategy: Optional[DisplayStrategy] = Field(None, alias="display")
     """预览策略"""
 
+    res_id: Optional[str] = None
+    """已上传到服务器的合并转发 ID"""
+
+    uniseq: Optional[str] = None
+    """合并转发的序列号"""
+
     def __init__(
         self,
         *nodes: Union[Iterable[ForwardNode], ForwardNode, "MessageEvent"],
@@ -531,7 +736,7 @@ class Forward(Element):
             display (DisplayStrategy, optional): 预览策略
         """
         from ..event.message import MessageEvent
-        from ..model.relationship import Client
+        from ..models.relationship import Client
 
         if nodes:
             node_list: List[ForwardNode] = []
@@ -551,6 +756,8 @@ class Forward(Element):
         super().__init__(**data)
 
     def __str__(self) -> str:
+        if self.res_id and not self.node_list:
+            return "[合并转发]"
         return f"[合并转发:共{len(self.node_list)}条]"
 
     def as_persistent_string(self) -> str:
@@ -590,6 +797,18 @@ class File(Element):
     size: int
     """文件大小"""
 
+    url: Optional[str] = None
+    """文件下载链接"""
+
+    expire_time: Optional[int] = None
+    """过期时间"""
+
+    biz: Optional[int] = None
+    """业务类型"""
+
+    sub_id: Optional[str] = None
+    """文件子 ID"""
+
     def __str__(self) -> str:
         return f"[文件:{self.name}]"
 
@@ -611,8 +830,37 @@ class ImageType(Enum):
     Unknown = "Unknown"
     """未知消息"""
 
+BinaryData = Union[bytes, bytearray, memoryview, mmap, BytesIO]
+"""可以作为多媒体元素数据的对象"""
+
+
+class _Payload:
+    """多媒体元素持有的二进制数据或文件引用. 复制元素 (如 deepcopy 消息链) 时共享而不复制数据."""
+
+    __slots__ = ("buffer", "path")
+
+    def __init__(
+        self, buffer: Union[None, bytes, bytearray, memoryview, mmap] = None, path: Optional[Path] = None
+    ) -> None:
+        self.buffer = buffer
+        self.path = path
+
+    def read(self) -> Union[bytes, bytearray, memoryview, mmap]:
+        # 文件引用不缓存内容, 元素存活期间不占用内存
+        return self.buffer if self.buffer is not None else self.path.read_bytes()  # type: ignore
+
+    def __copy__(self) -> "_Payload":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "_Payload":
+        return self
+
+
 class MultimediaElement(Element):
-    """指示多媒体消息元素."""
+    """指示多媒体消息元素.
+
+    二进制数据以原始字节 (或文件引用) 保存, 只在访问 `base64` (如生成持久化字符串) 时编码.
+    """
 
     id: Optional[str]
     """元素 ID"""
@@ -620,8 +868,7 @@ class MultimediaElement(Element):
     url: Optional[str] = None
     """元素的下载 url"""
 
-    base64: Optional[str] = None
-    """元素的 base64"""
+    _payload: Optional[_Payload] = PrivateAttr(None)
 
     def __init__(
         self,
@@ -630,14 +877,16 @@ class MultimediaElement(Element):
         *,
         path: Optional[Union[Path, str]] = None,
         base64: Optional[str] = None,
-        data_bytes: Union[None, bytes, BytesIO] = None,
+        data_bytes: Optional[BinaryData] = None,
         **kwargs,
     ) -> None:
         """
         id (str, optional): 元素 ID
         url (str, optional): 元素的下载 url
-        path (Union[Path, str], optional): 文件路径
-        data_bytes (Union[None, BytesIO, bytes], optional): 元素的字节数据
+        path (Union[Path, str], optional): 文件路径, 只保存引用, 需要数据时才读取
+        base64 (str, optional): 元素的 base64, 会被解码为原始字节保存
+        data_bytes (BinaryData, optional): 元素的字节数据. bytes / bytearray / memoryview / mmap 直接引用而不复制, \
+            BytesIO 读取其当前位置之后的内容.
         """
         data = {"id": value for key, value in kwargs.items() if key.lower().endswith("id")}
 
@@ -647,42 +896,58 @@ class MultimediaElement(Element):
         data["id"] = data.get("id", id)
         data["url"] = url
         # Binary initializer
+        payload = None
         if path:
             if isinstance(path, str):
                 path = Path(path)
             if not path.exists():
                 raise FileNotFoundError(f"{path} is not exist!")
-            data["base64"] = b64encode(path.read_bytes())
+            payload = _Payload(path=path)
         elif base64:
-            data["base64"] = base64
+            payload = _Payload(b64decode(base64))
         elif data_bytes:
-            if isinstance(data_bytes, bytes):
-                data["base64"] = b64encode(data_bytes)
-            if isinstance(data_bytes, BytesIO):
-                data["base64"] = b64encode(data_bytes.read())
+            payload = _Payload(data_bytes.read() if isinstance(data_bytes, BytesIO) else data_bytes)
         super().__init__(**data, **kwargs)
+        self._payload = payload
+
+    @computed_field  # type: ignore[misc]
+    @property
+    def base64(self) -> Optional[str]:
+        """元素的 base64, 每次访问时由二进制数据编码得到"""
+        binary = self.binary
+        return None if binary is None else b64encode(binary).decode("ascii")
 
-    async def get_bytes(self) -> bytes:
+    @base64.setter
+    def base64(self, value: Optional[str]) -> None:
+        self._payload = _Payload(b64decode(value)) if value else None
+
+    @property
+    def binary(self) -> Union[None, bytes, bytearray, memoryview, mmap]:
+        """元素的二进制数据, 不复制. 没有二进制数据时为 None, 只有文件引用时读取文件."""
+        return None if self._payload is None else self._payload.read()
+
+    async def get_bytes(self, cache: Optional["MediaCache"] = None) -> bytes:
         """尝试获取消息元素的 bytes, 注意, 你无法获取并不包含 url 且不包含 base64 属性的本元素的 bytes.
 
+        没有二进制数据时通过多媒体缓存获取: 相同 md5 (或 url) 的数据只下载一次, 并发的请求共用同一次下载.
+
+        Args:
+            cache (MediaCache, optional): 使用的多媒体缓存. 默认为 `kritor.media.get_media_cache()`.
+
         Raises:
             ValueError: 你尝试获取并不包含 url 属性的本元素的 bytes.
 
         Returns:
             bytes: 元素原始数据
         """
-        from ..app import Ariadne
-
-        if self.base64:
-            return b64decode(self.base64)
-        if not self.url:
-            raise ValueError("you should offer a url.")
-        session = Ariadne.launch_manager.get_interface(AiohttpClientInterface).service.session
-        async with session.get(self.url) as response:
-            response.raise_for_status()
-            data = await response.read()
-            self.base64 = b64encode(data).decode("ascii")
-            return data
+        from ..media import get_media_cache
+
+        binary = self.binary
+        if binary is not None:
+            return binary if isinstance(binary, bytes) else bytes(binary)
+        data = await (cache or get_media_cache()).fetch(self)
+        self._payload = _Payload(data)
+        return data
 
     def as_persistent_string(self, binary: bool = True) -> str:
         if binary:
@@ -711,7 +976,8 @@ class MultimediaElement(Element):
             return True
         if self.url and self.url == other.url:
             return True
-        return self.base64 and self.base64 == other.base64
+        binary, other_binary = self.binary, other.binary
+        return binary is not None and other_binary is not None and memoryview(binary) == memoryview(other_binary)
 
 
 class Image(MultimediaElement):
@@ -728,7 +994,7 @@ class Image(MultimediaElement):
         *,
         path: Optional[Union[Path, str]] = None,
         base64: Optional[str] = None,
-        data_bytes: Union[None, bytes, BytesIO] = None,
+        data_bytes: Optional[BinaryData] = None,
         **kwargs,
     ) -> None:
         super().__init__(id=id, url=url, path=path, base64=base64, data_bytes=data_bytes, **kwargs)
@@ -766,7 +1032,7 @@ class FlashImage(Image):
         *,
         path: Optional[Union[Path, str]] = None,
         base64: Optional[str] = None,
-        data_bytes: Union[None, bytes, BytesIO] = None,
+        data_bytes: Optional[BinaryData] = None,
         **kwargs,
     ) -> None:
         super().__init__(id=id, url=url, path=path, base64=base64, data_bytes=data_bytes, **kwargs)
@@ -806,12 +1072,12 @@ class Voice(MultimediaElement):
         *,
         path: Optional[Union[Path, str]] = None,
         base64: Optional[str] = None,
-        data_bytes: Union[None, bytes, BytesIO] = None,
+        data_bytes: Optional[BinaryData] = None,
         **kwargs,
     ) -> None:
         super().__init__(id=id, url=url, path=path, base64=base64, data_bytes=data_bytes, **kwargs)
 
-    length: Optional[int]
+    length: Optional[int] = None
     """语音长度"""
 
     def __str__(self) -> str:
@@ -832,12 +1098,12 @@ class Video(MultimediaElement):
         *,
         path: Optional[Union[Path, str]] = None,
         base64: Optional[str] = None,
-        data_bytes: Union[None, bytes, BytesIO] = None,
+        data_bytes: Optional[BinaryData] = None,
         **kwargs,
     ) -> None:
         super().__init__(id=id, url=url, path=path, base64=base64, data_bytes=data_bytes, **kwargs)
 
-    length: Optional[int]
+    length: Optional[int] = None
     """视频长度"""
 
     def __str__(self) -> str:
@@ -12,6 +12,7 @@ IncEx: TypeAlias = 'set[int] | set[str] | dict[int, Any] | dict[str, Any] | None
 class KritorBaseModel(BaseModel):
     model_config = SettingsConfigDict(
         extra = 'allow',
+        populate_by_name = True,
         arbitrary_types_allowed = True,
         json_encoders = {
             datetime: lambda dt: int(dt.timestamp()),
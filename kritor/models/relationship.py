@@ -66,19 +66,19 @@ class Group(KritorBaseModel):
         Returns:
             Config: 该群组的设置对象.
         """
-        from ..app import Ariadne
+        from ..app import KritorApp
 
-        return await Ariadne.current().get_group_config(self)
+        return await KritorApp.current().get_group_config(self)
 
     async def modify_config(self, config: "GroupConfig") -> None:
         """修改该群组的 Config
 
         Args:
-            config (GroupConfig): 经过修改后的群设置对象.
+            config (GroupConfig): 经过修改后的群设置对象, 目前只有群名会被修改.
         """
-        from ..app import Ariadne
+        from ..app import KritorApp
 
-        return await Ariadne.current().modify_group_config(self, config)
+        return await KritorApp.current().modify_group_config(self, config)
 
     async def get_avatar(self, cover: Optional[int] = None) -> bytes:
         """获取该群组的头像
@@ -88,13 +88,10 @@ class Group(KritorBaseModel):
         Returns:
             bytes: 群头像的二进制内容.
         """
-        from ..app import Ariadne
+        from ..media import urllib_fetcher
 
         cover = (cover or 0) + 1
-        rider = await Ariadne.service.http_interface.request(
-            "GET", f"http://p.qlogo.cn/gh/{self.id}/{self.id}_{cover}/"
-        )
-        return await rider.io().read()
+        return await urllib_fetcher(f"http://p.qlogo.cn/gh/{self.id}/{self.id}_{cover}/")
 
 
 class Member(KritorBaseModel):
@@ -139,9 +136,9 @@ class Member(KritorBaseModel):
         Returns:
             Profile: 该群成员的 Profile 对象
         """
-        from ..app import Ariadne
+        from ..app import KritorApp
 
-        return await Ariadne.current().get_member_profile(self)
+        return await KritorApp.current().get_member_profile(self)
 
     async def get_info(self) -> "MemberInfo":
         """获取该成员的可修改状态
@@ -161,9 +158,9 @@ class Member(KritorBaseModel):
         Returns:
             None: 没有返回.
         """
-        from ..app import Ariadne
+        from ..app import KritorApp
 
-        return await Ariadne.current().modify_member_info(self, info)
+        return await KritorApp.current().modify_member_info(self, info)
 
     async def modify_admin(self, assign: bool) -> None:
         """
@@ -175,9 +172,9 @@ class Member(KritorBaseModel):
         Returns:
             None: 没有返回.
         """
-        from ..app import Ariadne
+        from ..app import KritorApp
 
-        return await Ariadne.current().modify_member_admin(assign, self)
+        return await KritorApp.current().modify_member_admin(assign, self)
 
     async def get_avatar(self, size: Literal[640, 140] = 640) -> bytes:
         """获取该群成员的头像
@@ -188,12 +185,9 @@ class Member(KritorBaseModel):
         Returns:
             bytes: 群成员头像的二进制内容.
         """
-        from ..app import Ariadne
+        from ..media import urllib_fetcher
 
-        async with Ariadne.service.client_session.get(
-            f"https://q2.qlogo.cn/headimg_dl?dst_uin={self.id}&spec={size}"
-        ) as resp:
-            return await resp.read()
+        return await urllib_fetcher(f"https://q2.qlogo.cn/headimg_dl?dst_uin={self.id}&spec={size}")
 
 
 class Friend(KritorBaseModel):
@@ -225,9 +219,9 @@ class Friend(KritorBaseModel):
         Returns:
             Profile: 该好友的 Profile 对象
         """
-        from ..app import Ariadne
+        from ..app import KritorApp
 
-        return await Ariadne.current().get_friend_profile(self)
+        return await KritorApp.current().get_friend_profile(self)
 
     async def get_avatar(self, size: Literal[640, 140] = 640) -> bytes:
         """获取该好友的头像
@@ -238,12 +232,9 @@ class Friend(KritorBaseModel):
         Returns:
             bytes: 好友头像的二进制内容.
         """
-        from ..app import Ariadne
+        from ..media import urllib_fetcher
 
-        async with Ariadne.service.client_session.get(
-            f"https://q2.qlogo.cn/headimg_dl?dst_uin={self.id}&spec={size}"
-        ) as resp:
-            return await resp.read()
+        return await urllib_fetcher(f"https://q2.qlogo.cn/headimg_dl?dst_uin={self.id}&spec={size}")
 
 
 class Stranger(KritorBaseModel):
@@ -278,12 +269,9 @@ class Stranger(KritorBaseModel):
         Returns:
             bytes: 陌生人头像的二进制内容.
         """
-        from ..app import Ariadne
+        from ..media import urllib_fetcher
 
-        async with Ariadne.service.client_session.get(
-            f"https://q2.qlogo.cn/headimg_dl?dst_uin={self.id}&spec={size}"
-        ) as resp:
-            return await resp.read()
+        return await urllib_fetcher(f"https://q2.qlogo.cn/headimg_dl?dst_uin={self.id}&spec={size}")
 
 
 class GroupConfig(KritorBaseModel):
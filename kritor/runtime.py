@@ -0,0 +1,140 @@
+"""在同一事件循环中运行多个账号"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from kritor.app import KritorApp
+from kritor.broadcast import Broadcast
+from kritor.connection.channel import ChannelPool, ChannelStrategy
+
+
+class KritorRuntime:
+    """多账号运行时.
+
+    所有账号共享同一个 `Broadcast` 与按地址共享的 gRPC 连接池, 监听器可通过 \
+    `KritorApp` 类型注解或 `KritorApp.current()` 获取产生事件的账号.
+    """
+
+    apps: Dict[str, KritorApp]
+    """以账号为键的 KritorApp"""
+
+    def __init__(
+        self,
+        broadcast: Optional[Broadcast] = None,
+        max_in_flight: Optional[int] = 1024,
+        channel_pool_size: int = 1,
+        channel_strategy: ChannelStrategy = "round_robin",
+    ) -> None:
+        """
+        Args:
+            broadcast (Broadcast, optional): 共享的事件系统. 默认新建一个.
+            max_in_flight (int, optional): 新建事件系统时, 所有账号合计的最大并发监听器任务数. 默认为 1024.
+            channel_pool_size (int, optional): 每个地址的 gRPC 连接数. 默认为 1.
+            channel_strategy (ChannelStrategy, optional): 连接池的选取策略. 默认为轮询.
+        """
+        self.broadcast = broadcast or Broadcast(max_in_flight=max_in_flight)
+        self.channel_pool_size = channel_pool_size
+        self.channel_strategy: ChannelStrategy = channel_strategy
+        self.apps = {}
+        self._pools: Dict[str, ChannelPool] = {}
+
+    def channel_pool(self, target: str) -> ChannelPool:
+        """获取 (或创建) 指向某一地址的共享连接池.
+
+        Args:
+            target (str): gRPC 地址, 形如 `host:port`
+
+        Returns:
+            ChannelPool: 连接池
+        """
+        pool = self._pools.get(target)
+        if pool is None:
+            pool = self._pools[target] = ChannelPool(
+                target, size=self.channel_pool_size, strategy=self.channel_strategy
+            )
+        return pool
+
+    def create_app(self, account: str, ticket: str, host: str, port: int, **kwargs: Any) -> KritorApp:
+        """创建一个共享事件系统与连接池的账号并加入运行时.
+
+        Args:
+            account (str): 账号
+            ticket (str): 凭证
+            host (str): Kritor 服务端地址
+            port (int): Kritor 服务端端口
+            **kwargs: 传递给 `KritorApp` 的其他参数
+
+        Returns:
+            KritorApp: 账号实例
+        """
+        app = KritorApp(
+            account,
+            ticket,
+            host,
+            port,
+            broadcast=self.broadcast,
+            channels=self.channel_pool(f"{host}:{port}"),
+            **kwargs,
+        )
+        return self.add_app(app)
+
+    def add_app(self, app: KritorApp) -> KritorApp:
+        """将已创建的账号加入运行时, 该账号须使用本运行时的事件系统.
+
+        Args:
+            app (KritorApp): 账号实例
+
+        Returns:
+            KritorApp: 传入的账号实例
+        """
+        if app.broadcast is not self.broadcast:
+            raise ValueError(f"Account {app.account} does not share the runtime broadcast.")
+        if app.account in self.apps:
+            raise ValueError(f"Account {app.account} is already in the runtime.")
+        self.apps[app.account] = app
+        return app
+
+    def get_app(self, account: str) -> KritorApp:
+        """按账号获取 KritorApp.
+
+        Args:
+            account (str): 账号
+
+        Returns:
+            KritorApp: 账号实例
+        """
+        return self.apps[str(account)]
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """以账号为键的运行统计信息"""
+        return {account: app.stats for account, app in self.apps.items()}
+
+    def close(self) -> None:
+        for app in self.apps.values():
+            app.close()
+
+    async def arun(self) -> None:
+        """运行所有账号, 直到全部账号退出."""
+        apps: List[KritorApp] = list(self.apps.values())
+        logger.info(f"Starting runtime with {len(apps)} account(s)")
+        try:
+            results = await asyncio.gather(
+                *(app.arun(app.server_host, app.server_port) for app in apps), return_exceptions=True
+            )
+            for app, result in zip(apps, results):
+                if isinstance(result, BaseException) and not isinstance(result, asyncio.CancelledError):
+                    logger.opt(exception=result).error(f"Account {app.account} exited with an error")
+        finally:
+            for pool in self._pools.values():
+                await pool.aclose()
+
+    def launch_blocking(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.arun())
+        except (KeyboardInterrupt, SystemExit):
+            self.close()
+        finally:
+            loop.close()
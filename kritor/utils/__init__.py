@@ -40,7 +40,7 @@ def gen_subclass(cls: Type[T]) -> Generator[Type[T], None, None]:
         yield from gen_subclass(sub_cls)
 
 _T_cls = TypeVar("_T_cls", bound=type)
-__SAFE_MODULES__: List[str] = ["graia", "launart", "statv", "pydantic", "aiohttp", "avilla"]
+__SAFE_MODULES__: List[str] = ["kritor", "graia", "launart", "statv", "pydantic", "aiohttp", "avilla"]
 def internal_cls(alt: Optional[Callable] = None) -> Callable[[_T_cls], _T_cls]:
     """将一个类型包装为内部类, 可通过 __SAFE_MODULES__ 定制."""
     if alt:
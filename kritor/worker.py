@@ -0,0 +1,304 @@
+"""按会话分片的多进程事件处理"""
+import asyncio
+import multiprocessing
+import pickle
+import queue
+import time
+import zlib
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Optional, Set, Type
+
+from loguru import logger
+
+from kritor.broadcast.entities.event import Dispatchable, event_registry
+from kritor.protos.event.event_pb2 import EventStructure, EventType
+
+if TYPE_CHECKING:
+    from kritor.app import KritorApp
+
+WorkerSetup = Callable[["KritorApp"], Any]
+"""在每个工作进程中调用的初始化函数, 用于向该进程的 Broadcast 注册监听器. 须可被 pickle (即模块级函数)."""
+
+
+def conversation_key(event: EventStructure) -> bytes:
+    """获取事件所属会话的分片键, 同一会话的事件总是落在同一个工作进程.
+
+    消息事件以 (场景, 对端) 为键, 其余事件以事件类型为键.
+
+    Args:
+        event (EventStructure): Kritor 事件
+
+    Returns:
+        bytes: 分片键
+    """
+    if event.type == EventType.EVENT_TYPE_MESSAGE:
+        contact = event.message.contact
+        return f"{contact.scene}:{contact.peer}".encode()
+    return f"type:{event.type}".encode()
+
+
+def shard_of(event: EventStructure, shards: int) -> int:
+    """计算事件应当交给的工作进程序号"""
+    return zlib.crc32(conversation_key(event)) % shards
+
+
+def _worker_main(
+    index: int,
+    account: str,
+    ticket: str,
+    host: str,
+    port: int,
+    setup: Optional[WorkerSetup],
+    inbox: "multiprocessing.Queue[Optional[bytes]]",
+    updates: "multiprocessing.Queue[Any]",
+    backlog: int,
+) -> None:
+    asyncio.run(_worker_loop(index, account, ticket, host, port, setup, inbox, updates, backlog))
+
+
+async def _worker_loop(
+    index: int,
+    account: str,
+    ticket: str,
+    host: str,
+    port: int,
+    setup: Optional[WorkerSetup],
+    inbox: "multiprocessing.Queue[Optional[bytes]]",
+    updates: "multiprocessing.Queue[Any]",
+    backlog: int,
+) -> None:
+    from kritor.app import KritorApp
+    from kritor.event.lifecycle import ApplicationLaunch, ApplicationShutdown
+
+    # 每个工作进程使用独立的 Broadcast 与 gRPC 连接, 发送消息不经过主进程
+    try:
+        app = KritorApp(account, ticket, host, port, passive=True)
+        if setup is not None:
+            setup(app)
+    except Exception as e:
+        # 初始化失败时把异常交给主进程抛出, 无法 pickle 的异常以其描述代替
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = RuntimeError(f"{e.__class__.__name__}: {e}")
+        updates.put((index, e))
+        return
+    # 首次上报表示初始化完成, 之后监听器变化时 (如 setup 之后注册或移除的监听器) 再次上报
+    updates.put((index, app.broadcast.subscriptions))
+    app.broadcast.listener_change_hooks.append(lambda: updates.put((index, app.broadcast.subscriptions)))
+
+    loop = asyncio.get_running_loop()
+    app.post_event(ApplicationLaunch(app))
+    # 会话 -> 该会话最后一个事件的分发任务, 后一个事件等前一个事件的监听器全部结束后才开始分发
+    tails: "Dict[bytes, asyncio.Task[None]]" = {}
+    pending: "Set[asyncio.Task[None]]" = set()
+    try:
+        while True:
+            data = await loop.run_in_executor(None, inbox.get)
+            if data is None:
+                break
+            event = EventStructure.FromString(data)
+            if app._is_duplicate(event):
+                continue
+            converted = app._accept_event(event)
+            if converted is None:
+                continue
+            if len(pending) >= backlog:
+                # 积压过多时暂停读取, 由收件箱的容量向主进程施加背压
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            key = conversation_key(event)
+            task = tails[key] = asyncio.create_task(_dispatch_after(app, converted, tails.get(key)))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            task.add_done_callback(lambda done, key=key: tails.get(key) is done and tails.pop(key))
+        if pending:
+            await asyncio.wait(pending)
+    finally:
+        for task in pending:
+            task.cancel()
+        app.post_event(ApplicationShutdown(app))
+        while app.broadcast.in_flight:
+            await asyncio.sleep(0.01)
+        await app.channels.aclose()
+
+
+async def _dispatch_after(app: "KritorApp", event: Dispatchable, previous: "Optional[asyncio.Task[None]]") -> None:
+    if previous is not None:
+        # 不直接 await, 以免本次分发被取消时连带取消前一个事件
+        await asyncio.wait((previous,))
+    await app.broadcast.wait_for_capacity()
+    task = app.post_event(event)
+    app.dispatched += 1
+    await asyncio.wait((task,))
+
+
+class EventWorkerPool:
+    """将事件按会话分片交给多个工作进程处理, 每个工作进程运行独立的 Broadcast.
+
+    同一会话的事件总是交给同一进程, 并在该进程中串行处理: 前一个事件的监听器全部结束后才开始分发后一个事件, \
+    不同会话之间仍然并发. 主进程只负责接收与转发序列化后的 protobuf.
+    生命周期事件 (ApplicationLaunch, AccountLaunch 等) 仍在主进程的 Broadcast 中分发.
+
+    工作进程中监听器的增减会上报给主进程, 主进程据此决定转发哪些事件以及打开哪些事件流.
+    """
+
+    subscriptions: FrozenSet[Type[Dispatchable]]
+    """所有工作进程当前监听的事件类"""
+
+    def __init__(
+        self,
+        app: "KritorApp",
+        workers: int,
+        setup: Optional[WorkerSetup] = None,
+        queue_size: int = 1024,
+    ) -> None:
+        """
+        Args:
+            app (KritorApp): 主进程的账号实例
+            workers (int): 工作进程数
+            setup (WorkerSetup, optional): 工作进程的初始化函数
+            queue_size (int, optional): 每个工作进程的待处理事件队列长度, 也是工作进程中等待分发的事件数上限. 默认为 1024.
+        """
+        if workers < 1:
+            raise ValueError("EventWorkerPool needs at least one worker.")
+        self.app = app
+        self.workers = workers
+        self.setup = setup
+        self.queue_size = queue_size
+        self.subscriptions = frozenset()
+        self.forwarded: List[int] = [0] * workers
+        # spawn 避免在已创建 gRPC 连接的进程中 fork
+        self._context = multiprocessing.get_context("spawn")
+        self._inboxes: List["multiprocessing.Queue[Optional[bytes]]"] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._updates: Optional["multiprocessing.Queue[Any]"] = None
+        self._worker_subscriptions: List[FrozenSet[Type[Dispatchable]]] = []
+        self._watcher: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._processes)
+
+    def is_subscribed(self, event_class: Type[Dispatchable]) -> bool:
+        subscriptions = self.subscriptions
+        return any(i in subscriptions for i in event_registry.lineage(event_class))
+
+    async def start(self, timeout: float = 60.0) -> None:
+        """启动工作进程, 并等待它们完成初始化.
+
+        Args:
+            timeout (float, optional): 等待所有工作进程完成初始化的最长时间 (秒). 默认为 60.
+
+        Raises:
+            asyncio.TimeoutError: 工作进程未在限定时间内完成初始化
+            RuntimeError: 工作进程在完成初始化前退出
+            Exception: 工作进程的初始化函数抛出的异常
+        """
+        loop = asyncio.get_running_loop()
+        updates = self._updates = self._context.Queue()
+        app = self.app
+        for index in range(self.workers):
+            inbox = self._context.Queue(self.queue_size)
+            process = self._context.Process(
+                target=_worker_main,
+                args=(index, app.account, app.ticket, app.host, app.port, self.setup, inbox, updates, self.queue_size),
+                name=f"kritor-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+
+        try:
+            reported = await self._wait_ready(updates, timeout)
+        except BaseException:
+            self._terminate()
+            raise
+        self._worker_subscriptions = reported  # type: ignore[assignment]
+        self.subscriptions = frozenset().union(*reported)  # type: ignore[arg-type]
+        self._watcher = asyncio.create_task(self._watch_subscriptions(updates))
+        logger.info(f"Started {self.workers} event worker(s)")
+
+    async def _wait_ready(
+        self, updates: "multiprocessing.Queue[Any]", timeout: float
+    ) -> List[FrozenSet[Type[Dispatchable]]]:
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        reported: List[Optional[FrozenSet[Type[Dispatchable]]]] = [None] * self.workers
+        while any(subscribed is None for subscribed in reported):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                pending = [self._processes[index].name for index, subscribed in enumerate(reported) if subscribed is None]
+                raise asyncio.TimeoutError(f"Event worker(s) {', '.join(pending)} did not finish setup in {timeout}s")
+            try:
+                index, subscribed = await loop.run_in_executor(None, updates.get, True, min(remaining, 0.5))
+            except queue.Empty:
+                # 初始化完成前退出的进程不会再上报 (如被系统杀死或导入失败)
+                for index, process in enumerate(self._processes):
+                    if reported[index] is None and not process.is_alive():
+                        raise RuntimeError(
+                            f"Event worker {process.name} exited with code {process.exitcode} before finishing setup"
+                        )
+                continue
+            if isinstance(subscribed, BaseException):
+                raise subscribed
+            reported[index] = subscribed
+        return reported  # type: ignore[return-value]
+
+    def _terminate(self) -> None:
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+            process.join(1)
+        self._inboxes = []
+        self._processes = []
+        self._updates = None
+
+    async def _watch_subscriptions(self, updates: "multiprocessing.Queue[Any]") -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            update = await loop.run_in_executor(None, updates.get)
+            if update is None:
+                return
+            index, subscribed = update
+            self._worker_subscriptions[index] = subscribed
+            subscriptions = frozenset().union(*self._worker_subscriptions)
+            if subscriptions != self.subscriptions:
+                self.subscriptions = subscriptions
+                self.app._sync_streams()
+
+    async def submit(self, event: EventStructure) -> None:
+        """将事件转发给对应的工作进程, 队列满时等待."""
+        index = shard_of(event, self.workers)
+        data = event.SerializeToString()
+        try:
+            self._inboxes[index].put_nowait(data)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, self._inboxes[index].put, data)
+        self.forwarded[index] += 1
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """通知工作进程处理完剩余事件后退出."""
+        loop = asyncio.get_running_loop()
+        for inbox in self._inboxes:
+            await loop.run_in_executor(None, inbox.put, None)
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"Event worker {process.name} did not exit in time, terminating")
+                process.terminate()
+        if self._updates is not None:
+            await loop.run_in_executor(None, self._updates.put, None)
+        if self._watcher is not None:
+            await self._watcher
+        self._inboxes = []
+        self._processes = []
+        self._updates = None
+        self._watcher = None
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(process.is_alive() for process in self._processes),
+            "forwarded": list(self.forwarded),
+        }
@@ -0,0 +1,28 @@
+import pytest
+
+from kritor.connection.backoff import ExponentialBackoff
+
+
+def test_delay_grows_until_maximum():
+    backoff = ExponentialBackoff(initial=0.5, maximum=30.0, multiplier=2.0, jitter=0)
+    assert [backoff.delay(i) for i in range(4)] == [0.5, 1.0, 2.0, 4.0]
+    assert backoff.delay(6) == 30.0
+    assert backoff.delay(7) == 30.0
+
+
+@pytest.mark.parametrize("attempt", [1024, 1100, 10**6])
+def test_delay_at_large_attempt_counts(attempt):
+    backoff = ExponentialBackoff()
+    assert 15.0 <= backoff.delay(attempt) <= 30.0
+
+
+def test_multiplier_of_one_is_constant():
+    backoff = ExponentialBackoff(initial=1.0, maximum=5.0, multiplier=1.0, jitter=0)
+    assert backoff.delay(0) == backoff.delay(10**6) == 1.0
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        ExponentialBackoff(multiplier=0.5)
+    with pytest.raises(ValueError):
+        ExponentialBackoff(jitter=2)
@@ -0,0 +1,270 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from kritor.app import KritorApp
+from kritor.bridge.event import subscribed_streams
+from kritor.bridge.message import to_sender
+from kritor.connection.backoff import ExponentialBackoff
+from kritor.event.mirai import BotLeaveEventKick, MemberCardChangeEvent, MemberPermissionChangeEvent
+from kritor.models.relationship import MemberPerm
+from kritor.protos.common.contact_pb2 import Contact, Scene, Sender
+from kritor.protos.event.event_pb2 import (
+    EventStructure,
+    EventType,
+    GroupAdminChangedNotice,
+    GroupCardChangedNotice,
+    GroupMemberDecreasedNotice,
+    GroupMemberIncreasedNotice,
+    NoticeEvent,
+)
+from kritor.protos.friend import friend_pb2
+from kritor.protos.group import group_pb2
+
+
+class FakeKritor:
+    """模拟 Kritor 的群组与好友接口, 记录每次调用"""
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.members = {1: [10, 11, 12], 2: [20]}
+        self.failures = {}
+
+    async def _call(self, name):
+        self.calls.append(name)
+        await asyncio.sleep(0.01)
+        if self.failures.get(name, 0):
+            self.failures[name] -= 1
+            raise RuntimeError(f"{name} unavailable")
+
+    async def GetGroupList(self, request):
+        await self._call("GetGroupList")
+        return group_pb2.GetGroupListResponse(
+            groups_info=[
+                group_pb2.GroupInfo(group_id=group_id, group_name=f"group {group_id}", owner=members[0], admins=[42])
+                for group_id, members in self.members.items()
+            ]
+        )
+
+    async def GetGroupInfo(self, request):
+        await self._call("GetGroupInfo")
+        return group_pb2.GetGroupInfoResponse()
+
+    async def GetGroupMemberList(self, request):
+        await self._call("GetGroupMemberList")
+        return group_pb2.GetGroupMemberListResponse(
+            group_members_info=[
+                group_pb2.GroupMemberInfo(uin=uin, nick=f"nick {uin}", card="card" if uin == 11 else "")
+                for uin in self.members[request.group_id]
+            ]
+        )
+
+    async def GetGroupMemberInfo(self, request):
+        await self._call("GetGroupMemberInfo")
+        return group_pb2.GetGroupMemberInfoResponse(
+            group_member_info=group_pb2.GroupMemberInfo(uin=request.target_uin, nick="newcomer")
+        )
+
+    async def GetFriendList(self, request):
+        await self._call("GetFriendList")
+        return friend_pb2.GetFriendListResponse(friends_info=[friend_pb2.FriendInfo(uin=7, nick="friend", remark="r")])
+
+
+class FakeChannels:
+    def __init__(self, kritor: FakeKritor) -> None:
+        self.kritor = kritor
+
+    @asynccontextmanager
+    async def alease(self, stub_type):
+        yield self.kritor
+
+
+def make_app(kritor: FakeKritor, **kwargs) -> KritorApp:
+    return KritorApp(
+        "42",
+        "ticket",
+        "localhost",
+        0,
+        channels=FakeChannels(kritor),
+        contact_cache=True,
+        reconnect_backoff=ExponentialBackoff(initial=0.01, maximum=0.02),
+        **kwargs,
+    )
+
+
+def test_concurrent_misses_share_one_rpc():
+    kritor = FakeKritor()
+
+    async def main():
+        cache = make_app(kritor).contact_cache
+        members = await asyncio.gather(*(cache.get_member(1, 11) for _ in range(20)))
+        newcomers = await asyncio.gather(*(cache.get_member(1, 99) for _ in range(20)))
+        return members, newcomers
+
+    members, newcomers = asyncio.run(main())
+    assert kritor.calls == ["GetGroupMemberList", "GetGroupMemberInfo"]
+    assert all(member is members[0] for member in members)
+    assert members[0].name == "card"
+    assert newcomers[0].name == "newcomer"
+
+
+def test_roles_and_sender_share_cached_instances():
+    kritor = FakeKritor()
+
+    async def main():
+        app = make_app(kritor)
+        await app.contact_cache.prefetch()
+        assert app.contact_cache.prefetched
+        group = await app.get_group(1)
+        owner = await app.get_member(1, 10)
+        sender = to_sender(Contact(scene=Scene.GROUP, peer="1"), Sender(uin=11, nick="nickname"), app.contacts)
+        return group, owner, sender, await app.get_member(1, 11)
+
+    group, owner, sender, cached = asyncio.run(main())
+    assert group.name == "group 1" and group.account_perm == MemberPerm.Administrator
+    assert owner.permission == MemberPerm.Owner
+    # 已知群名片时不被消息中的昵称覆盖
+    assert sender is cached and sender.name == "card"
+
+
+def test_refresh_prunes_departed_members_and_unknown_senders():
+    kritor = FakeKritor()
+
+    async def main():
+        app = make_app(kritor)
+        await app.contact_cache.prefetch()
+        to_sender(Contact(scene=Scene.GROUP, peer="1"), Sender(uin=13, nick="passer-by"), app.contacts)
+        to_sender(Contact(scene=Scene.GROUP, peer="3"), Sender(uin=30, nick="elsewhere"), app.contacts)
+        kritor.members = {1: [10, 11]}
+        await app.contact_cache.refresh()
+        return app, [member.id for member in await app.get_member_list(1)]
+
+    app, members = asyncio.run(main())
+    assert sorted(members) == [10, 11]
+    assert app.contacts.stats["groups"] == 1
+    assert app.contacts.stats["members"] == 2
+
+
+def test_failed_prefetch_is_retried_after_connecting():
+    kritor = FakeKritor()
+    kritor.failures = {"GetGroupList": 2, "GetGroupMemberList": 1}
+
+    async def main():
+        app = make_app(kritor)
+        app._set_connected(True)
+        for _ in range(100):
+            if app.contact_cache.prefetched:
+                break
+            await asyncio.sleep(0.01)
+        await app.contact_cache.stop()
+        return app.contact_cache
+
+    cache = asyncio.run(main())
+    assert cache.prefetched
+    assert kritor.calls.count("GetGroupList") == 3
+    assert cache.stats["members"] == 4
+
+
+def test_stale_lists_are_refreshed():
+    kritor = FakeKritor()
+
+    async def main():
+        cache = make_app(kritor, contact_ttl=0.05).contact_cache
+        await cache.get_groups()
+        await asyncio.sleep(0.06)
+        await cache.refresh(stale_only=True)
+        await cache.refresh(stale_only=True)
+
+    asyncio.run(main())
+    assert kritor.calls == ["GetGroupList", "GetGroupList"]
+
+
+def notice(**body) -> EventStructure:
+    return EventStructure(type=EventType.EVENT_TYPE_NOTICE, notice=NoticeEvent(**body))
+
+
+def test_notices_update_cache_without_refresh():
+    kritor = FakeKritor()
+
+    async def main():
+        app = make_app(kritor)
+        cache = app.contact_cache
+        await cache.prefetch()
+        calls = len(kritor.calls)
+        await app.receive_event(notice(group_card_changed=GroupCardChangedNotice(group_id=1, target_uin=10, new_card="new")))
+        await app.receive_event(notice(group_admin_changed=GroupAdminChangedNotice(group_id=1, target_uin=12, is_admin=True)))
+        await app.receive_event(notice(group_member_decrease=GroupMemberDecreasedNotice(group_id=1, target_uin=11)))
+        await app.receive_event(notice(group_member_increase=GroupMemberIncreasedNotice(group_id=1, target_uin=99)))
+        await app.receive_event(
+            notice(group_member_decrease=GroupMemberDecreasedNotice(group_id=2, target_uin=42, type=GroupMemberDecreasedNotice.KICK_ME))
+        )
+        await asyncio.gather(*cache._updaters)
+        members = {member.id: member for member in await app.get_member_list(1)}
+        groups = [group.id for group in await app.get_group_list()]
+        return app, members, kritor.calls[calls:], groups
+
+    app, members, calls, groups = asyncio.run(main())
+    assert calls == ["GetGroupMemberInfo"]
+    assert sorted(members) == [10, 12, 99]
+    assert members[10].name == "new"
+    assert members[12].permission == MemberPerm.Administrator
+    assert members[99].name == "newcomer"
+    assert groups == [1]
+    # 消息中的昵称不会覆盖通知中的群名片
+    sender = to_sender(Contact(scene=Scene.GROUP, peer="1"), Sender(uin=10, nick="nickname"), app.contacts)
+    assert sender.name == "new"
+
+
+def test_notices_are_converted_with_previous_state():
+    kritor = FakeKritor()
+    received = []
+
+    async def main():
+        app = make_app(kritor)
+        await app.contact_cache.prefetch()
+
+        @app.broadcast.receiver(MemberCardChangeEvent)
+        async def on_card(event: MemberCardChangeEvent):
+            pass
+
+        @app.broadcast.receiver(MemberPermissionChangeEvent)
+        async def on_permission(event: MemberPermissionChangeEvent):
+            pass
+
+        @app.broadcast.receiver(BotLeaveEventKick)
+        async def on_kicked(event: BotLeaveEventKick):
+            pass
+
+        await app.receive_event(
+            notice(group_card_changed=GroupCardChangedNotice(group_id=1, target_uin=11, operator_uin=10, new_card="new"))
+        )
+        await app.receive_event(notice(group_admin_changed=GroupAdminChangedNotice(group_id=1, target_uin=12, is_admin=True)))
+        await app.receive_event(
+            notice(group_member_decrease=GroupMemberDecreasedNotice(group_id=2, target_uin=42, operator_uin=20, type=GroupMemberDecreasedNotice.KICK_ME))
+        )
+        # 没有监听器的通知只更新联系人
+        await app.receive_event(notice(group_member_decrease=GroupMemberDecreasedNotice(group_id=1, target_uin=10)))
+        while len(app.intake):
+            received.append((await app.intake.get())[0])
+
+    asyncio.run(main())
+    card, permission, kicked = received
+    assert isinstance(card, MemberCardChangeEvent)
+    assert (card.origin, card.current, card.member.name, card.operator.id) == ("card", "new", "new", 10)
+    assert isinstance(permission, MemberPermissionChangeEvent)
+    assert (permission.origin, permission.current) == (MemberPerm.Member, MemberPerm.Administrator)
+    assert isinstance(kicked, BotLeaveEventKick) and kicked.group.id == 2 and kicked.operator.id == 20
+
+
+def test_notice_stream_is_opened_for_the_cache():
+    app = make_app(FakeKritor())
+    assert EventType.EVENT_TYPE_NOTICE not in subscribed_streams(app.broadcast.subscriptions)
+    opened = []
+
+    async def main():
+        app._loop = asyncio.get_running_loop()
+        app._consume_event_stream = lambda event_type: asyncio.sleep(0, opened.append(event_type))
+        app._sync_streams()
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert opened == [EventType.EVENT_TYPE_NOTICE]
@@ -0,0 +1,89 @@
+import asyncio
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.broadcast.entities.signatures import RemoveMe
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface
+from kritor.dispatcher import BaseDispatcher
+
+
+class IndexedEvent(Dispatchable):
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            pass
+
+
+class IndexedChild(IndexedEvent):
+    pass
+
+
+async def dispatch(broadcast: Broadcast, event: Dispatchable) -> None:
+    broadcast.postEvent(event)
+    while broadcast._background_tasks:
+        await asyncio.gather(*broadcast._background_tasks, return_exceptions=True)
+
+
+def test_index_follows_listener_changes():
+    received = []
+
+    async def main():
+        broadcast = Broadcast()
+        namespace = broadcast.createNamespace("plugin")
+
+        @broadcast.receiver(IndexedEvent)
+        async def parent():
+            received.append("parent")
+
+        @broadcast.receiver(IndexedChild, namespace=namespace)
+        async def child():
+            received.append("child")
+
+        await dispatch(broadcast, IndexedChild())
+        assert sorted(received) == ["child", "parent"]
+
+        # 事件类已经被索引后注册的监听器同样会收到事件
+        @broadcast.receiver(IndexedChild)
+        async def once():
+            received.append("once")
+            return RemoveMe()
+
+        received.clear()
+        await dispatch(broadcast, IndexedChild())
+        assert sorted(received) == ["child", "once", "parent"]
+
+        received.clear()
+        broadcast.disableNamespace("plugin")
+        await dispatch(broadcast, IndexedChild())
+        assert received == ["parent"]
+
+        received.clear()
+        broadcast.enableNamespace("plugin")
+        broadcast.removeListener(broadcast.getListener(parent))
+        await dispatch(broadcast, IndexedChild())
+        await dispatch(broadcast, IndexedEvent())
+        assert received == ["child"]
+
+    asyncio.run(main())
+
+
+def test_priority_changes_reorder_cached_layers():
+    received = []
+
+    async def main():
+        broadcast = Broadcast()
+
+        @broadcast.receiver(IndexedEvent, priority=1)
+        def first():
+            received.append("first")
+
+        @broadcast.receiver(IndexedEvent, priority=2)
+        def second():
+            received.append("second")
+
+        await dispatch(broadcast, IndexedEvent())
+        broadcast.getListener(second).add_priority(IndexedEvent, 0)
+        await dispatch(broadcast, IndexedEvent())
+
+    asyncio.run(main())
+    assert received == ["first", "second", "second", "first"]
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.entities.event import Dispatchable, event_registry
+from kritor.broadcast.exceptions import AmbiguousEventName, InvalidEventName
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface
+from kritor.dispatcher import BaseDispatcher
+from kritor.event.message import GroupMessage, MessageEvent
+
+
+class RegistryBase(Dispatchable):
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            pass
+
+
+class RegistryMixin:
+    pass
+
+
+class RegistryChild(RegistryMixin, RegistryBase):
+    pass
+
+
+def define_duplicate():
+    class RegistryDuplicate(RegistryBase):
+        pass
+
+    return RegistryDuplicate
+
+
+def test_find_by_name_and_path():
+    assert Broadcast.findEvent("RegistryChild") is RegistryChild
+    assert Broadcast.findEvent(f"{__name__}.RegistryChild") is RegistryChild
+    assert Broadcast.findEvent("GroupMessage") is GroupMessage
+    assert Broadcast.findEvent("NoSuchEvent") is None
+
+
+def test_duplicate_names_need_the_full_path():
+    first = define_duplicate()
+
+    class RegistryDuplicate(RegistryBase):
+        pass
+
+    assert set(event_registry.duplicates()["RegistryDuplicate"]) >= {first, RegistryDuplicate}
+    with pytest.raises(AmbiguousEventName):
+        Broadcast.findEvent("RegistryDuplicate")
+    assert Broadcast.findEvent(event_registry.path_of(first)) is first
+    # 同一路径的类被重新定义时以新的为准
+    redefined = define_duplicate()
+    assert Broadcast.findEvent(event_registry.path_of(first)) is redefined
+
+
+def test_lineage_skips_non_event_bases():
+    assert event_registry.lineage(RegistryChild) == (RegistryChild, RegistryBase)
+    assert MessageEvent in event_registry.lineage(GroupMessage)
+
+
+def test_receiver_by_name_listens_to_subclasses():
+    received = []
+
+    async def main():
+        broadcast = Broadcast()
+        broadcast.receiver("RegistryBase")(lambda: received.append("base"))
+        with pytest.raises(InvalidEventName):
+            broadcast.receiver("NoSuchEvent")
+        assert broadcast.is_subscribed(RegistryChild)
+        await broadcast.postEvent(RegistryChild())
+
+    asyncio.run(main())
+    assert received == ["base"]
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.builtin.event import EventExceptionThrown
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.broadcast.filter import Prefix
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface
+from kritor.dispatcher import BaseDispatcher
+
+
+class Text(Dispatchable):
+    def __init__(self, text: str) -> None:
+        self._text = text
+
+    @property
+    def text(self) -> str:
+        if not self._text:
+            raise ValueError("empty text")
+        return self._text
+
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            pass
+
+
+class Room:
+    def __init__(self, id: int) -> None:
+        self.id = id
+
+
+class Said(Text):
+    def __init__(self, text: str, room: int = 1, speaker: int = 10) -> None:
+        super().__init__(text)
+        self.room = Room(room)
+        self.speaker = speaker
+
+
+async def settle(broadcast: Broadcast) -> None:
+    while broadcast._background_tasks:
+        await asyncio.gather(*broadcast._background_tasks, return_exceptions=True)
+
+
+async def settle_post(broadcast: Broadcast, event: Dispatchable) -> None:
+    broadcast.postEvent(event)
+    await settle(broadcast)
+
+
+def test_failing_predicate_only_skips_its_listener():
+    received = []
+
+    async def main():
+        broadcast = Broadcast()
+
+        @broadcast.receiver(Text, where={"text": "hello"})
+        async def filtered():
+            received.append("filtered")
+
+        @broadcast.receiver(Text)
+        async def unfiltered():
+            received.append("unfiltered")
+
+        @broadcast.receiver(EventExceptionThrown)
+        async def on_error(event: EventExceptionThrown):
+            received.append(type(event.exception))
+
+        broadcast.postEvent(Text(""))
+        await settle(broadcast)
+
+    asyncio.run(main())
+    assert len(received) == 2
+    assert "unfiltered" in received and ValueError in received
+
+
+def recorder(received: list, name: str):
+    # 监听器的参数都会被解析, 不能借默认参数绑定名称
+    return lambda: received.append(name)
+
+
+def test_only_matching_listeners_are_scheduled():
+    received = []
+
+    async def main():
+        broadcast = Broadcast()
+        conditions = {
+            "room": {"room.id": 1},
+            "speakers": {"speaker": {10, 11}},
+            "roll": {"text": Prefix("/roll", "/r ")},
+            "said": {"__class__": Said},
+            "both": {"room.id": 2, "text": Prefix("/roll")},
+        }
+        for name, where in conditions.items():
+            broadcast.receiver(Text, where=where)(recorder(received, name))
+
+        results = []
+        events = (Said("/roll 3"), Said("hi", room=2, speaker=12), Said("/r 1", room=2), Said("/roll", room=2), Text("/roll"))
+        for event in events:
+            received.clear()
+            await settle_post(broadcast, event)
+            results.append(sorted(received))
+        return results
+
+    assert asyncio.run(main()) == [
+        ["roll", "room", "said", "speakers"],
+        ["said"],
+        ["roll", "said", "speakers"],
+        ["both", "roll", "said", "speakers"],
+        # Text 没有 room 与 speaker 属性, 相应的条件视为不满足
+        ["roll"],
+    ]
+
+
+def test_filtered_listeners_keep_priority_order():
+    received = []
+
+    async def main():
+        broadcast = Broadcast()
+        broadcast.receiver(Said, priority=3)(lambda: received.append("last"))
+        broadcast.receiver(Said, priority=1, where={"room.id": 1})(lambda: received.append("first"))
+        broadcast.receiver(Said, priority=2, where={"room.id": {1, 2}})(lambda: received.append("middle"))
+        await settle_post(broadcast, Said("hi"))
+        await settle_post(broadcast, Said("hi", room=2))
+
+    asyncio.run(main())
+    assert received == ["first", "middle", "last", "middle", "last"]
+
+
+@pytest.mark.parametrize(
+    "where", [lambda: {"": 1}, lambda: {"text": set()}, lambda: {"text": Prefix()}, lambda: {"text": Prefix("")}]
+)
+def test_invalid_conditions_are_rejected(where):
+    with pytest.raises(ValueError):
+        Broadcast().receiver(Said, where=where())(lambda: None)
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.broadcast.exceptions import PropagationCancelled
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface
+from kritor.dispatcher import BaseDispatcher
+
+
+class Beat(Dispatchable):
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            pass
+
+
+@pytest.mark.parametrize("inline", [True, False])
+def test_single_and_sync_listeners_run_in_the_dispatch_task(inline):
+    tasks = {}
+
+    async def main():
+        broadcast = Broadcast(inline_listeners=inline)
+
+        @broadcast.receiver(Beat, priority=1)
+        async def single():
+            tasks["single"] = asyncio.current_task()
+
+        @broadcast.receiver(Beat, priority=2)
+        def sync():
+            tasks["sync"] = asyncio.current_task()
+
+        @broadcast.receiver(Beat, priority=2)
+        async def concurrent():
+            tasks["concurrent"] = asyncio.current_task()
+
+        @broadcast.receiver(Beat, priority=3)
+        async def left():
+            tasks["left"] = asyncio.current_task()
+
+        @broadcast.receiver(Beat, priority=3)
+        async def right():
+            tasks["right"] = asyncio.current_task()
+
+        dispatch = broadcast.postEvent(Beat())
+        await dispatch
+        return dispatch
+
+    dispatch = asyncio.run(main())
+    assert (tasks["single"] is dispatch) is inline
+    assert (tasks["sync"] is dispatch) is inline
+    # 同层中唯一的异步监听器与同步监听器分开执行, 不再有并发的必要
+    assert (tasks["concurrent"] is dispatch) is inline
+    # 真正并发的异步监听器仍然各自运行在独立的 Task 中
+    assert len({tasks["left"], tasks["right"], dispatch}) == 3
+
+
+@pytest.mark.parametrize("cancel", [True, False])
+def test_propagation_cancelled_stops_the_layer(cancel):
+    finished = []
+
+    async def main():
+        broadcast = Broadcast(cancel_on_propagation=cancel)
+
+        @broadcast.receiver(Beat, priority=1)
+        async def stopper():
+            await asyncio.sleep(0)
+            raise PropagationCancelled
+
+        @broadcast.receiver(Beat, priority=1)
+        async def slow():
+            await asyncio.sleep(0.05)
+            finished.append("slow")
+
+        @broadcast.receiver(Beat, priority=2)
+        async def later():
+            finished.append("later")
+
+        await broadcast.postEvent(Beat())
+
+    asyncio.run(main())
+    assert finished == ([] if cancel else ["slow"])
@@ -0,0 +1,38 @@
+import asyncio
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.intake import EventIntake, OverflowPolicy
+
+
+class Tick(Dispatchable):
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+
+def test_created_outside_running_loop():
+    # Python 3.9 及以下在此处创建 asyncio 原语会绑定到 asyncio.run 之外的循环
+    intake = EventIntake(capacity=2)
+    broadcast = Broadcast(max_in_flight=1)
+    assert intake._conditions is None and broadcast._capacity_event is None
+
+    async def main():
+        consumer = asyncio.gather(*(intake.get() for _ in range(4)))
+        for index in range(4):
+            await intake.put(Tick(index))
+        await broadcast.wait_for_capacity()
+        return [event.index for event, _ in await consumer]
+
+    assert asyncio.run(main()) == [0, 1, 2, 3]
+
+
+def test_drop_oldest_when_full():
+    intake = EventIntake(capacity=2, policy=OverflowPolicy.DropOldest)
+
+    async def main():
+        for index in range(3):
+            assert await intake.put(Tick(index))
+        return [(await intake.get())[0].index for _ in range(2)]
+
+    assert asyncio.run(main()) == [1, 2]
+    assert intake.stats == {"queued": 0, "received": 3, "shed": 1}
@@ -0,0 +1,122 @@
+import asyncio
+import types
+
+import pytest
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface
+from kritor.broadcast.interrupt import InterruptControl
+from kritor.broadcast.interrupt.waiter import Waiter
+from kritor.dispatcher import BaseDispatcher
+
+
+class Ping(Dispatchable):
+    def __init__(self, key: int, value: str) -> None:
+        self.key = key
+        self.value = value
+
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            if interface.annotation is Ping:
+                return interface.event
+
+
+def ping_key(event: Ping) -> int:
+    return event.key
+
+
+def waiter_for_ping(key_by=lambda event: event.key):
+    @Waiter.create_using_function([Ping], key_by=key_by)
+    async def waiter(event: Ping):
+        return event.value
+
+    return waiter
+
+
+def test_keyed_waits_share_one_listener_and_release_it():
+    async def main():
+        broadcast = Broadcast()
+        interrupt = InterruptControl(broadcast)
+        first = asyncio.create_task(interrupt.wait(waiter_for_ping(), key=1))
+        second = asyncio.create_task(interrupt.wait(waiter_for_ping(), key=2))
+        await asyncio.sleep(0)
+        assert len(broadcast.listeners) == 1
+        assert broadcast.is_subscribed(Ping)
+
+        broadcast.postEvent(Ping(1, "one"))
+        assert await first == "one"
+        assert len(broadcast.listeners) == 1
+
+        broadcast.postEvent(Ping(2, "two"))
+        assert await second == "two"
+        assert broadcast.listeners == []
+        assert not broadcast.is_subscribed(Ping)
+        assert interrupt.pending == 0
+
+        third = asyncio.create_task(interrupt.wait(waiter_for_ping(), key=3))
+        await asyncio.sleep(0)
+        assert broadcast.is_subscribed(Ping)
+        broadcast.postEvent(Ping(3, "three"))
+        assert await third == "three"
+        assert not broadcast.is_subscribed(Ping)
+
+    asyncio.run(main())
+
+
+def test_timed_out_wait_releases_listener():
+    async def main():
+        broadcast = Broadcast()
+        interrupt = InterruptControl(broadcast)
+        with pytest.raises(asyncio.TimeoutError):
+            await interrupt.wait(waiter_for_ping(), key=1, timeout=0.01)
+        assert broadcast.listeners == []
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("key", [None, 1])
+def test_priority_zero_is_honoured(key):
+    async def main():
+        broadcast = Broadcast()
+        interrupt = InterruptControl(broadcast)
+        task = asyncio.create_task(interrupt.wait(waiter_for_ping(), priority=0, key=key))
+        await asyncio.sleep(0)
+        priorities = [listener.priority for listener in broadcast.listeners]
+        broadcast.postEvent(Ping(1, "one"))
+        await task
+        return priorities
+
+    assert asyncio.run(main()) == [0]
+
+
+def test_hubs_are_keyed_by_the_key_function():
+    def key_by_value(suffix):
+        return lambda event: event.value + suffix
+
+    # 与其他模块中写法相同的函数代码对象相等, 但读取的全局变量不同
+    suffixed = lambda event: event.value + SUFFIX  # noqa: E731, F821
+    exclaimed = types.FunctionType(suffixed.__code__, {"SUFFIX": "!"})
+    questioned = types.FunctionType(suffixed.__code__, {"SUFFIX": "?"})
+
+    async def main():
+        broadcast = Broadcast()
+        interrupt = InterruptControl(broadcast)
+        # 代码相同而闭包不同的 key_by 不能共用一张表
+        first = asyncio.create_task(interrupt.wait(waiter_for_ping(key_by_value("!")), key="one!"))
+        second = asyncio.create_task(interrupt.wait(waiter_for_ping(key_by_value("?")), key="one!"))
+        third = asyncio.create_task(interrupt.wait(waiter_for_ping(exclaimed), key="one!"))
+        fourth = asyncio.create_task(interrupt.wait(waiter_for_ping(questioned), key="one!"))
+        shared = [asyncio.create_task(interrupt.wait(waiter_for_ping(ping_key), key=key)) for key in (1, 2)]
+        await asyncio.sleep(0)
+        (hub,) = interrupt._hubs.values()
+        assert len(hub.tables) == 5
+
+        broadcast.postEvent(Ping(1, "one"))
+        assert await first == "one" and await third == "one" and await shared[0] == "one"
+        assert not second.done() and not fourth.done()
+        for task in (second, fourth, shared[1]):
+            task.cancel()
+
+    asyncio.run(main())
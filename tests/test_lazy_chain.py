@@ -0,0 +1,67 @@
+import copy
+
+import pytest
+
+from kritor.bridge.message import LazyMessageChain, to_message_chain
+from kritor.message.chain import MessageChain
+from kritor.message.element import At, Plain
+from kritor.protos.common.message_element_pb2 import AtElement, Element, TextElement
+
+
+def raw_elements():
+    return [
+        Element(type=Element.TEXT, text=TextElement(text="/roll ")),
+        Element(type=Element.AT, at=AtElement(uin=12345)),
+        Element(type=Element.TEXT, text=TextElement(text=" 1d6")),
+    ]
+
+
+@pytest.fixture
+def lazy():
+    chain = to_message_chain(raw_elements(), lazy=True)
+    assert isinstance(chain, LazyMessageChain)
+    return chain
+
+
+@pytest.fixture
+def eager():
+    return to_message_chain(raw_elements())
+
+
+def test_fast_paths_do_not_materialize(lazy):
+    assert lazy.startswith("/roll")
+    assert lazy.endswith("1d6")
+    assert lazy.has(At)
+    assert [i.target for i in lazy.get(At)] == [12345]
+    assert not lazy.materialized
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        lambda chain: chain.copy(),
+        lambda chain: chain[0:1],
+        lambda chain: chain + MessageChain("tail"),
+        lambda chain: chain.include(Plain),
+        lambda chain: chain.exclude(At),
+        lambda chain: chain.removeprefix("/roll"),
+        lambda chain: chain.removesuffix("1d6"),
+        lambda chain: chain.replace("1d6", "2d6"),
+        lambda chain: copy.deepcopy(chain),
+    ],
+)
+def test_derived_chains_match_eager(lazy, eager, operation):
+    derived, expected = operation(lazy), operation(eager)
+    assert isinstance(derived, MessageChain)
+    assert derived.content == expected.content
+    assert str(derived) == str(expected)
+
+
+def test_iadd_on_lazy_chain(lazy, eager):
+    lazy += MessageChain("!")
+    eager += MessageChain("!")
+    assert lazy.content == eager.content
+
+
+def test_serialization_materializes(lazy, eager):
+    assert lazy.model_dump() == eager.model_dump()
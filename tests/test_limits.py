@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.builtin.event import EventExceptionThrown
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.broadcast.exceptions import ListenerTimeout
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface
+from kritor.dispatcher import BaseDispatcher
+
+
+class Job(Dispatchable):
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            if interface.annotation is Job:
+                return interface.event
+
+
+async def settle(broadcast: Broadcast) -> None:
+    while broadcast._background_tasks:
+        await asyncio.gather(*broadcast._background_tasks, return_exceptions=True)
+
+
+def run_burst(overflow: str, events: int = 3):
+    finished = []
+    peak = []
+    active = [0]
+
+    async def main():
+        broadcast = Broadcast()
+
+        @broadcast.receiver(Job, max_concurrency=1, overflow=overflow)
+        async def slow(job: Job):
+            active[0] += 1
+            peak.append(active[0])
+            try:
+                await asyncio.sleep(0.02)
+            finally:
+                active[0] -= 1
+            finished.append(job.index)
+
+        for index in range(events):
+            broadcast.postEvent(Job(index))
+        await settle(broadcast)
+        return broadcast.getListener(slow).gate
+
+    gate = asyncio.run(main())
+    assert max(peak) == 1
+    return finished, gate
+
+
+def test_queue_runs_every_event_one_at_a_time():
+    finished, gate = run_burst("queue")
+    assert finished == [0, 1, 2]
+    assert gate.active == 0
+
+
+def test_drop_skips_events_while_busy():
+    finished, gate = run_burst("drop")
+    assert finished == [0]
+    assert gate.dropped == 2
+
+
+def test_cancel_oldest_keeps_the_newest():
+    finished, gate = run_burst("cancel_oldest")
+    assert finished == [2]
+    assert gate.cancelled == 2
+
+
+def test_namespace_limit_is_shared_by_its_listeners():
+    peak = []
+    active = [0]
+
+    async def main():
+        broadcast = Broadcast()
+        namespace = broadcast.createNamespace("plugin", max_concurrency=1)
+
+        async def handle():
+            active[0] += 1
+            peak.append(active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+
+        broadcast.receiver(Job, namespace=namespace)(lambda: handle())
+        broadcast.receiver(Job, namespace=namespace)(lambda: handle())
+        broadcast.postEvent(Job(0))
+        broadcast.postEvent(Job(1))
+        await settle(broadcast)
+
+    asyncio.run(main())
+    assert len(peak) == 4 and max(peak) == 1
+
+
+def test_timeout_is_reported():
+    errors = []
+
+    async def main():
+        broadcast = Broadcast(timer_resolution=0.01)
+
+        @broadcast.receiver(Job, timeout=0.02)
+        async def stuck():
+            await asyncio.sleep(10)
+
+        @broadcast.receiver(EventExceptionThrown)
+        async def on_error(event: EventExceptionThrown):
+            errors.append(event.exception)
+
+        broadcast.postEvent(Job(0))
+        await settle(broadcast)
+
+    asyncio.run(main())
+    assert len(errors) == 1 and isinstance(errors[0], ListenerTimeout)
+
+
+def test_invalid_limits_are_rejected():
+    broadcast = Broadcast()
+    with pytest.raises(ValueError):
+        broadcast.receiver(Job, max_concurrency=0)(lambda: None)
+    with pytest.raises(ValueError):
+        broadcast.receiver(Job, max_concurrency=1, overflow="later")(lambda: None)
@@ -0,0 +1,67 @@
+import pytest
+
+from kritor.bridge.message import EncodedMessageCache, to_message, to_message_chain
+from kritor.message.chain import MessageChain
+from kritor.message.element import At, Face, FlashImage, Image, Plain, Video, Voice
+
+
+def round_trip(chain: MessageChain, lazy: bool = False) -> MessageChain:
+    return to_message_chain(to_message(chain), lazy=lazy)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_round_trip(lazy):
+    chain = MessageChain(
+        [
+            Plain("hello "),
+            At(10001),
+            Face(14),
+            Image(id="0123456789abcdef", url="https://example.com/a.png"),
+            FlashImage(id="fedcba9876543210", data_bytes=b"\x89PNG"),
+        ]
+    )
+    decoded = round_trip(chain, lazy)
+    assert [element.__class__ for element in decoded] == [element.__class__ for element in chain]
+    assert decoded == chain
+    image, flash = decoded[Image]
+    assert image.id == "0123456789abcdef" and image.url == "https://example.com/a.png"
+    assert flash.id == "fedcba9876543210" and flash.binary == b"\x89PNG"
+
+
+@pytest.mark.parametrize(
+    "element", [Voice(id="voice", url="https://example.com/a.amr"), Video(url="https://example.com/a.mp4")]
+)
+def test_special_element_round_trip(element):
+    decoded = round_trip(MessageChain([element]))
+    assert decoded == MessageChain([element])
+    assert decoded[0].id == element.id and decoded[0].url == element.url
+
+
+def test_file_name_round_trip():
+    decoded = round_trip(MessageChain([Image(id="abc.jpg")]))
+    assert decoded[Image][0].id == "abc.jpg"
+
+
+def test_fingerprint_does_not_read_media(tmp_path, monkeypatch):
+    path = tmp_path / "image.png"
+    path.write_bytes(b"first")
+    chain = MessageChain([Plain("menu"), Image(path=path), Image(data_bytes=b"raw"), Image(url="https://a")])
+
+    def fail(self):
+        raise AssertionError("fingerprint must not encode or read media")
+
+    monkeypatch.setattr(type(chain[Image][0]), "base64", property(fail))
+    monkeypatch.setattr("pathlib.Path.read_bytes", fail)
+    key = EncodedMessageCache.fingerprint(chain)
+    assert key == EncodedMessageCache.fingerprint(chain.copy())
+    assert key != EncodedMessageCache.fingerprint(
+        MessageChain([Plain("menu"), Image(path=path), Image(data_bytes=b"RAW"), Image(url="https://a")])
+    )
+
+
+def test_encoded_cache_hits_identical_chains():
+    cache = EncodedMessageCache(capacity=2)
+    first = cache.encode(MessageChain([Plain("hi"), Image(id="md5", url="https://a")]))
+    second = cache.encode(MessageChain([Plain("hi"), Image(id="md5", url="https://a")]))
+    assert first == second
+    assert cache.stats == {"size": 1, "hits": 1, "misses": 1}
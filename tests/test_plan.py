@@ -0,0 +1,105 @@
+import asyncio
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface
+from kritor.broadcast.plan import ParameterPlan
+from kritor.dispatcher import BaseDispatcher
+
+calls = []
+
+
+class Author:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+class Note:
+    def __init__(self, author: Author) -> None:
+        self.author = author
+
+
+class Posted(Dispatchable):
+    def __init__(self, author: str, loud: bool = False) -> None:
+        self.note = Note(Author(author))
+        self.loud = loud
+
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            calls.append(interface.name)
+            if interface.annotation is Author:
+                return interface.event.note.author
+            if interface.annotation is str and interface.event.loud:
+                return interface.event.note.author.name.upper()
+
+
+class Quiet(BaseDispatcher):
+    @staticmethod
+    async def catch(interface: DispatcherInterface):
+        if interface.annotation is str:
+            return "quiet"
+
+
+async def dispatch(broadcast: Broadcast, event: Dispatchable) -> None:
+    broadcast.postEvent(event)
+    while broadcast._background_tasks:
+        await asyncio.gather(*broadcast._background_tasks, return_exceptions=True)
+
+
+def test_plan_reads_attributes_directly():
+    received = []
+
+    async def main():
+        broadcast = Broadcast()
+
+        @broadcast.receiver(Posted)
+        async def listener(event: Posted, author: Author):
+            received.append((event, author))
+
+        first, second = Posted("alice"), Posted("bob")
+        await dispatch(broadcast, first)
+        calls.clear()
+        await dispatch(broadcast, second)
+        return broadcast.getListener(listener), first, second
+
+    listener, first, second = asyncio.run(main())
+    plan = listener.plans[Posted]
+    assert isinstance(plan, ParameterPlan) and not plan.dispatched
+    # 第二次调度直接读取 event.note.author, 不再询问事件的 Dispatcher
+    assert calls == []
+    assert received == [(first, first.note.author), (second, second.note.author)]
+
+
+def test_plan_falls_back_when_a_step_returns_none():
+    received = []
+
+    async def main():
+        broadcast = Broadcast()
+
+        @broadcast.receiver(Posted, dispatchers=[Quiet])
+        async def listener(text: str):
+            received.append(text)
+
+        await dispatch(broadcast, Posted("alice", loud=True))
+        await dispatch(broadcast, Posted("bob", loud=False))
+        await dispatch(broadcast, Posted("carol", loud=True))
+        return broadcast.getListener(listener)
+
+    listener = asyncio.run(main())
+    assert [i[0] for i in listener.plans[Posted].dispatched] == ["text"]
+    assert received == ["ALICE", "quiet", "CAROL"]
+
+
+def test_plans_can_be_disabled():
+    async def main():
+        broadcast = Broadcast(compile_plans=False)
+
+        @broadcast.receiver(Posted)
+        async def listener(author: Author):
+            pass
+
+        await dispatch(broadcast, Posted("alice"))
+        return broadcast.getListener(listener)
+
+    assert asyncio.run(main()).plans == {}
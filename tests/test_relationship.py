@@ -0,0 +1,118 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from kritor.app import KritorApp
+from kritor.context import kritor_ctx
+from kritor.models.relationship import Friend, GroupConfig, MemberInfo, MemberPerm
+from kritor.protos.friend import friend_pb2
+from kritor.protos.group import group_pb2
+
+
+class FakeKritor:
+    """记录收到的请求并返回固定资料的 Kritor 群组与好友接口"""
+
+    def __init__(self) -> None:
+        self.requests = []
+
+    async def _record(self, request):
+        self.requests.append(request)
+
+    async def ModifyGroupName(self, request):
+        await self._record(request)
+        return group_pb2.ModifyGroupNameResponse()
+
+    async def ModifyMemberCard(self, request):
+        await self._record(request)
+        return group_pb2.ModifyMemberCardResponse()
+
+    async def SetGroupUniqueTitle(self, request):
+        await self._record(request)
+        return group_pb2.SetGroupUniqueTitleResponse()
+
+    async def SetGroupAdmin(self, request):
+        await self._record(request)
+        return group_pb2.SetGroupAdminResponse()
+
+    async def GetGroupMemberInfo(self, request):
+        await self._record(request)
+        return group_pb2.GetGroupMemberInfoResponse(
+            group_member_info=group_pb2.GroupMemberInfo(
+                uin=request.target_uin, nick="nick", card="card", age=20, level=64, unique_title="title"
+            )
+        )
+
+    async def GetFriendProfileCard(self, request):
+        await self._record(request)
+        return friend_pb2.GetFriendProfileCardResponse(
+            friends_profile_card=[friend_pb2.ProfileCard(uin=uin, nick="friend", remark="r", level=3) for uin in request.target_uins]
+        )
+
+
+class FakeChannels:
+    def __init__(self, kritor: FakeKritor) -> None:
+        self.kritor = kritor
+
+    @asynccontextmanager
+    async def alease(self, stub_type):
+        yield self.kritor
+
+
+def run_with_app(call):
+    kritor = FakeKritor()
+    app = KritorApp("42", "ticket", "localhost", 0, channels=FakeChannels(kritor))
+
+    async def main():
+        token = kritor_ctx.set(app)
+        try:
+            return await call(app)
+        finally:
+            kritor_ctx.reset(token)
+
+    return kritor, app, asyncio.run(main())
+
+
+def test_modify_config_renames_group():
+    async def call(app):
+        group = app.contacts.group(1, name="old")
+        await group.modify_config(GroupConfig(name="new"))
+        return group
+
+    kritor, _, group = run_with_app(call)
+    assert [(r.group_id, r.group_name) for r in kritor.requests] == [(1, "new")]
+    assert group.name == "new"
+
+
+def test_member_profile_updates_member():
+    async def call(app):
+        member = app.contacts.member(1, 2, name="nick")
+        return member, await member.get_profile()
+
+    _, _, (member, profile) = run_with_app(call)
+    assert (profile.nickname, profile.age, profile.level, profile.sex) == ("nick", 20, 64, "UNKNOWN")
+    assert member.name == "card" and member.special_title == "title"
+
+
+def test_friend_profile():
+    async def call(app):
+        return await Friend(id=3, nickname="", remark="").get_profile()
+
+    kritor, app, profile = run_with_app(call)
+    assert list(kritor.requests[0].target_uins) == [3]
+    assert (profile.nickname, profile.level) == ("friend", 3)
+    assert app.contacts.friend(3).remark == "r"
+
+
+def test_modify_member_info_and_admin():
+    async def call(app):
+        member = app.contacts.member(1, 2, name="nick")
+        await member.modify_info(MemberInfo(name="card", specialTitle="title"))
+        await member.modify_admin(True)
+        return member
+
+    kritor, app, member = run_with_app(call)
+    card, title, admin = kritor.requests
+    assert (card.group_id, card.target_uin, card.card) == (1, 2, "card")
+    assert title.unique_title == "title"
+    assert admin.is_admin
+    assert member.name == "card" and member.special_title == "title"
+    assert member.permission == MemberPerm.Administrator
@@ -0,0 +1,57 @@
+import asyncio
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.builtin.event import EventExceptionThrown
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface
+from kritor.dispatcher import BaseDispatcher
+
+
+class Post(Dispatchable):
+    def __init__(self, group: object) -> None:
+        self.group = group
+
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            pass
+
+
+def group_of(event: Post) -> int:
+    return int(event.group)
+
+
+async def settle(broadcast: Broadcast) -> None:
+    while broadcast._background_tasks:
+        await asyncio.gather(*broadcast._background_tasks, return_exceptions=True)
+
+
+def test_failing_key_only_skips_its_listener():
+    received = []
+
+    async def main():
+        broadcast = Broadcast()
+
+        @broadcast.receiver(Post, serialize_by=group_of)
+        async def serialized():
+            received.append("serialized")
+
+        @broadcast.receiver(Post)
+        async def plain():
+            received.append("plain")
+
+        @broadcast.receiver(EventExceptionThrown)
+        async def on_error(event: EventExceptionThrown):
+            received.append(type(event.exception))
+
+        broadcast.postEvent(Post("not a number"))
+        await settle(broadcast)
+        broadcast.postEvent(Post(1))
+        await settle(broadcast)
+        return broadcast.getListener(serialized).serializer
+
+    serializer = asyncio.run(main())
+    assert received.count("plain") == 2
+    assert received.count("serialized") == 1
+    assert ValueError in received
+    assert len(serializer) == 0
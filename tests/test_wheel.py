@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from kritor.broadcast import Broadcast
+from kritor.broadcast.entities.event import Dispatchable
+from kritor.broadcast.interfaces.dispatcher import DispatcherInterface
+from kritor.broadcast.wheel import TimingWheel
+from kritor.dispatcher import BaseDispatcher
+
+
+class Alarm(Dispatchable):
+    class Dispatcher(BaseDispatcher):
+        @staticmethod
+        async def catch(interface: DispatcherInterface):
+            pass
+
+
+def test_timers_fire_in_order_across_levels():
+    fired = []
+
+    async def main():
+        # 两层各 4 个槽, 超过 4 个刻度的定时器先放在第二层, 到期前再降到第一层
+        wheel = TimingWheel(resolution=0.005, wheel_sizes=(4, 4))
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for delay in (0.07, 0.002, 0.03, 0.012, 0.1):
+            wheel.call_later(delay, lambda delay=delay: fired.append((delay, loop.time() - start)))
+        cancelled = wheel.call_later(0.02, fired.append, "cancelled")
+        assert len(wheel) == 6
+        cancelled.cancel()
+        assert len(wheel) == 5
+        while len(wheel):
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert [delay for delay, _ in fired] == [0.002, 0.012, 0.03, 0.07, 0.1]
+    assert all(elapsed >= delay for delay, elapsed in fired)
+
+
+def test_wait_future_times_out():
+    async def main():
+        wheel = TimingWheel(resolution=0.005)
+        loop = asyncio.get_running_loop()
+        with pytest.raises(asyncio.TimeoutError):
+            await wheel.wait_future(loop.create_future(), 0.01)
+        done = loop.create_future()
+        loop.call_soon(done.set_result, "done")
+        assert await wheel.wait_future(done, 10) == "done"
+        return len(wheel)
+
+    assert asyncio.run(main()) == 0
+
+
+def test_delayed_events_can_be_cancelled():
+    received = []
+
+    async def main():
+        broadcast = Broadcast(timer_resolution=0.005)
+
+        @broadcast.receiver(Alarm)
+        async def on_alarm(event: Alarm):
+            received.append(event)
+
+        delivered, dropped = Alarm(), Alarm()
+        broadcast.postEventLater(0.01, delivered)
+        broadcast.postEventLater(0.01, dropped).cancel()
+        await asyncio.sleep(0.05)
+        return delivered
+
+    delivered = asyncio.run(main())
+    assert received == [delivered]
@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+import pytest
+
+from kritor.app import KritorApp
+from kritor.bridge.message import to_message
+from kritor.event.message import GroupMessage
+from kritor.protos.common.contact_pb2 import Contact, Scene, Sender
+from kritor.protos.common.message_data_pb2 import PushMessageBody
+from kritor.protos.event.event_pb2 import EventStructure, EventType
+from kritor.worker import EventWorkerPool
+
+
+def failing_setup(app: KritorApp) -> None:
+    raise ValueError("bad setup")
+
+
+def exiting_setup(app: KritorApp) -> None:
+    os._exit(3)
+
+
+def test_setup_error_is_raised_by_start():
+    app = KritorApp("42", "ticket", "localhost", 0, passive=True)
+    pool = EventWorkerPool(app, 2, failing_setup)
+
+    async def main():
+        with pytest.raises(ValueError, match="bad setup"):
+            await pool.start(timeout=30)
+
+    asyncio.run(main())
+    assert not pool.started
+
+
+def test_worker_exiting_during_setup_fails_start():
+    app = KritorApp("42", "ticket", "localhost", 0, passive=True)
+    pool = EventWorkerPool(app, 1, exiting_setup)
+
+    async def main():
+        with pytest.raises(RuntimeError, match="exited with code 3"):
+            await pool.start(timeout=30)
+
+    asyncio.run(main())
+    assert not pool.started
+
+
+def recording_setup(app: KritorApp) -> None:
+    path = os.environ["KRITOR_TEST_RECORD"]
+
+    @app.broadcast.receiver(GroupMessage)
+    async def record(event: GroupMessage):
+        text = str(event.message_chain)
+        # 先到的事件处理得更慢, 不串行时后到的事件会先写入
+        await asyncio.sleep(0.1 if text == "first" else 0)
+        with open(path, "a") as f:
+            f.write(f"{text}\n")
+
+
+def group_message(seq: int, text: str) -> EventStructure:
+    return EventStructure(
+        type=EventType.EVENT_TYPE_MESSAGE,
+        message=PushMessageBody(
+            message_seq=seq,
+            contact=Contact(scene=Scene.GROUP, peer="1"),
+            sender=Sender(uin=10, nick="nick"),
+            elements=to_message(text),
+        ),
+    )
+
+
+def test_conversation_is_handled_in_order(tmp_path, monkeypatch):
+    record = tmp_path / "record"
+    monkeypatch.setenv("KRITOR_TEST_RECORD", str(record))
+    app = KritorApp("42", "ticket", "localhost", 0, passive=True, workers=1, worker_setup=recording_setup)
+
+    async def main():
+        await app.workers.start(timeout=30)
+        for seq, text in enumerate(["first", "second", "third"]):
+            await app.receive_event(group_message(seq, text))
+        await app.workers.stop()
+
+    asyncio.run(main())
+    assert record.read_text().split() == ["first", "second", "third"]